@@ -0,0 +1,86 @@
+# achievements.py - pratik olaylarıyla tetiklenen bildirimsel başarım kuralları
+
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+
+@dataclass(frozen=True)
+class AchievementRule:
+    type: str
+    name: str
+    description: str
+    inputs: frozenset  # kuralın okuduğu özet alanları; yalnızca bunlar değişince değerlendirilir
+    condition: Callable[[dict], bool]
+
+
+RULES: dict[str, AchievementRule] = {}
+
+
+def register_rule(type: str, name: str, description: str, inputs: Iterable[str], condition: Callable[[dict], bool]):
+    """Yeni bir başarım kuralı ekle (aynı type yeniden kaydedilirse üzerine yazılır)"""
+    RULES[type] = AchievementRule(type, name, description, frozenset(inputs), condition)
+
+
+register_rule("first_practice", "İlk Adım", "İlk kelime pratiğin!",
+              {"total_practice"}, lambda p: p["total_practice"] >= 1)
+register_rule("perfect_score", "Mükemmel", "İlk 1.0 skorun!",
+              {"best_score"}, lambda p: p["best_score"] >= 1.0)
+register_rule("consistent_learner", "Düzenli Öğrenci", "10 kelime pratik ettin!",
+              {"total_practice"}, lambda p: p["total_practice"] >= 10)
+register_rule("improvement", "Gelişen", "Skorunda iyileşme var!",
+              {"improvement_trend"}, lambda p: p["improvement_trend"] > 0.1)
+register_rule("dedicated", "Azimli", "50 kelime pratik ettin!",
+              {"total_practice"}, lambda p: p["total_practice"] >= 50)
+
+
+def evaluate_practice_event(
+    conn: sqlite3.Connection,
+    user_id: int,
+    changed: set,
+    values: dict,
+    lazy_values: Optional[dict[str, Callable[[], object]]] = None,
+    unlocked_at: Optional[str] = None,
+) -> list[dict]:
+    """Girdisi değişen ve henüz açılmamış kuralları tek geçişte değerlendir, kazanılanları toplu ekle.
+
+    values hazır özet alanlarıdır; lazy_values yalnızca bir aday kural ihtiyaç duyarsa
+    hesaplanan (ek sorgu gerektiren) alanlardır. Commit çağırana aittir.
+    """
+    candidates = [rule for rule in RULES.values() if rule.inputs & changed]
+    if not candidates:
+        return []
+
+    unlocked = {row[0] for row in conn.execute(
+        "SELECT achievement_type FROM achievements WHERE user_id = ?", (user_id,)
+    )}
+    candidates = [rule for rule in candidates if rule.type not in unlocked]
+    if not candidates:
+        return []
+
+    inputs = dict(values)
+    for key in frozenset().union(*(rule.inputs for rule in candidates)) - inputs.keys():
+        inputs[key] = lazy_values[key]()
+
+    earned = [rule for rule in candidates if rule.condition(inputs)]
+    if earned:
+        conn.executemany("""
+            INSERT OR IGNORE INTO achievements (user_id, achievement_type, achievement_name, description, unlocked_at)
+            VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+        """, [(user_id, rule.type, rule.name, rule.description, unlocked_at) for rule in earned])
+
+    return [{"name": rule.name, "description": rule.description, "type": rule.type} for rule in earned]
+
+
+def fetch_achievements(conn: sqlite3.Connection, user_id: int) -> list[dict]:
+    """Kullanıcının açtığı başarımlar, yeniden eskiye"""
+    cursor = conn.execute("""
+        SELECT achievement_name, description, unlocked_at, achievement_type
+        FROM achievements
+        WHERE user_id = ?
+        ORDER BY unlocked_at DESC
+    """, (user_id,))
+    return [
+        {"name": row[0], "description": row[1], "unlocked_at": row[2], "type": row[3]}
+        for row in cursor
+    ]
@@ -1,77 +1,222 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, status
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Request, Response, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from fastapi.responses import FileResponse, RedirectResponse
 from pydantic import BaseModel
 from pathlib import Path
-import shutil
-import tempfile
 import os
-from jiwer import wer
-from Levenshtein import distance
-import whisper
-import torch
+import json
+import math
+import sqlite3
+import asyncio
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-import sqlite3
-from contextlib import contextmanager
+from contextlib import closing
+from db import ConnectionPool
+from migrations import migrate
+from achievements import fetch_achievements
+from progress import (
+    fetch_recent_scores,
+    fetch_stats_version,
+    fetch_user_stats,
+    fetch_word_stats,
+    improvement_trend,
+    is_valid_timezone,
+    record_practice,
+)
+from starlette.concurrency import run_in_threadpool
+from service_scoring import (
+    calculate_asr_accuracy,
+    calculate_batch_scores,
+    calculate_final_score,
+    calculate_phoneme_similarity,
+)
+from audio import SAMPLE_RATE, NoSpeechError, load_audio_bytes, trim_to_speech
+from transcription_cache import TranscriptionCache
+from summary_cache import SummaryCache
+from passwords import HasherBusyError, PasswordHasher
+from auth_cache import IdentityCache
+from lexicon import Lexicon
+from blobstore import blob_store_from_env
+from body_limit import BodySizeLimit
+from storage import BLOB_FORMATS, StorageManager, UploadTooLarge, blob_key
+from retention import RetentionPolicy, RetentionWorker
+from srs import select_daily_pack
+from metrics import LatencyMetrics, monitor_event_loop
+from asr import (
+    BatchTranscriber,
+    InferenceExecutor,
+    InferenceTimeoutError,
+    ModelRegistry,
+    ModelRouter,
+    ModelUnavailableError,
+    QueueFullError,
+)
 
 # Authentication
 SECRET_KEY = "your-secret-key-here-change-in-production"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Usernames allowed to call operational endpoints (POST /asr/warmup); empty = nobody
+ADMIN_USERNAMES = {u.strip() for u in os.getenv("ADMIN_USERNAMES", "").split(",") if u.strip()}
+
+# ASR model
+ASR_MODEL_NAME = os.getenv("ASR_MODEL_NAME", "base")  # default tier
+ASR_MODEL_TIERS = [m.strip() for m in os.getenv("ASR_MODEL_TIERS", "tiny,base,small").split(",") if m.strip()]  # fastest -> most accurate
+ASR_LATENCY_BUDGET = float(os.getenv("ASR_LATENCY_BUDGET", "3.0"))  # seconds
+if ASR_MODEL_NAME not in ASR_MODEL_TIERS:
+    ASR_MODEL_TIERS.append(ASR_MODEL_NAME)
+ASR_LANGUAGE = "et"  # Estonian
+ASR_PRELOAD = os.getenv("ASR_PRELOAD", "0") == "1"  # load at import (gunicorn --preload shares it across forks)
+ASR_WARMUP = os.getenv("ASR_WARMUP", "0") == "1"  # load + warm up in the background on startup
+
+# ASR micro-batching
+ASR_MAX_BATCH_SIZE = int(os.getenv("ASR_MAX_BATCH_SIZE", "8"))
+ASR_MAX_WAIT_MS = float(os.getenv("ASR_MAX_WAIT_MS", "10"))
+
+# ASR inference worker pool
+ASR_WORKERS = int(os.getenv("ASR_WORKERS", "1"))
+ASR_TORCH_THREADS = int(os.getenv("ASR_TORCH_THREADS", "0")) or None
+ASR_MAX_PENDING = int(os.getenv("ASR_MAX_PENDING", "32"))
+ASR_JOB_TIMEOUT = float(os.getenv("ASR_JOB_TIMEOUT", "30"))
+
+# Target-word decoding: every scored clip is a single known word
+ASR_MAX_TOKENS = int(os.getenv("ASR_MAX_TOKENS", "10"))
+
+# ASR transcription cache
+ASR_CACHE_SIZE = int(os.getenv("ASR_CACHE_SIZE", "1024"))
+ASR_CACHE_DISK = os.getenv("ASR_CACHE_DISK", "0") == "1"  # optional SQLite tier (data/asr_cache.db)
+ASR_CACHE_DISK_MAX_ENTRIES = int(os.getenv("ASR_CACHE_DISK_MAX_ENTRIES", "100000"))
+
+# Password hashing (bcrypt runs on its own bounded pool, never on the event loop)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))  # changing it rehashes passwords on next login
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", "2"))
+AUTH_MAX_PENDING = int(os.getenv("AUTH_MAX_PENDING", "64"))
+
+password_hasher = PasswordHasher(rounds=BCRYPT_ROUNDS, max_workers=AUTH_HASH_WORKERS, max_pending=AUTH_MAX_PENDING)
+
+# Verified tokens and user records for authenticated requests
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))  # seconds
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+
+identity_cache = IdentityCache(max_entries=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+bearer_scheme = HTTPBearer(auto_error=False)
 
 app = FastAPI()
+
+@app.on_event("shutdown")
+async def shutdown_password_hasher():
+    password_hasher.shutdown(wait=True)
+
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 UPLOADS = DATA_DIR / "uploads"
 DB_PATH = DATA_DIR / "users.db"
 
 UPLOADS.mkdir(parents=True, exist_ok=True)
 
-# Initialize Whisper model
-try:
-    model = whisper.load_model("base")
-    print("Whisper model loaded successfully")
-except Exception as e:
-    print(f"Failed to load Whisper model: {e}")
-    model = None
-
-# Initialize database
+# Per-endpoint latency and event loop lag, exposed at GET /metrics/latency
+latency_metrics = LatencyMetrics()
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    key = f"{request.method} {route.path}" if route is not None else "unmatched"
+    latency_metrics.record(key, time.perf_counter() - started)
+    return response
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    app.state.loop_monitor = asyncio.create_task(monitor_event_loop(latency_metrics))
+
+@app.on_event("shutdown")
+async def stop_loop_monitor():
+    app.state.loop_monitor.cancel()
+
+# Whisper models are loaded lazily on first ASR use (or by ASR_PRELOAD / ASR_WARMUP)
+model_registry = ModelRegistry()
+if ASR_PRELOAD:
+    try:
+        model_registry.get(ASR_MODEL_NAME)
+    except ModelUnavailableError:
+        pass
+
+asr_executor = InferenceExecutor(
+    max_workers=ASR_WORKERS, torch_threads=ASR_TORCH_THREADS, job_timeout=ASR_JOB_TIMEOUT
+)
+# One batcher per model tier (clips for different models cannot share a decode batch)
+asr_router = ModelRouter(
+    model_registry,
+    {
+        name: BatchTranscriber(
+            model_registry,
+            name,
+            asr_executor,
+            language=ASR_LANGUAGE,
+            max_batch_size=ASR_MAX_BATCH_SIZE,
+            max_wait_ms=ASR_MAX_WAIT_MS,
+            max_pending=ASR_MAX_PENDING,
+            max_tokens=ASR_MAX_TOKENS,
+        )
+        for name in ASR_MODEL_TIERS
+    },
+    default=ASR_MODEL_NAME,
+    latency_budget=ASR_LATENCY_BUDGET,
+)
+
+transcription_cache = TranscriptionCache(
+    max_entries=ASR_CACHE_SIZE,
+    db_path=DATA_DIR / "asr_cache.db" if ASR_CACHE_DISK else None,
+    max_disk_entries=ASR_CACHE_DISK_MAX_ENTRIES,
+)
+
+@app.on_event("shutdown")
+async def shutdown_transcription_cache():
+    transcription_cache.close()
+
+async def warmup_asr():
+    # Default tier first so it is ready as soon as possible, then the other tiers for routing
+    for name in sorted(asr_router.tiers, key=lambda n: n != ASR_MODEL_NAME):
+        try:
+            await asr_router.transcribers[name].warmup()
+        except Exception as e:
+            print(f"ASR warm-up of '{name}' failed: {e}")
+
+@app.on_event("startup")
+async def schedule_asr_warmup():
+    if ASR_WARMUP:
+        # Do not block startup: non-ASR endpoints are served while the model loads
+        app.state.asr_warmup = asyncio.create_task(warmup_asr())
+
+@app.on_event("shutdown")
+async def shutdown_transcriber():
+    await asr_router.close()
+    asr_executor.shutdown(wait=True)
+
+# Database: bounded pool of WAL-mode connections, accessed off the event loop via db.run()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+db = ConnectionPool(DB_PATH, size=DB_POOL_SIZE)
+
+@app.on_event("shutdown")
+async def shutdown_db():
+    db.close()
+
+# Initialize / upgrade the schema in place (versioned migrations, see migrations.py).
+# Runs at import on a throwaway connection, so no pooled connection is open when
+# gunicorn --preload forks the workers.
 def init_db():
-    with sqlite3.connect(DB_PATH) as conn:
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                hashed_password TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS achievements (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                achievement_type TEXT NOT NULL,
-                achievement_name TEXT NOT NULL,
-                description TEXT NOT NULL,
-                unlocked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(user_id, achievement_type)
-            )
-        """)
-        conn.commit()
+    with closing(sqlite3.connect(DB_PATH, timeout=30.0)) as conn:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA busy_timeout = 5000")
+        migrate(conn)
 
 init_db()
 
-# Database context manager
-@contextmanager
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
-    try:
-        yield conn
-    finally:
-        conn.close()
+# Serialized /progress/summary payloads per user; writes to a user's progress invalidate their entry
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "4096"))
+summary_cache = SummaryCache(max_entries=SUMMARY_CACHE_SIZE)
 
 # Authentication models
 class User(BaseModel):
@@ -82,6 +227,7 @@ class UserCreate(BaseModel):
     username: str
     email: str
     password: str
+    timezone: str = "UTC"  # IANA name, e.g. "Europe/Tallinn"; streak days follow it
 
 class UserLogin(BaseModel):
     username: str
@@ -95,20 +241,30 @@ class TokenData(BaseModel):
     username: Optional[str] = None
 
 # Authentication functions
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password):
-    return pwd_context.hash(password)
-
-def get_user(username: str):
-    """Get user by username from database"""
-    with get_db() as conn:
-        cursor = conn.execute("SELECT id, username, email FROM users WHERE username = ?", (username,))
-        row = cursor.fetchone()
-        if row:
-            return {"id": row[0], "username": row[1], "email": row[2]}
-        return None
+def auth_busy(e: HasherBusyError) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many concurrent sign-ins, please retry later",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+def update_password_hash(conn, user_id: int, hashed_password: str):
+    conn.execute("UPDATE users SET hashed_password = ? WHERE id = ?", (hashed_password, user_id))
+    conn.commit()
+
+def fetch_user(conn, username: str):
+    cursor = conn.execute("SELECT id, username, email FROM users WHERE username = ?", (username,))
+    row = cursor.fetchone()
+    if row:
+        return {"id": row[0], "username": row[1], "email": row[2]}
+    return None
+
+def fetch_user_credentials(conn, username: str):
+    cursor = conn.execute("SELECT id, username, email, hashed_password FROM users WHERE username = ?", (username,))
+    row = cursor.fetchone()
+    if row:
+        return {"id": row[0], "username": row[1], "email": row[2], "hashed_password": row[3]}
+    return None
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -120,119 +276,87 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def check_and_award_achievements(user_id: int, progress_data: dict):
-    """Check for new achievements and award them"""
-    achievements = []
-
-    # Achievement definitions
-    achievement_rules = [
-        {
-            "type": "first_practice",
-            "name": "İlk Adım",
-            "description": "İlk kelime pratiğin!",
-            "condition": lambda p: p["total_practice"] >= 1
-        },
-        {
-            "type": "perfect_score",
-            "name": "Mükemmel",
-            "description": "İlk 1.0 skorun!",
-            "condition": lambda p: p["best_score"] >= 1.0
-        },
-        {
-            "type": "consistent_learner",
-            "name": "Düzenli Öğrenci",
-            "description": "10 kelime pratik ettin!",
-            "condition": lambda p: p["total_practice"] >= 10
-        },
-        {
-            "type": "improvement",
-            "name": "Gelişen",
-            "description": "Skorunda iyileşme var!",
-            "condition": lambda p: p["improvement_trend"] > 0.1
-        },
-        {
-            "type": "dedicated",
-            "name": "Azimli",
-            "description": "50 kelime pratik ettin!",
-            "condition": lambda p: p["total_practice"] >= 50
-        }
-    ]
-
-    with get_db() as conn:
-        for rule in achievement_rules:
-            # Check if achievement already unlocked
-            cursor = conn.execute(
-                "SELECT id FROM achievements WHERE user_id = ? AND achievement_type = ?",
-                (user_id, rule["type"])
-            )
-            if not cursor.fetchone() and rule["condition"](progress_data):
-                # Award achievement
-                conn.execute(
-                    "INSERT INTO achievements (user_id, achievement_type, achievement_name, description) VALUES (?, ?, ?, ?)",
-                    (user_id, rule["type"], rule["name"], rule["description"])
-                )
-                achievements.append({
-                    "name": rule["name"],
-                    "description": rule["description"],
-                    "type": rule["type"]
-                })
-
-        conn.commit()
-
-    return achievements
-
-def authenticate_user(username: str, password: str):
-    user = get_user(username)
+async def authenticate_user(username: str, password: str):
+    user = await db.run(fetch_user_credentials, username)
     if not user:
         return False
-    if not verify_password(password, user["hashed_password"]):
+    try:
+        valid, new_hash = await password_hasher.verify_and_update(password, user["hashed_password"])
+    except HasherBusyError as e:
+        raise auth_busy(e)
+    if not valid:
         return False
+    if new_hash:
+        # BCRYPT_ROUNDS changed since this hash was made: upgrade it transparently
+        await db.run(update_password_hash, user["id"], new_hash)
+        identity_cache.invalidate_user(user["username"])
     return user
 
-async def get_current_user(token: str = Depends(lambda: None)):
+async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
+    if credentials is None:
         raise credentials_exception
-    user = get_user(username)
+    token = credentials.credentials
+
+    # Identity is served from the cache on the hot path: no JWT decode, no DB hit
+    username = identity_cache.get_token(token)
+    if username is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            username: str = payload.get("sub")
+            if username is None:
+                raise credentials_exception
+        except JWTError:
+            raise credentials_exception
+        identity_cache.put_token(token, username, payload.get("exp"))
+
+    user = identity_cache.get_user(username)
     if user is None:
-        raise credentials_exception
+        user = await db.run(fetch_user, username)
+        if user is None:
+            raise credentials_exception
+        identity_cache.put_user(username, user)
     return user
 
 # Authentication endpoints
 @app.post("/auth/register", response_model=User)
 async def register(user: UserCreate):
     # Check if user already exists
-    if get_user(user.username):
+    if await db.run(fetch_user, user.username):
         raise HTTPException(status_code=400, detail="Username already registered")
 
-    with get_db() as conn:
-        cursor = conn.execute("SELECT * FROM users WHERE email = ?", (user.email,))
-        if cursor.fetchone():
-            raise HTTPException(status_code=400, detail="Email already registered")
+    def email_taken(conn):
+        return conn.execute("SELECT 1 FROM users WHERE email = ?", (user.email,)).fetchone() is not None
+
+    if await db.run(email_taken):
+        raise HTTPException(status_code=400, detail="Email already registered")
 
-        # Hash password and create user
-        hashed_password = get_password_hash(user.password)
-        cursor = conn.execute(
-            "INSERT INTO users (username, email, hashed_password) VALUES (?, ?, ?)",
-            (user.username, user.email, hashed_password)
+    if not is_valid_timezone(user.timezone):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone: {user.timezone}")
+
+    # Hash password and create user
+    try:
+        hashed_password = await password_hasher.hash(user.password)
+    except HasherBusyError as e:
+        raise auth_busy(e)
+
+    def create_user(conn):
+        conn.execute(
+            "INSERT INTO users (username, email, hashed_password, timezone) VALUES (?, ?, ?, ?)",
+            (user.username, user.email, hashed_password, user.timezone)
         )
         conn.commit()
 
-        return User(username=user.username, email=user.email)
+    await db.run(create_user)
+    return User(username=user.username, email=user.email)
 
 @app.post("/auth/login", response_model=Token)
 async def login(user: UserLogin):
-    db_user = authenticate_user(user.username, user.password)
+    db_user = await authenticate_user(user.username, user.password)
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -258,300 +382,397 @@ class ScoreOut(BaseModel):
     final: float
     feedback: list[str]
     asr_text: str  # Add transcribed text to response
-
-# Expanded word database with levels and categories
-WORDS_DATABASE = {
-    "A1": {
-        "greetings": [
-            {"id": "w_tere", "text": "Tere", "ipa": "ˈte.re", "tr": "Merhaba", "category": "greetings"},
-            {"id": "w_aitaeh", "text": "Aitäh", "ipa": "ɑi̯ˈtæh", "tr": "Teşekkürler", "category": "greetings"},
-            {"id": "w_palun", "text": "Palun", "ipa": "ˈpɑ.lun", "tr": "Lütfen/Rica ederim", "category": "greetings"},
-            {"id": "w_hea", "text": "Hea", "ipa": "ˈheɑ", "tr": "İyi", "category": "greetings"},
-            {"id": "w_hommik", "text": "Hommik", "ipa": "ˈhomːik", "tr": "Sabah", "category": "greetings"},
-        ],
-        "basic": [
-            {"id": "w_jah", "text": "Jah", "ipa": "jɑh", "tr": "Evet", "category": "basic"},
-            {"id": "w_ei", "text": "Ei", "ipa": "ei̯", "tr": "Hayır", "category": "basic"},
-            {"id": "w_mina", "text": "Mina", "ipa": "ˈmi.nɑ", "tr": "Ben", "category": "basic"},
-            {"id": "w_sina", "text": "Sina", "ipa": "ˈsi.nɑ", "tr": "Sen", "category": "basic"},
-            {"id": "w_tema", "text": "Tema", "ipa": "ˈte.mɑ", "tr": "O", "category": "basic"},
-        ],
-        "food": [
-            {"id": "w_leib", "text": "Leib", "ipa": "lei̯p", "tr": "Ekmek", "category": "food"},
-            {"id": "w_piim", "text": "Piim", "ipa": "ˈpiːm", "tr": "Süt", "category": "food"},
-            {"id": "w_vesi", "text": "Vesi", "ipa": "ˈve.si", "tr": "Su", "category": "food"},
-            {"id": "w_kala", "text": "Kala", "ipa": "ˈkɑ.lɑ", "tr": "Balık", "category": "food"},
-        ]
-    },
-    "A2": {
-        "family": [
-            {"id": "w_ema", "text": "Ema", "ipa": "ˈe.mɑ", "tr": "Anne", "category": "family"},
-            {"id": "w_isa", "text": "Isa", "ipa": "ˈi.sɑ", "tr": "Baba", "category": "family"},
-            {"id": "w_vennad", "text": "Vennad", "ipa": "ˈvenːɑd", "tr": "Kardeşler", "category": "family"},
-            {"id": "w_onu", "text": "Onu", "ipa": "ˈo.nu", "tr": "Yeğen", "category": "family"},
-        ],
-        "time": [
-            {"id": "w_tund", "text": "Tund", "ipa": "tun̪t", "tr": "Saat", "category": "time"},
-            {"id": "w_paev", "text": "Päev", "ipa": "ˈpæi̯v", "tr": "Gün", "category": "time"},
-            {"id": "w_nadal", "text": "Nädala", "ipa": "ˈnæ.dɑ.lɑ", "tr": "Hafta", "category": "time"},
-            {"id": "w_kuu", "text": "Kuu", "ipa": "ˈkuː", "tr": "Ay", "category": "time"},
-        ]
-    },
-    "B1": {
-        "emotions": [
-            {"id": "w_rõõm", "text": "Rõõm", "ipa": "ˈrɤːm", "tr": "Mutluluk", "category": "emotions"},
-            {"id": "w_kurb", "text": "Kurb", "ipa": "kurp", "tr": "Üzüntü", "category": "emotions"},
-            {"id": "w_armastus", "text": "Armastus", "ipa": "ˈɑr.mɑ.stus", "tr": "Aşk", "category": "emotions"},
-        ],
-        "nature": [
-            {"id": "w_meri", "text": "Meri", "ipa": "ˈme.ri", "tr": "Deniz", "category": "nature"},
-            {"id": "w_mets", "text": "Mets", "ipa": "mets", "tr": "Orman", "category": "nature"},
-            {"id": "w_lill", "text": "Lill", "ipa": "lil̪ː", "tr": "Çiçek", "category": "nature"},
-        ]
-    }
-}
-
-# Flatten words for backward compatibility
-WORDS = []
-for level, categories in WORDS_DATABASE.items():
-    for category, word_list in categories.items():
-        WORDS.extend(word_list)
+    asr_model: Optional[str] = None  # Whisper model that produced asr_text (None for text-only scoring)
+    target_likelihood: Optional[float] = None  # Forced-decode probability of target_text (0..1, audio only)
+    audio_duration: Optional[float] = None  # Uploaded clip length in seconds (audio only)
+    speech_duration: Optional[float] = None  # Length after VAD trimming, i.e. what ASR decoded (audio only)
+    new_achievements: list[dict] = []  # Achievements unlocked by this attempt
+
+# Word data: data/lexicon.json loaded once into immutable, indexed structures
+LEXICON_PATH = Path(os.getenv("LEXICON_PATH", str(DATA_DIR / "lexicon.json")))
+lexicon = Lexicon.load(LEXICON_PATH)
+
+# Spaced repetition: how many of the user's earliest-due words one pack request looks at
+SRS_SCAN_LIMIT = int(os.getenv("SRS_SCAN_LIMIT", "200"))
+
+async def get_optional_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)):
+    """Signed-in user, or None for public endpoints (a missing, invalid or expired token means anonymous)"""
+    if credentials is None:
+        return None
+    try:
+        return await get_current_user(credentials)
+    except HTTPException as e:
+        if e.status_code == status.HTTP_401_UNAUTHORIZED:
+            return None
+        raise
+
+async def get_admin_user(current_user: dict = Depends(get_current_user)):
+    """Signed-in user listed in ADMIN_USERNAMES"""
+    if current_user["username"] not in ADMIN_USERNAMES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    return current_user
 
 @app.get("/daily-pack")
-async def get_daily_pack(limit: int = 3, level: str = "A1", category: str = None):
-    """Get a daily pack of words for practice"""
-    if level not in WORDS_DATABASE:
+async def get_daily_pack(
+    limit: int = 3,
+    level: str = "A1",
+    category: str = None,
+    phoneme: str = None,
+    current_user: Optional[dict] = Depends(get_optional_user)
+):
+    """Get a daily pack of words for practice (optionally only words containing an IPA phoneme).
+
+    Signed-in users get a spaced-repetition pack (due and weak words first); anonymous users a random one.
+    """
+    if level not in lexicon.levels:
         raise HTTPException(status_code=400, detail=f"Level {level} not found")
+    if category and category not in lexicon.categories(level):
+        raise HTTPException(status_code=400, detail=f"Category {category} not found in level {level}")
 
-    available_words = []
-    if category:
-        # Filter by specific category
-        if category in WORDS_DATABASE[level]:
-            available_words = WORDS_DATABASE[level][category]
-        else:
-            raise HTTPException(status_code=400, detail=f"Category {category} not found in level {level}")
+    available = lexicon.indices(level, category or None, phoneme)
+    if current_user is None:
+        items = [dict(word.to_dict(), source="new") for word in lexicon.sample(available, limit)]
     else:
-        # Get all words from the level
-        for cat_words in WORDS_DATABASE[level].values():
-            available_words.extend(cat_words)
-
-    # Shuffle and limit
-    import random
-    random.shuffle(available_words)
-    selected_words = available_words[:limit]
+        pack = await db.run(
+            select_daily_pack, lexicon, current_user["id"], level, category or None, phoneme, available, limit,
+            SRS_SCAN_LIMIT,
+        )
+        items = [dict(word.to_dict(), source=source) for word, source in pack]
 
     return {
         "level": level,
         "category": category,
-        "items": selected_words,
-        "total_available": len(available_words)
+        "items": items,
+        "total_available": len(available)
     }
 
 @app.get("/word-categories")
 async def get_word_categories():
     """Get available word categories by level"""
-    categories = {}
-    for level, level_categories in WORDS_DATABASE.items():
-        categories[level] = list(level_categories.keys())
-    return categories
+    return {level: list(lexicon.categories(level)) for level in lexicon.levels}
+
+def load_progress_summary(conn, user_id: int):
+    """Return (summary payload, expiry epoch or None); the expiry is when the streak would lapse"""
+    # Lifetime totals come from the aggregate tables, so this reads O(1) rows per user
+    stats = fetch_user_stats(conn, user_id)
+
+    if stats:
+        recent = fetch_recent_scores(conn, user_id, limit=10)
+        improvement = improvement_trend([row[1] for row in recent])
+
+        progress_data = {
+            "total_practice": stats["total_practice"],
+            "average_score": stats["average_score"],
+            "best_score": stats["best_score"],
+            "improvement_trend": improvement,
+            "current_streak": stats["current_streak"],
+            "longest_streak": stats["longest_streak"],
+            "last_practice_date": stats["last_practice_date"],
+            "recent_progress": [
+                {
+                    "word": row[0].replace("word_", ""),
+                    "score": row[1],
+                    "date": row[2]
+                } for row in recent
+            ],
+            "word_breakdown": fetch_word_stats(conn, user_id)
+        }
+
+        # Read-only: achievements are awarded by practice events in record_practice().
+        # "new" = unlocked by the most recent practice event
+        achievements = fetch_achievements(conn, user_id)
+        progress_data["achievements"] = [
+            {key: a[key] for key in ("name", "description", "unlocked_at")} for a in achievements
+        ]
+        progress_data["new_achievements"] = [
+            {key: a[key] for key in ("name", "description", "type")}
+            for a in achievements if a["unlocked_at"] == stats["last_practice_at"]
+        ]
+
+        return progress_data, stats["streak_expires_at"]
+    else:
+        return {
+            "total_practice": 0,
+            "average_score": 0,
+            "best_score": 0,
+            "improvement_trend": 0,
+            "current_streak": 0,
+            "longest_streak": 0,
+            "last_practice_date": None,
+            "recent_progress": [],
+            "word_breakdown": {},
+            "achievements": [],
+            "new_achievements": []
+        }, None
 
 @app.get("/progress/summary")
-async def get_progress_summary(current_user: dict = Depends(get_current_user)):
-    with get_db() as conn:
-        # Get recent progress
-        cursor = conn.execute("""
-            SELECT word_id, score, created_at
-            FROM user_progress
-            WHERE user_id = ?
-            ORDER BY created_at DESC
-            LIMIT 20
-        """, (current_user["id"],))
-        progress = cursor.fetchall()
-
-        # Calculate statistics
-        if progress:
-            scores = [row[1] for row in progress]
-            avg_score = round(sum(scores) / len(scores), 2)
-            best_score = max(scores)
-            total_practice = len(progress)
-
-            # Group by word
-            word_stats = {}
-            for row in progress:
-                word_id = row[0]
-                score = row[1]
-                if word_id not in word_stats:
-                    word_stats[word_id] = []
-                word_stats[word_id].append(score)
-
-            # Calculate improvement trends
-            recent_scores = scores[:5]  # Last 5 attempts
-            older_scores = scores[5:10] if len(scores) > 5 else []
-            improvement = 0
-            if older_scores and recent_scores:
-                old_avg = sum(older_scores) / len(older_scores)
-                new_avg = sum(recent_scores) / len(recent_scores)
-                improvement = round(new_avg - old_avg, 2)
-
-            # Calculate streak (consecutive days with practice)
-            cursor = conn.execute("""
-                SELECT DATE(created_at) as practice_date, COUNT(*) as daily_count
-                FROM user_progress
-                WHERE user_id = ?
-                GROUP BY DATE(created_at)
-                ORDER BY practice_date DESC
-                LIMIT 30
-            """, (current_user["id"],))
-            daily_practice = cursor.fetchall()
-
-            streak = 0
-            if daily_practice:
-                from datetime import datetime, timedelta
-                today = datetime.now().date()
-                yesterday = today - timedelta(days=1)
-
-                # Check if practiced today or yesterday
-                today_practiced = any(row[0] == str(today) for row in daily_practice)
-                yesterday_practiced = any(row[0] == str(yesterday) for row in daily_practice)
-
-                if today_practiced or yesterday_practiced:
-                    # Calculate streak
-                    current_date = today if today_practiced else yesterday
-                    while any(row[0] == str(current_date) for row in daily_practice):
-                        streak += 1
-                        current_date -= timedelta(days=1)
-
-            progress_data = {
-                "total_practice": total_practice,
-                "average_score": avg_score,
-                "best_score": best_score,
-                "improvement_trend": improvement,
-                "current_streak": streak,
-                "recent_progress": [
-                    {
-                        "word": row[0].replace("word_", ""),
-                        "score": row[1],
-                        "date": row[2]
-                    } for row in progress[:10]
-                ],
-                "word_breakdown": {
-                    word: {
-                        "attempts": len(scores),
-                        "best_score": max(scores),
-                        "average_score": round(sum(scores) / len(scores), 2)
-                    }
-                    for word, scores in word_stats.items()
-                }
-            }
-
-            # Check for new achievements
-            new_achievements = check_and_award_achievements(current_user["id"], progress_data)
-
-            # Get all achievements
-            cursor = conn.execute("""
-                SELECT achievement_name, description, unlocked_at
-                FROM achievements
-                WHERE user_id = ?
-                ORDER BY unlocked_at DESC
-            """, (current_user["id"],))
-            all_achievements = cursor.fetchall()
-
-            progress_data["achievements"] = [
-                {
-                    "name": row[0],
-                    "description": row[1],
-                    "unlocked_at": row[2]
-                } for row in all_achievements
-            ]
-            progress_data["new_achievements"] = new_achievements
-
-            return progress_data
-        else:
-            return {
-                "total_practice": 0,
-                "average_score": 0,
-                "best_score": 0,
-                "improvement_trend": 0,
-                "current_streak": 0,
-                "recent_progress": [],
-                "word_breakdown": {},
-                "achievements": [],
-                "new_achievements": []
-            }
+async def get_progress_summary(request: Request, current_user: dict = Depends(get_current_user)):
+    user_id = current_user["id"]
+    # One primary-key read revalidates the entry: scores written through another worker change the version
+    version = await db.run(fetch_stats_version, user_id)
+    cached = summary_cache.get(user_id, version)
+    if cached is None:
+        generation = summary_cache.generation(user_id)
+        payload, expires_at = await db.run(load_progress_summary, user_id)
+        cached = summary_cache.put(user_id, payload, generation, expires_at, version)
+
+    headers = {"ETag": cached.etag, "Cache-Control": "private, no-cache"}
+    if summary_cache.etag_matches(request.headers.get("if-none-match"), cached.etag):
+        summary_cache.record_not_modified()
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(cached.body, media_type="application/json", headers=headers)
+
+@app.get("/metrics/latency")
+async def latency_stats():
+    """Per-endpoint latency percentiles, event loop lag and password hasher load"""
+    return {
+        "endpoints": latency_metrics.snapshot(),
+        "password_hasher": {"pending": password_hasher.pending, "workers": password_hasher.max_workers},
+    }
+
+@app.get("/auth/cache")
+async def auth_cache_stats():
+    """Identity cache counters (token and user record hit ratio)"""
+    return identity_cache.stats()
+
+@app.get("/progress/cache")
+async def progress_cache_stats():
+    """Summary cache counters (hit ratio, 304s, invalidations)"""
+    return summary_cache.stats()
+
+# Recordings: content-addressed blobs (STORAGE_BACKEND=local under data/blobs/, or s3), metadata in the recordings table
+RECORDING_MAX_BYTES = int(os.getenv("RECORDING_MAX_BYTES", str(20 * 1024 * 1024)))
+RECORDING_URL_EXPIRES = int(os.getenv("RECORDING_URL_EXPIRES", "3600"))  # presigned download URL lifetime (s)
+# Counted while the body is received, before multipart parsing spools it to disk (+64 KiB for form overhead)
+app.add_middleware(BodySizeLimit, limits={("POST", "/recordings"): RECORDING_MAX_BYTES + 64 * 1024})
+storage_manager = StorageManager(DATA_DIR, db=db, store=blob_store_from_env(DATA_DIR / "blobs"))
+
+# Background retention/compaction: own single-connection pool so it never takes request-path DB slots
+RETENTION_INTERVAL = float(os.getenv("RETENTION_INTERVAL", "3600"))  # seconds; 0 disables the worker
+retention_policy = RetentionPolicy(
+    max_age_days=int(os.getenv("RETENTION_MAX_AGE_DAYS", "0")),
+    user_quota_bytes=int(float(os.getenv("RETENTION_USER_QUOTA_MB", "0")) * 1024 * 1024),
+    keep_best_per_word=int(os.getenv("RETENTION_KEEP_BEST", "0")),
+    codec=os.getenv("RETENTION_CODEC", "flac").lower() or None,
+    min_age_minutes=int(os.getenv("RETENTION_MIN_AGE_MINUTES", "60")),
+)
+retention_worker = RetentionWorker(
+    storage_manager,
+    ConnectionPool(DB_PATH, size=1),
+    retention_policy,
+    interval=RETENTION_INTERVAL,
+    batch_size=int(os.getenv("RETENTION_BATCH_SIZE", "100")),
+    pause=float(os.getenv("RETENTION_BATCH_PAUSE", "0.5")),
+    metrics=latency_metrics,
+)
+
+@app.on_event("startup")
+async def start_retention_worker():
+    if RETENTION_INTERVAL > 0:
+        app.state.retention = asyncio.create_task(retention_worker.run_forever())
+
+@app.on_event("shutdown")
+async def shutdown_retention_worker():
+    if RETENTION_INTERVAL > 0:
+        app.state.retention.cancel()
+    retention_worker.db.close()
+
+@app.get("/storage/retention")
+async def retention_stats():
+    """Retention worker counters (recordings expired, bytes reclaimed, last run duration)"""
+    return {**retention_worker.stats(), "storage": await run_in_threadpool(storage_manager.get_storage_info)}
 
 @app.post("/recordings")
-async def upload_recording(word_id: str = Form(...), file: UploadFile = File(...)):
-    dest = UPLOADS / f"{word_id}_{file.filename}"
-    with dest.open("wb") as f:
-        shutil.copyfileobj(file.file, f)
-    return {"recording_path": str(dest)}
+async def upload_recording(
+    word_id: str = Form(...),
+    file: UploadFile = File(...),
+    current_user: Optional[dict] = Depends(get_optional_user)
+):
+    try:
+        saved = await storage_manager.save_upload_stream(
+            file, word_id, file.filename or "recording", RECORDING_MAX_BYTES,
+            user_id=current_user["id"] if current_user else None,
+        )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    return {
+        "recording_id": saved.recording_id,
+        "recording_path": saved.location,
+        "word_id": word_id,
+        "file_size": saved.size,
+        "sha256": saved.sha256,
+        "deduplicated": saved.deduplicated
+    }
+
 
+@app.get("/recordings/{recording_id}/audio")
+async def download_recording(recording_id: int, current_user: dict = Depends(get_current_user)):
+    """Owner-only download: redirect to a presigned URL on object storage, stream the file on local disk"""
+    recording = await db.run(storage_manager.get_recording, recording_id)
+    if recording is None or recording["user_id"] != current_user["id"]:
+        raise HTTPException(status_code=404, detail="Recording not found")
+    key = blob_key(recording["sha256"])
+    filename, media_type = recording["original_filename"], None
+    if recording["format"] in BLOB_FORMATS:
+        # Compacted blobs no longer match the uploaded name: serve e.g. take.wav as take.flac
+        suffix, media_type = BLOB_FORMATS[recording["format"]]
+        filename = Path(filename or recording["word_id"]).stem + suffix
+    url = await run_in_threadpool(
+        storage_manager.store.presigned_url, key, RECORDING_URL_EXPIRES, filename, media_type
+    )
+    if url is not None:
+        return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    return FileResponse(storage_manager.store.local_path(key), filename=filename, media_type=media_type)
 
-def simple_phoneme_similarity(target: str, hypothesis: str) -> float:
-    t, h = target.lower(), hypothesis.lower()
-    d = distance(t, h)
-    return max(0.0, 1.0 - d / max(1, len(t)))
 
-def transcribe_audio(audio_path: str) -> str:
-    """Transcribe audio file using Whisper"""
-    if model is None:
-        raise HTTPException(status_code=500, detail="ASR model not available")
+async def transcribe_audio(audio, model_name: str = ASR_MODEL_NAME, target_text: Optional[str] = None) -> dict:
+    """Transcribe a 16 kHz mono float32 waveform using Whisper (batched with concurrent requests).
 
+    With target_text, also returns the forced-decode log-likelihood of the target word.
+    """
+    transcriber = asr_router.transcribers[model_name]
     try:
-        # Load and transcribe audio
-        result = model.transcribe(audio_path, language="et")  # Estonian language
-        return result["text"].strip()
+        key = TranscriptionCache.make_key(audio, model_name, ASR_LANGUAGE, target_text)
+        return await transcription_cache.get_or_compute(key, lambda: transcriber.transcribe(audio, target_text))
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="ASR queue is full, please retry later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except InferenceTimeoutError:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="ASR processing timed out")
+    except ModelUnavailableError:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="ASR model not available")
     except Exception as e:
         print(f"ASR Error: {e}")
         raise HTTPException(status_code=500, detail=f"ASR processing failed: {str(e)}")
 
+@app.get("/health/ready")
+async def readiness():
+    """Readiness probe: the API is serving; reports whether the ASR model is loaded"""
+    return {
+        "status": "ok",
+        "asr_model": ASR_MODEL_NAME,
+        "asr_state": model_registry.state(ASR_MODEL_NAME),
+        "models": model_registry.status(),
+    }
+
+@app.get("/asr/models")
+async def get_asr_models():
+    """ASR model tiers, their state and the current routing estimates"""
+    return asr_router.status()
+
+@app.post("/asr/warmup")
+async def asr_warmup(model: str = ASR_MODEL_NAME, admin_user: dict = Depends(get_admin_user)):
+    """Load an ASR model tier and run one warm-up decode (admins only; loading a tier costs memory)"""
+    if model not in asr_router.transcribers:
+        raise HTTPException(status_code=400, detail=f"Unknown ASR model '{model}'")
+    try:
+        await asr_router.transcribers[model].warmup()
+    except ModelUnavailableError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except InferenceTimeoutError:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="ASR warm-up timed out")
+    return {"asr_model": model, "asr_state": model_registry.state(model)}
+
+@app.get("/asr/cache")
+async def get_asr_cache_stats():
+    """Transcription cache hit/miss counters"""
+    return transcription_cache.stats()
+
+async def transcribe_upload(
+    audio_bytes: bytes, filename: str, target_text: str, asr_model: Optional[str] = None
+) -> dict:
+    """Decode, VAD-trim, route and transcribe one uploaded clip"""
+    # Decode the upload in memory (WAV/PCM); compressed formats fall back to ffmpeg
+    try:
+        audio = await run_in_threadpool(load_audio_bytes, audio_bytes, filename or "")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not decode audio: {str(e)}")
+
+    # VAD: decode only the speech span; reject silent clips without running the model
+    audio_duration = round(audio.size / SAMPLE_RATE, 2)
+    try:
+        audio = trim_to_speech(audio)
+    except NoSpeechError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+    # Explicit asr_model wins; otherwise route by latency budget / queue depth
+    try:
+        used_model = asr_router.choose(asr_model)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    result = await transcribe_audio(audio, used_model, target_text)
+    target_likelihood = None
+    if result.get("target_logprob") is not None:
+        target_likelihood = round(math.exp(result["target_logprob"]), 2)
+    print(f"ASR Result ({used_model}): '{result['text']}'")
+
+    return {
+        "asr_text": result["text"],
+        "asr_model": used_model,
+        "target_likelihood": target_likelihood,
+        "audio_duration": audio_duration,
+        "speech_duration": round(audio.size / SAMPLE_RATE, 2),
+    }
+
+def srs_reviews(user_id: int, scored: list[tuple]) -> list[tuple]:
+    """(word text, final score) -> (user_id, lexicon word id, score) for words the lexicon knows"""
+    reviews = []
+    for text, final in scored:
+        word = lexicon.find_text(text)
+        if word is not None:
+            reviews.append((user_id, word.id, final))
+    return reviews
+
+def score_feedback(asr_acc: float, phon_sim: float, prosody: float) -> list[str]:
+    feedback = []
+    if phon_sim < 0.8:
+        feedback.append("Fonem farklılıkları var; ilk heceyi netleştir.")
+    if asr_acc < 0.85:
+        feedback.append("Kelimenin tamamını daha net telaffuz et.")
+    if prosody < 0.8:
+        feedback.append("Vurguyu ilk hecede tut ve temposunu sabit tut.")
+    return feedback or ["Harika ilerleme!"]
+
 @app.post("/pronunciation/score", response_model=ScoreOut)
 async def score(
     word: str,
     target_text: str,
     target_ipa: str,
     asr_text: str = None,
+    asr_model: str = None,
     audio_file: UploadFile = File(None),
+    recording_id: Optional[int] = None,
     current_user: dict = Depends(get_current_user)
 ):
     # If audio file is provided, use ASR to get text
+    asr_info = {}
     if audio_file is not None:
-        # Save uploaded audio temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
-            shutil.copyfileobj(audio_file.file, temp_file)
-            temp_path = temp_file.name
-
-        try:
-            # Transcribe audio
-            asr_text = transcribe_audio(temp_path)
-            print(f"ASR Result: '{asr_text}'")
-        finally:
-            # Clean up temp file
-            os.unlink(temp_path)
+        asr_info = await transcribe_upload(await audio_file.read(), audio_file.filename, target_text, asr_model)
+        asr_text = asr_info["asr_text"]
     elif asr_text is None:
         raise HTTPException(status_code=400, detail="Either asr_text or audio_file must be provided")
 
     # Calculate scores
-    asr_acc = max(0.0, 1.0 - wer([target_text], [asr_text]))  # 0..1
-    phon_sim = simple_phoneme_similarity(target_text, asr_text)  # 0..1
+    asr_acc = calculate_asr_accuracy(target_text, asr_text)  # 0..1
+    phon_sim = calculate_phoneme_similarity(target_text, asr_text)  # 0..1
     prosody  = 0.7  # MVP: sabit
-    final = round(0.4*asr_acc + 0.4*phon_sim + 0.2*prosody, 2)
-
-    feedback = []
-    if phon_sim < 0.8:
-        feedback.append("Fonem farklılıkları var; ilk heceyi netleştir.")
-    if asr_acc < 0.85:
-        feedback.append("Kelimenin tamamını daha net telaffuz et.")
-    if prosody < 0.8:
-        feedback.append("Vurguyu ilk hecede tut ve temposunu sabit tut.")
+    final = calculate_final_score(asr_acc, phon_sim, prosody)
 
     # Save progress to database
-    with get_db() as conn:
-        conn.execute(
-            "INSERT INTO user_progress (user_id, word_id, score, asr_text) VALUES (?, ?, ?, ?)",
-            (current_user["id"], f"word_{word.lower()}", final, asr_text)
-        )
-        conn.commit()
+    unlocks = await db.run(
+        record_practice,
+        [(current_user["id"], f"word_{word.lower()}", final, asr_text)],
+        None,
+        srs_reviews(current_user["id"], [(word, final)]),
+    )
+    summary_cache.invalidate(current_user["id"])
+    if recording_id is not None:
+        # Scored attempts rank first under the keep-best-N retention policy
+        await db.run(storage_manager.set_recording_score, recording_id, current_user["id"], final)
 
     return ScoreOut(
         word=word,
@@ -560,6 +781,137 @@ async def score(
         phoneme_similarity=round(phon_sim, 2),
         prosody=round(prosody, 2),
         final=final,
-        feedback=feedback or ["Harika ilerleme!"],
-        asr_text=asr_text  # Include the transcribed text in response
-    )
\ No newline at end of file
+        feedback=score_feedback(asr_acc, phon_sim, prosody),
+        asr_text=asr_text,  # Include the transcribed text in response
+        asr_model=asr_info.get("asr_model"),
+        target_likelihood=asr_info.get("target_likelihood"),
+        audio_duration=asr_info.get("audio_duration"),
+        speech_duration=asr_info.get("speech_duration"),
+        new_achievements=unlocks.get(current_user["id"], [])
+    )
+
+class BatchScoreItem(BaseModel):
+    word: str
+    target_text: str
+    target_ipa: str
+    asr_text: Optional[str] = None
+    audio: Optional[str] = None  # filename of one of the uploaded audio_files
+
+class BatchScoreResult(BaseModel):
+    index: int
+    result: Optional[ScoreOut] = None
+    error: Optional[str] = None
+
+class BatchScoreOut(BaseModel):
+    scored: int
+    failed: int
+    results: list[BatchScoreResult]
+    new_achievements: list[dict] = []  # Achievements unlocked by saving this batch
+
+# Shared by all batch requests, so together they leave half of the ASR queue to
+# interactive /pronunciation/score traffic
+batch_asr_slots = asyncio.Semaphore(max(1, ASR_MAX_PENDING // 2))
+
+@app.post("/pronunciation/score/batch", response_model=BatchScoreOut)
+async def score_batch(
+    items: str = Form(..., description="JSON list of {word, target_text, target_ipa, asr_text | audio}"),
+    audio_files: list[UploadFile] = File(None),
+    asr_model: str = Form(None),
+    save_progress: bool = Form(True),
+    current_user: dict = Depends(get_current_user)
+):
+    """Score many items at once (classroom uploads, re-scoring history).
+
+    Audio items go through the batched ASR path; all items are then scored in one
+    vectorized pass and progress rows are written in a single transaction.
+    """
+    try:
+        parsed = [BatchScoreItem(**item) for item in json.loads(items)]
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid items: {str(e)}")
+
+    # Items reference clips by filename, so names must be unique (a later file would silently replace an earlier one)
+    filenames = [f.filename for f in audio_files or []]
+    duplicates = sorted({name for name in filenames if filenames.count(name) > 1})
+    if duplicates:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Duplicate audio filenames: {', '.join(duplicates)}",
+        )
+
+    # Read each upload once; several items may reference the same clip
+    uploads = {f.filename: await f.read() for f in audio_files or []}
+    errors: dict[int, str] = {}
+    asr_infos: dict[int, dict] = {}
+
+    async def run_asr(index: int, item: BatchScoreItem):
+        audio_bytes = uploads.get(item.audio)
+        if audio_bytes is None:
+            errors[index] = f"Audio file '{item.audio}' was not uploaded"
+            return
+        async with batch_asr_slots:
+            try:
+                asr_infos[index] = await transcribe_upload(audio_bytes, item.audio, item.target_text, asr_model)
+            except HTTPException as e:
+                errors[index] = str(e.detail)
+
+    await asyncio.gather(*[
+        run_asr(i, item) for i, item in enumerate(parsed) if item.asr_text is None and item.audio is not None
+    ])
+
+    scorable = []
+    for i, item in enumerate(parsed):
+        if i in errors:
+            continue
+        if i in asr_infos:
+            item.asr_text = asr_infos[i]["asr_text"]
+        if item.asr_text is None:
+            errors[i] = "Either asr_text or audio must be provided"
+            continue
+        scorable.append(i)
+
+    scores = calculate_batch_scores(
+        [parsed[i].target_text for i in scorable], [parsed[i].asr_text for i in scorable]
+    )
+
+    results = [BatchScoreResult(index=i, error=errors[i]) for i in sorted(errors)]
+    rows = []
+    scored_words = []  # (word text, final) for the spaced-repetition scheduler
+    for n, i in enumerate(scorable):
+        item = parsed[i]
+        asr_acc = float(scores["asr_accuracy"][n])
+        phon_sim = float(scores["phoneme_similarity"][n])
+        prosody = float(scores["prosody"][n])
+        final = float(scores["final"][n])
+        info = asr_infos.get(i, {})
+        results.append(BatchScoreResult(index=i, result=ScoreOut(
+            word=item.word,
+            target_ipa=item.target_ipa,
+            asr_accuracy=round(asr_acc, 2),
+            phoneme_similarity=round(phon_sim, 2),
+            prosody=round(prosody, 2),
+            final=final,
+            feedback=score_feedback(asr_acc, phon_sim, prosody),
+            asr_text=item.asr_text,
+            asr_model=info.get("asr_model"),
+            target_likelihood=info.get("target_likelihood"),
+            audio_duration=info.get("audio_duration"),
+            speech_duration=info.get("speech_duration")
+        )))
+        rows.append((current_user["id"], f"word_{item.word.lower()}", final, item.asr_text))
+        scored_words.append((item.word, final))
+
+    unlocks = {}
+    if save_progress and rows:
+        unlocks = await db.run(
+            record_practice, rows, None, srs_reviews(current_user["id"], scored_words)
+        )
+        summary_cache.invalidate(current_user["id"])
+
+    results.sort(key=lambda r: r.index)
+    return BatchScoreOut(
+        scored=len(scorable),
+        failed=len(errors),
+        results=results,
+        new_achievements=unlocks.get(current_user["id"], [])
+    )
@@ -0,0 +1,406 @@
+# asr.py - Whisper ASR yardımcıları (model kaydı, dinamik mikro-batch, inference worker havuzu)
+#
+# whisper/torch burada modül seviyesinde import edilmez: ASR dışı uçlar ve testler
+# model ya da torch yükleme maliyetini ödemeden uygulamayı import edebilir.
+
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+
+
+class QueueFullError(Exception):
+    """ASR kuyruğu dolu; istemci retry_after saniye sonra tekrar denemeli"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"ASR queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class InferenceTimeoutError(Exception):
+    """Inference işi izin verilen sürede tamamlanmadı; job hâlâ çalışan işin future'ıdır"""
+
+    def __init__(self, message: str, job: Optional[asyncio.Future] = None):
+        super().__init__(message)
+        self.job = job
+
+
+# CPU üzerinde tek bir batch decode'unun kabaca süresi (sn); gerçek ölçümler gelene kadar tahmin
+EXPECTED_BATCH_SECONDS = {"tiny": 0.3, "base": 1.0, "small": 3.0, "medium": 8.0, "large": 20.0}
+
+
+class ModelUnavailableError(Exception):
+    """ASR modeli yüklenemedi"""
+
+
+class ModelRegistry:
+    """Whisper modellerini ilk kullanımda yükler ve süreç içinde paylaşır"""
+
+    UNLOADED = "unloaded"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self, device: Optional[str] = None):
+        self.device = device
+        self._models: dict = {}
+        self._states: dict[str, str] = {}
+        self._errors: dict[str, str] = {}
+        self._load_seconds: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str):
+        """Modeli döndür; yüklü değilse (bloklayarak) yükle"""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            model = self._models.get(name)
+            if model is not None:
+                return model
+
+            self._states[name] = self.LOADING
+            started = time.perf_counter()
+            try:
+                import whisper
+
+                model = whisper.load_model(name, device=self.device)
+            except Exception as e:
+                self._states[name] = self.FAILED
+                self._errors[name] = str(e)
+                print(f"Failed to load Whisper model '{name}': {e}")
+                raise ModelUnavailableError(f"ASR model '{name}' could not be loaded: {e}") from e
+
+            self._load_seconds[name] = round(time.perf_counter() - started, 2)
+            self._models[name] = model
+            self._states[name] = self.READY
+            self._errors.pop(name, None)
+            print(f"Whisper model '{name}' loaded in {self._load_seconds[name]}s")
+            return model
+
+    def state(self, name: str) -> str:
+        return self._states.get(name, self.UNLOADED)
+
+    def status(self) -> dict:
+        """Model başına durum, yükleme süresi ve son hata"""
+        return {
+            name: {
+                "state": state,
+                "load_seconds": self._load_seconds.get(name),
+                "error": self._errors.get(name),
+            }
+            for name, state in self._states.items()
+        }
+
+
+class InferenceExecutor:
+    """Bloklayan model çağrılarını event loop dışında, sınırlı bir thread havuzunda çalıştırır"""
+
+    def __init__(self, max_workers: int = 1, torch_threads: Optional[int] = None, job_timeout: float = 30.0):
+        self.job_timeout = job_timeout
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, max_workers),
+            thread_name_prefix="asr-worker",
+            initializer=self._init_worker,
+            initargs=(torch_threads,),
+        )
+
+    @staticmethod
+    def _init_worker(torch_threads: Optional[int]):
+        # Worker başına torch thread sayısını sınırla; aksi halde her decode tüm çekirdekleri ister
+        if torch_threads:
+            import torch
+
+            torch.set_num_threads(torch_threads)
+
+    async def run(self, fn: Callable, *args):
+        """fn(*args) çağrısını havuzda çalıştır; iş çalışmaya başladıktan sonra job_timeout kadar bekle.
+
+        Havuzda sıra beklenen süre zaman aşımına sayılmaz. Zaman aşımında iş durdurulamaz;
+        InferenceTimeoutError.job bitişini beklemek için kullanılabilir.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+
+        def mark_started():
+            if not started.done():
+                started.set_result(None)
+
+        def job():
+            loop.call_soon_threadsafe(mark_started)
+            return fn(*args)
+
+        future = self._pool.submit(job)
+        result = asyncio.wrap_future(future)
+        try:
+            await asyncio.wait((started, result), return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            future.cancel()  # henüz başlamadıysa havuzdan düşer
+            raise
+        try:
+            return await asyncio.wait_for(asyncio.shield(result), self.job_timeout)
+        except asyncio.TimeoutError:
+            raise InferenceTimeoutError(f"Inference job exceeded {self.job_timeout}s", job=result)
+
+    def shutdown(self, wait: bool = True):
+        """Bekleyen işleri iptal et, çalışan işlerin bitmesini bekle"""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+class BatchTranscriber:
+    """Eşzamanlı ASR isteklerini kısa bir süre toplayıp tek bir Whisper decode çağrısında işler"""
+
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        model_name: str,
+        executor: InferenceExecutor,
+        language: str = "et",
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        max_pending: int = 32,
+        expected_batch_seconds: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ):
+        self.registry = registry
+        self.model_name = model_name
+        self.executor = executor
+        self.language = language
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_pending = max(1, max_pending)
+        # Hedef kelime modu: tek kelimelik kayıtlar için üretilen token sayısını sınırla
+        self.max_tokens = max_tokens
+
+        self.pending = 0
+        self._avg_batch_seconds = expected_batch_seconds or EXPECTED_BATCH_SECONDS.get(model_name, 1.0)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def estimate_latency(self, backlog: Optional[int] = None) -> float:
+        """backlog kadar iş öndeyken yeni bir isteğin tahmini bekleme + decode süresi (sn)"""
+        backlog = self.pending if backlog is None else backlog
+        return math.ceil((backlog + 1) / self.max_batch_size) * self._avg_batch_seconds
+
+    def retry_after(self) -> int:
+        """Kuyruktaki işlerin bitmesi için tahmini süre (saniye)"""
+        batches_ahead = math.ceil(self.pending / self.max_batch_size)
+        return max(1, math.ceil(batches_ahead * self._avg_batch_seconds))
+
+    async def transcribe(self, audio: np.ndarray, target_text: Optional[str] = None) -> dict:
+        """16 kHz float32 ses dizisini kuyruğa ekle ve batch sonucunu bekle.
+
+        target_text verilirse, hedef metnin zorlanmış decode log-olasılığı da döner:
+        {"text": ..., "target_logprob": ...}
+        """
+        if self.pending >= self.max_pending:
+            raise QueueFullError(self.retry_after())
+
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self.pending += 1
+        try:
+            self._queue.put_nowait((audio, target_text, future))
+            return await future
+        finally:
+            self.pending -= 1
+
+    async def close(self):
+        """Batch görevini durdur"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+            self._queue = None
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def _collect_batch(self) -> list:
+        """İlk isteği bekle, sonra max_wait boyunca ya da batch dolana kadar topla"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        # İptal edilmiş (bağlantısı kopmuş) istekleri decode etme
+        return [item for item in batch if not item[-1].done()]
+
+    async def _run(self):
+        while True:
+            batch = await self._collect_batch()
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            try:
+                results = await self.executor.run(
+                    self.decode_batch, [audio for audio, _, _ in batch], [target for _, target, _ in batch]
+                )
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                if isinstance(e, InferenceTimeoutError) and e.job is not None:
+                    # Zaman aşımına uğrayan decode worker'da sürüyor: bitmeden yeni batch gönderme
+                    await asyncio.wait((e.job,))
+                    if not e.job.cancelled():
+                        e.job.exception()  # "exception never retrieved" uyarısını önle
+                continue
+
+            elapsed = time.perf_counter() - started
+            self._avg_batch_seconds = 0.8 * self._avg_batch_seconds + 0.2 * elapsed
+
+            for (_, _, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def warmup(self):
+        """Modeli yükle ve kısa bir sessizlik üzerinde decode ederek ilk isteğin gecikmesini öde"""
+        await self.executor.run(self.decode_batch, [np.zeros(16000, dtype=np.float32)])
+
+    def decode_batch(self, audios: list, targets: Optional[list] = None) -> list[dict]:
+        """Sesleri 30 sn'ye pad/trim edip tek log-mel batch'i olarak decode et"""
+        # İlk batch modeli worker thread'inde (event loop dışında) yükler
+        model = self.registry.get(self.model_name)
+
+        import torch
+        import whisper
+
+        mels = [
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=model.dims.n_mels)
+            for audio in audios
+        ]
+        mel_batch = torch.stack(mels).to(model.device)
+
+        options = whisper.DecodingOptions(
+            language=self.language,
+            without_timestamps=True,
+            sample_len=self.max_tokens,
+            fp16=model.device.type == "cuda",
+        )
+        results = whisper.decode(model, mel_batch, options)
+
+        logprobs = [None] * len(results)
+        if targets and any(targets):
+            logprobs = self._target_logprobs(model, results, targets)
+
+        return [
+            {"text": result.text.strip(), "target_logprob": logprob}
+            for result, logprob in zip(results, logprobs)
+        ]
+
+    def _target_logprobs(self, model, results, targets: list) -> list[Optional[float]]:
+        """Hedef metni zorlanmış decode ile puanla: token başına ortalama log-olasılık.
+
+        Encoder çıktısı decode sonucundan yeniden kullanılır; hedef başına tek bir
+        decoder geçişi yapılır (arama yok).
+        """
+        import torch
+        from whisper.tokenizer import get_tokenizer
+
+        tokenizer = get_tokenizer(
+            model.is_multilingual,
+            num_languages=model.num_languages,
+            language=self.language,
+            task="transcribe",
+        )
+        prefix = list(tokenizer.sot_sequence_including_notimestamps)
+
+        rows = [
+            (i, prefix + tokenizer.encode(" " + target.strip()) + [tokenizer.eot])
+            for i, target in enumerate(targets)
+            if target and target.strip()
+        ]
+        logprobs = [None] * len(targets)
+        if not rows:
+            return logprobs
+
+        max_len = max(len(tokens) for _, tokens in rows)
+        tokens = torch.full((len(rows), max_len), tokenizer.eot, dtype=torch.long)
+        for row, (_, sequence) in enumerate(rows):
+            tokens[row, : len(sequence)] = torch.tensor(sequence)
+        audio_features = torch.stack([results[i].audio_features for i, _ in rows])
+
+        with torch.no_grad():
+            logits = model.logits(tokens.to(model.device), audio_features)
+        log_softmax = torch.log_softmax(logits.float(), dim=-1)
+
+        # t konumundaki logit, t+1 konumundaki token'ı tahmin eder
+        for row, (i, sequence) in enumerate(rows):
+            target_ids = torch.tensor(sequence[len(prefix) :], device=log_softmax.device)
+            positions = torch.arange(len(prefix) - 1, len(sequence) - 1, device=log_softmax.device)
+            logprobs[i] = float(log_softmax[row, positions, target_ids].mean())
+        return logprobs
+
+
+class ModelRouter:
+    """İstek başına model seçer: gecikme bütçesine sığan en doğru modeli kullanır.
+
+    Katmanlar hızlıdan doğruya sıralıdır (ör. tiny, base, small). Boşta iken en büyük
+    hazır model, kuyruk derinleştikçe daha küçük modeller seçilir.
+    """
+
+    def __init__(self, registry: ModelRegistry, transcribers: dict, default: str, latency_budget: float = 3.0):
+        self.registry = registry
+        self.transcribers = transcribers
+        self.tiers = list(transcribers)
+        self.default = default
+        self.latency_budget = latency_budget
+
+    def backlog(self) -> int:
+        # Tüm katmanlar aynı inference havuzunu paylaşır
+        return sum(t.pending for t in self.transcribers.values())
+
+    def choose(self, requested: Optional[str] = None, latency_budget: Optional[float] = None) -> str:
+        if requested is not None:
+            if requested not in self.transcribers:
+                raise ValueError(f"Unknown ASR model '{requested}', available: {', '.join(self.tiers)}")
+            return requested
+
+        budget = self.latency_budget if latency_budget is None else latency_budget
+        backlog = self.backlog()
+        for name in reversed(self.tiers):
+            # Yüklenmemiş bir modeli istek yolunda yüklememek için yalnızca hazır modeller (ve varsayılan)
+            if name != self.default and self.registry.state(name) != ModelRegistry.READY:
+                continue
+            if self.transcribers[name].estimate_latency(backlog) <= budget:
+                return name
+        return self.tiers[0]
+
+    def status(self) -> dict:
+        return {
+            "default": self.default,
+            "latency_budget": self.latency_budget,
+            "backlog": self.backlog(),
+            "tiers": {
+                name: {
+                    "state": self.registry.state(name),
+                    "pending": t.pending,
+                    "estimated_latency": round(t.estimate_latency(self.backlog()), 2),
+                }
+                for name, t in self.transcribers.items()
+            },
+        }
+
+    async def close(self):
+        for transcriber in self.transcribers.values():
+            await transcriber.close()
@@ -0,0 +1,192 @@
+# audio.py - yüklenen ses baytlarını bellekte 16 kHz mono float32 diziye çevirme
+
+import os
+import struct
+import tempfile
+from typing import Optional
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class UnsupportedAudioFormat(ValueError):
+    """Bellekte çözülemeyen (sıkıştırılmış vb.) ses formatı"""
+
+
+def _pcm_to_float32(raw: bytes, format_tag: int, bits: int) -> np.ndarray:
+    """Ham WAV örneklerini [-1, 1] aralığında float32'ye çevir"""
+    if format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        if bits == 32:
+            return np.frombuffer(raw, dtype="<f4").astype(np.float32)
+        if bits == 64:
+            return np.frombuffer(raw, dtype="<f8").astype(np.float32)
+    elif format_tag == WAVE_FORMAT_PCM:
+        if bits == 8:
+            return (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+        if bits == 16:
+            return np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+        if bits == 24:
+            b = np.frombuffer(raw[: len(raw) - len(raw) % 3], dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+            samples = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+            samples = np.where(samples >= 1 << 23, samples - (1 << 24), samples)
+            return samples.astype(np.float32) / float(1 << 23)
+        if bits == 32:
+            return np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648.0
+    raise UnsupportedAudioFormat(f"Unsupported WAV encoding (format={format_tag:#x}, bits={bits})")
+
+
+def parse_wav(data: bytes) -> tuple[np.ndarray, int]:
+    """RIFF/WAVE baytlarını (mono float32 dizi, örnekleme hızı) olarak çöz"""
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise UnsupportedAudioFormat("Not a RIFF/WAVE file")
+
+    fmt = None
+    raw = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id, chunk_size = struct.unpack_from("<4sI", data, pos)
+        body = data[pos + 8 : pos + 8 + chunk_size]
+        if chunk_id == b"fmt ":
+            format_tag, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", body)
+            if format_tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                # Gerçek format, SubFormat GUID'inin ilk iki baytında
+                format_tag = struct.unpack_from("<H", body, 24)[0]
+            fmt = (format_tag, channels, sample_rate, bits)
+        elif chunk_id == b"data":
+            raw = body
+            break
+        pos += 8 + chunk_size + (chunk_size & 1)
+
+    if fmt is None or raw is None:
+        raise UnsupportedAudioFormat("WAV file is missing fmt or data chunk")
+
+    format_tag, channels, sample_rate, bits = fmt
+    block = channels * (bits // 8)
+    if channels < 1 or block < 1 or sample_rate < 1:
+        raise UnsupportedAudioFormat("Invalid WAV header")
+
+    samples = _pcm_to_float32(raw[: len(raw) - len(raw) % block], format_tag, bits)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples.astype(np.float32, copy=False), sample_rate
+
+
+def resample(audio: np.ndarray, orig_sr: int, target_sr: int = SAMPLE_RATE) -> np.ndarray:
+    """FFT tabanlı (bant sınırlı) vektörel yeniden örnekleme"""
+    if orig_sr == target_sr or audio.size == 0:
+        return audio
+
+    n_out = max(1, int(round(audio.size * target_sr / orig_sr)))
+    spectrum = np.fft.rfft(audio)
+    resized = np.zeros(n_out // 2 + 1, dtype=spectrum.dtype)
+    n_bins = min(resized.size, spectrum.size)
+    resized[:n_bins] = spectrum[:n_bins]
+    out = np.fft.irfft(resized, n_out) * (n_out / audio.size)
+    return out.astype(np.float32)
+
+
+def load_audio_bytes(data: bytes, filename: str = "") -> np.ndarray:
+    """Yüklenen dosyayı 16 kHz mono float32 diziye çevir.
+
+    WAV/PCM doğrudan bellekte çözülür; sıkıştırılmış formatlar (mp3, m4a, ...)
+    için geçici dosya + ffmpeg yoluna düşülür.
+    """
+    try:
+        audio, sample_rate = parse_wav(data)
+    except UnsupportedAudioFormat:
+        return _load_with_ffmpeg(data, os.path.splitext(filename)[1] or ".bin")
+    return resample(audio, sample_rate, SAMPLE_RATE)
+
+
+def _load_with_ffmpeg(data: bytes, suffix: str) -> np.ndarray:
+    import whisper
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        temp_file.write(data)
+        temp_path = temp_file.name
+    try:
+        return whisper.load_audio(temp_path, sr=SAMPLE_RATE)
+    finally:
+        os.unlink(temp_path)
+
+
+class NoSpeechError(ValueError):
+    """Kayıtta konuşma bulunamadı (boş ya da sessiz kayıt)"""
+
+
+def detect_speech(
+    audio: np.ndarray,
+    frame_ms: float = 20.0,
+    energy_margin_db: float = 12.0,
+    dynamic_range_db: float = 25.0,
+    min_energy_db: float = -50.0,
+    min_snr_db: float = 10.0,
+    zcr_threshold: float = 0.25,
+    min_voiced_zcr: float = 0.01,
+    min_speech_ms: float = 100.0,
+    pad_ms: float = 100.0,
+) -> Optional[tuple[int, int]]:
+    """Vektörel enerji + sıfır geçiş oranı (ZCR) VAD'ı; konuşma aralığını (başlangıç, bitiş) örnek olarak döndürür.
+
+    Eşik, gürültü tabanının (çerçeve enerjisinin 10. yüzdeliği) energy_margin_db üstüdür;
+    dar aralıklı kayıtlarda taban ile tepenin ortasına iner. Kayıtta gerçek bir dinamik aralık
+    varsa (tepe - taban > dynamic_range_db) tepe değerin dynamic_range_db altına da indirilebilir,
+    ama hiçbir zaman tabana yaklaşmaz. Düşük enerjili ama yüksek ZCR'li çerçeveler
+    (s, h, t gibi ötümsüz sesler) de tabanın energy_margin_db / 2 üstündeyse konuşma sayılır;
+    sabit hışırtı (beyaz gürültü) bu yüzden konuşma sayılmaz. Tepe-taban farkı min_snr_db'den
+    küçükse kayıt ya baştan sona konuşmadır (uzatılmış ünlü) ya da yalnız gürültüdür: çerçevelerin
+    çoğu periyodik (ZCR min_voiced_zcr ile zcr_threshold arasında; şebeke uğultusu bunun altında,
+    hışırtı üstünde kalır) ise kaydın tamamı döner, değilse None. Konuşma yoksa da None döner.
+    """
+    frame = max(1, int(SAMPLE_RATE * frame_ms / 1000))
+    n_frames = audio.size // frame
+    if n_frames == 0:
+        return None
+
+    frames = audio[: n_frames * frame].reshape(n_frames, frame)
+    energy_db = 10 * np.log10(np.mean(frames.astype(np.float64) ** 2, axis=1) + 1e-12)
+    peak_db = energy_db.max()
+    if peak_db < min_energy_db:
+        return None
+
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / max(1, frame - 1)
+
+    noise_floor_db = np.percentile(energy_db, 10)
+    if peak_db - noise_floor_db < min_snr_db:
+        # Karşıtlık yok: sabit enerjili konuşma (kırpılacak sessizlik yok) mı, gürültü mü?
+        periodic = (zcr >= min_voiced_zcr) & (zcr < zcr_threshold) & (energy_db >= min_energy_db)
+        if np.count_nonzero(periodic) * 2 >= n_frames and n_frames * frame >= SAMPLE_RATE * min_speech_ms / 1000:
+            return 0, int(audio.size)
+        return None
+
+    # Dar aralıklı (tamamı konuşma) kayıtlarda eşik taban ile tepe arasının ortasını geçmez
+    margin_db = min(energy_margin_db, (peak_db - noise_floor_db) / 2)
+    threshold_db = noise_floor_db + margin_db
+    if peak_db - noise_floor_db > dynamic_range_db:
+        threshold_db = max(noise_floor_db + margin_db / 2, min(threshold_db, peak_db - dynamic_range_db))
+    threshold_db = max(min_energy_db, threshold_db)
+    voiced = energy_db >= threshold_db
+    unvoiced = (zcr >= zcr_threshold) & (energy_db >= max(min_energy_db, noise_floor_db + energy_margin_db / 2))
+
+    speech = np.flatnonzero(voiced | unvoiced)
+    if speech.size * frame < SAMPLE_RATE * min_speech_ms / 1000:
+        return None
+
+    pad = int(SAMPLE_RATE * pad_ms / 1000)
+    start = max(0, speech[0] * frame - pad)
+    end = min(audio.size, (speech[-1] + 1) * frame + pad)
+    return int(start), int(end)
+
+
+def trim_to_speech(audio: np.ndarray) -> np.ndarray:
+    """Kaydı konuşma aralığına kırp; konuşma yoksa NoSpeechError"""
+    span = detect_speech(audio)
+    if span is None:
+        raise NoSpeechError("No speech detected in the recording")
+    return audio[span[0] : span[1]]
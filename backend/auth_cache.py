@@ -0,0 +1,95 @@
+# auth_cache.py - doğrulanmış JWT ve kullanıcı kayıtları için kısa ömürlü, sınırlı önbellek
+
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class _TTLStore:
+    """Giriş başına son kullanma anı olan LRU sözlük (time.monotonic)"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value, ttl: float):
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key):
+        self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class IdentityCache:
+    """token -> kullanıcı adı (imza doğrulanmış) ve kullanıcı adı -> kullanıcı kaydı.
+
+    Token girişi en geç JWT'nin exp anında düşer; kullanıcı kaydı değiştiğinde
+    invalidate_user() çağrılır. Her iki katman da ttl saniyeyle sınırlıdır.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 60.0):
+        self.ttl = ttl
+        self._tokens = _TTLStore(max_entries)
+        self._users = _TTLStore(max_entries)
+        self.token_hits = 0
+        self.token_misses = 0
+        self.user_hits = 0
+        self.user_misses = 0
+
+    def get_token(self, token: str) -> Optional[str]:
+        username = self._tokens.get(token)
+        if username is None:
+            self.token_misses += 1
+        else:
+            self.token_hits += 1
+        return username
+
+    def put_token(self, token: str, username: str, exp: Optional[float] = None):
+        ttl = self.ttl if exp is None else min(self.ttl, exp - time.time())
+        self._tokens.put(token, username, ttl)
+
+    def get_user(self, username: str) -> Optional[dict]:
+        user = self._users.get(username)
+        if user is None:
+            self.user_misses += 1
+        else:
+            self.user_hits += 1
+        return user
+
+    def put_user(self, username: str, user: dict):
+        self._users.put(username, user, self.ttl)
+
+    def invalidate_user(self, username: str):
+        self._users.pop(username)
+
+    def stats(self) -> dict:
+        """Önbellek sayaçları"""
+        lookups = self.token_hits + self.token_misses + self.user_hits + self.user_misses
+        return {
+            "tokens": len(self._tokens),
+            "users": len(self._users),
+            "ttl": self.ttl,
+            "token_hits": self.token_hits,
+            "token_misses": self.token_misses,
+            "user_hits": self.user_hits,
+            "user_misses": self.user_misses,
+            "hit_ratio": round((self.token_hits + self.user_hits) / lookups, 3) if lookups else 0.0,
+        }
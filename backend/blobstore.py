@@ -0,0 +1,193 @@
+# blobstore.py - kayıt blob'ları için depolama arka uçları: yerel dosya sistemi ve S3 uyumlu nesne deposu
+#
+# Anahtarlar içerik adreslidir (ab/cd/<sha256>): aynı anahtara yazılan içerik hep aynıdır,
+# bu yüzden put tekrarlanabilir. Hangi blob'un yaşadığı SQLite'taki blobs tablosunda tutulur.
+
+import os
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+def _fsync_dir(directory: Path):
+    """rename'in kalıcı olması için klasör girdisini diske yaz (POSIX)"""
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class BlobStore(ABC):
+    """StorageManager'ın blob içeriği için kullandığı arka uç arayüzü"""
+
+    @abstractmethod
+    def put(self, key: str, path: Path):
+        """fsync edilmiş yerel dosyayı key altına yaz; dosya tüketilir (taşınır ya da silinir)"""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        """key yoksa hata vermez"""
+
+    @abstractmethod
+    def local_copy(self, key: str, tmp_dir: Path):
+        """İçeriği okunabilir yerel bir yol olarak veren context manager (gerekirse indirilir)"""
+
+    @abstractmethod
+    def iter_keys(self) -> Iterator[tuple[str, int, float]]:
+        """Depodaki tüm (anahtar, boyut, değişme zamanı - epoch sn) üçlüleri (reconcile için)"""
+
+    @abstractmethod
+    def location(self, key: str = "") -> str:
+        """İnsan okunur konum: dosya yolu ya da s3://bucket/anahtar"""
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Doğrudan sunulabilecek yerel dosya (yalnızca yerel depo)"""
+        return None
+
+    def presigned_url(self, key: str, expires: int, filename: Optional[str] = None,
+                      media_type: Optional[str] = None) -> Optional[str]:
+        """Süreli indirme adresi (yalnızca nesne deposu); filename/media_type yanıt başlıklarına yazılır"""
+        return None
+
+
+class LocalBlobStore(BlobStore):
+    """root/ab/cd/<sha256> düzeninde yerel dosyalar; put atomik rename'dir (tmp aynı dosya sisteminde olmalı)"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def put(self, key: str, path: Path):
+        dest_path = self.root / key
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(path, dest_path)
+        _fsync_dir(dest_path.parent)
+
+    def exists(self, key: str) -> bool:
+        return (self.root / key).exists()
+
+    def delete(self, key: str):
+        (self.root / key).unlink(missing_ok=True)
+
+    @contextmanager
+    def local_copy(self, key: str, tmp_dir: Path):
+        yield self.root / key
+
+    def iter_keys(self) -> Iterator[tuple[str, int, float]]:
+        for path in self.root.glob("??/??/*"):
+            stat = path.stat()
+            yield path.relative_to(self.root).as_posix(), stat.st_size, stat.st_mtime
+
+    def location(self, key: str = "") -> str:
+        return str(self.root / key) if key else str(self.root)
+
+    def local_path(self, key: str) -> Optional[Path]:
+        return self.root / key
+
+
+class S3BlobStore(BlobStore):
+    """S3 uyumlu nesne deposu (AWS S3, MinIO; testte moto).
+
+    Tek bir boto3 istemcisi (thread-safe) max_connections bağlantılık havuzu ile paylaşılır;
+    multipart_threshold üstündeki dosyalar parçalar halinde paralel yüklenir.
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None,
+                 region_name: Optional[str] = None, max_connections: int = 32,
+                 multipart_threshold: int = 8 * 1024 * 1024, multipart_chunksize: int = 8 * 1024 * 1024,
+                 client=None):
+        # Opsiyonel bağımlılık: yalnızca STORAGE_BACKEND=s3 iken gerekir
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.config import Config
+
+        if client is None:
+            client = boto3.client(
+                "s3",
+                endpoint_url=endpoint_url,
+                region_name=region_name,
+                config=Config(max_pool_connections=max_connections, retries={"max_attempts": 5, "mode": "standard"}),
+            )
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=min(max_connections, 10),
+        )
+
+    def _not_found(self, error) -> bool:
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def put(self, key: str, path: Path):
+        self.client.upload_file(str(path), self.bucket, self.prefix + key, Config=self.transfer_config)
+        Path(path).unlink()
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+            return True
+        except ClientError as e:
+            if self._not_found(e):
+                return False
+            raise
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+    @contextmanager
+    def local_copy(self, key: str, tmp_dir: Path):
+        path = Path(tmp_dir) / f"{uuid.uuid4().hex}.part"
+        try:
+            self.client.download_file(self.bucket, self.prefix + key, str(path), Config=self.transfer_config)
+            yield path
+        finally:
+            path.unlink(missing_ok=True)
+
+    def iter_keys(self) -> Iterator[tuple[str, int, float]]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get("Contents", ()):
+                yield obj["Key"][len(self.prefix):], obj["Size"], obj["LastModified"].timestamp()
+
+    def location(self, key: str = "") -> str:
+        return f"s3://{self.bucket}/{self.prefix}{key}"
+
+    def presigned_url(self, key: str, expires: int, filename: Optional[str] = None,
+                      media_type: Optional[str] = None) -> Optional[str]:
+        params = {"Bucket": self.bucket, "Key": self.prefix + key}
+        if filename:
+            params["ResponseContentDisposition"] = f'attachment; filename="{filename}"'
+        if media_type:
+            params["ResponseContentType"] = media_type
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=expires)
+
+
+def blob_store_from_env(blobs_dir: Path) -> BlobStore:
+    """STORAGE_BACKEND=local (varsayılan, blobs_dir) ya da s3 (S3_* ortam değişkenleri)"""
+    backend = os.getenv("STORAGE_BACKEND", "local").lower()
+    if backend == "local":
+        return LocalBlobStore(blobs_dir)
+    if backend == "s3":
+        return S3BlobStore(
+            bucket=os.environ["S3_BUCKET"],
+            prefix=os.getenv("S3_PREFIX", "recordings/"),
+            endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+            region_name=os.getenv("S3_REGION") or None,
+            max_connections=int(os.getenv("S3_MAX_CONNECTIONS", "32")),
+            multipart_threshold=int(float(os.getenv("S3_MULTIPART_THRESHOLD_MB", "8")) * 1024 * 1024),
+            multipart_chunksize=int(float(os.getenv("S3_MULTIPART_CHUNK_MB", "8")) * 1024 * 1024),
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
@@ -0,0 +1,63 @@
+# body_limit.py - istek gövdesi boyut sınırı (ASGI ara katmanı)
+#
+# UploadFile parametreli uçlarda Starlette multipart gövdeyi uç fonksiyonu çalışmadan önce
+# geçici dosyaya yazar; uç içindeki kontrol bu yüzden geç kalır. Sınır gövde okunurken,
+# receive() üzerinde sayılarak uygulanır (chunked ve Content-Length'siz gövdeler dahil):
+# sınır aşılınca 413 hemen gönderilir ve uygulamaya istemci bağlantıyı kesmiş gibi görünür.
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+TOO_LARGE = "Request body is too large"
+
+
+class BodySizeLimit:
+    """(yöntem, yol) başına gövde bayt sınırı; aşılınca okuma kesilir ve 413 döner"""
+
+    def __init__(self, app, limits: dict[tuple[str, str], int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Bildirilen uzunluk zaten fazlaysa gövdeyi hiç okuma
+        declared = dict(scope["headers"]).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            response = JSONResponse({"detail": TOO_LARGE}, status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+        rejected = False
+        response_started = False
+
+        async def limited_send(message):
+            nonlocal response_started
+            if rejected:
+                return  # 413 gönderildi; uygulamanın yanıtı atılır
+            response_started = True
+            await send(message)
+
+        async def limited_receive():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # 413'ü hemen gönder; uygulama istemci bağlantıyı kesmiş gibi okumayı bırakır
+                    if not response_started:
+                        response = JSONResponse(
+                            {"detail": TOO_LARGE}, status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+                        )
+                        await response(scope, receive, send)
+                    rejected = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        await self.app(scope, limited_receive, limited_send)
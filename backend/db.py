@@ -0,0 +1,115 @@
+# db.py - SQLite veri erişim katmanı (bağlantı havuzu, WAL, async erişim)
+
+import asyncio
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable
+
+# Her bağlantıda uygulanan ayarlar
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",  # okuyucular yazıcıyı, yazıcı okuyucuları bloklamaz
+    "synchronous": "NORMAL",  # WAL ile güvenli; her commit'te fsync yok
+    "cache_size": -16000,  # bağlantı başına ~16 MB sayfa önbelleği
+    "mmap_size": 268435456,  # 256 MB bellek eşlemeli okuma
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,  # kilitte hemen "database is locked" yerine 5 sn bekle
+}
+
+# Uygulama zaman damgaları: SQLite CURRENT_TIMESTAMP ile aynı biçim (UTC)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class ConnectionPool:
+    """Sınırlı sayıda, yeniden kullanılan SQLite bağlantısı.
+
+    sqlite3 her bağlantıda hazırlanmış ifadeleri SQL metnine göre önbelleğe alır
+    (cached_statements); bağlantılar kapatılmadığı için bu önbellek istekler arasında korunur.
+    """
+
+    def __init__(self, path: Path, size: int = 8, pragmas: dict = None, cached_statements: int = 256, timeout: float = 30.0):
+        self.path = path
+        self.size = max(1, size)
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="db")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            check_same_thread=False,  # havuz aynı anda tek bir thread'e verir
+            cached_statements=self.cached_statements,
+        )
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No database connection available within {self.timeout}s")
+
+    def release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            with self._lock:
+                self._created -= 1
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Havuzdan bir bağlantı al; çıkışta commit edilmemiş işlem geri alınır"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    async def run(self, fn: Callable, *args):
+        """fn(conn, *args) çağrısını DB thread havuzunda çalıştır (event loop'u bloklamaz)"""
+        def call():
+            with self.connection() as conn:
+                return fn(conn, *args)
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+
+    def close(self):
+        self._closed = True
+        self._executor.shutdown(wait=True)
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+            self._created -= 1
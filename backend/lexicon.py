@@ -0,0 +1,139 @@
+# lexicon.py - kelime verisi: dosyadan yüklenen, değişmez ve indeksli sözlük
+
+import json
+import random
+import sqlite3
+import unicodedata
+from contextlib import closing
+from functools import cached_property
+from operator import itemgetter
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional
+
+# Fonem ayırırken atlanan vurgu / hece işaretleri
+_IPA_SEPARATORS = {"ˈ", "ˌ", ".", " ", "-"}
+# Bir önceki sese eklenen uzunluk işaretleri (birleşik aksan işaretleri de eklenir)
+_IPA_MODIFIERS = {"ː", "ˑ"}
+
+
+def ipa_phonemes(ipa: str) -> tuple[str, ...]:
+    """IPA dizesini fonemlere ayır: 'ˈpiːm' -> ('p', 'iː', 'm'), 'ei̯' -> ('e', 'i̯')"""
+    phonemes: list[str] = []
+    for ch in ipa:
+        if ch in _IPA_SEPARATORS:
+            continue
+        if phonemes and (ch in _IPA_MODIFIERS or unicodedata.combining(ch)):
+            phonemes[-1] += ch
+        else:
+            phonemes.append(ch)
+    return tuple(phonemes)
+
+
+class Word(NamedTuple):
+    id: str
+    text: str
+    ipa: str
+    tr: str
+    level: str
+    category: str
+
+    def to_dict(self) -> dict:
+        return self._asdict()
+
+
+class Lexicon:
+    """Kelimeler tek bir tuple'da; indeksler bu tuple'a konum (int) tuple'ları tutar.
+
+    Tüm aramalar sözlük erişimidir; örnekleme random.sample ile indeks dizisi üzerinden yapılır,
+    paylaşılan listeler hiçbir zaman yerinde değiştirilmez.
+    """
+
+    def __init__(self, words: Iterable[Word]):
+        self.words: tuple[Word, ...] = tuple(words)
+
+        by_id: dict[str, int] = {}
+        by_text: dict[str, int] = {}
+        by_level: dict[str, list[int]] = {}
+        by_category: dict[tuple[str, str], list[int]] = {}
+        for i, word in enumerate(self.words):
+            if word.id in by_id:
+                raise ValueError(f"Duplicate word id in lexicon: {word.id}")
+            by_id[word.id] = i
+            by_text.setdefault(word.text.lower(), i)
+            by_level.setdefault(word.level, []).append(i)
+            by_category.setdefault((word.level, word.category), []).append(i)
+
+        self._by_id = by_id
+        self._by_text = by_text
+        self._by_level = {level: tuple(ix) for level, ix in by_level.items()}
+        self._by_category = {key: tuple(ix) for key, ix in by_category.items()}
+        categories: dict[str, list[str]] = {}
+        for level, category in self._by_category:
+            categories.setdefault(level, []).append(category)
+        self._categories = {level: tuple(names) for level, names in categories.items()}
+        self.levels: tuple[str, ...] = tuple(self._categories)
+
+    @cached_property
+    def _by_phoneme(self) -> dict[str, frozenset]:
+        # IPA ayrıştırması en pahalı indeks; açılışı yavaşlatmamak için ilk fonem sorgusunda kurulur
+        by_phoneme: dict[str, list[int]] = {}
+        for i, word in enumerate(self.words):
+            for phoneme in set(ipa_phonemes(word.ipa)):
+                by_phoneme.setdefault(phoneme, []).append(i)
+        return {phoneme: frozenset(ix) for phoneme, ix in by_phoneme.items()}
+
+    @classmethod
+    def load(cls, path: Path) -> "Lexicon":
+        """JSON (kayıt listesi) ya da SQLite (words tablosu) dosyasından yükle"""
+        path = Path(path)
+        if path.suffix in (".db", ".sqlite", ".sqlite3"):
+            # sqlite3.connect bağlamı yalnızca transaction'ı bitirir, bağlantıyı kapatmaz
+            with closing(sqlite3.connect(path)) as conn:
+                rows = conn.execute("SELECT id, text, ipa, tr, level, category FROM words ORDER BY rowid")
+                return cls(map(Word._make, rows))
+        with path.open(encoding="utf-8") as f:
+            records = json.load(f)
+        fields = itemgetter(*Word._fields)
+        return cls(map(Word._make, map(fields, records)))
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def get(self, word_id: str) -> Optional[Word]:
+        i = self._by_id.get(word_id)
+        return None if i is None else self.words[i]
+
+    def position(self, word_id: str) -> Optional[int]:
+        return self._by_id.get(word_id)
+
+    def matches(self, i: int, level: str, category: Optional[str] = None, phoneme: Optional[str] = None) -> bool:
+        """i konumundaki kelime indices(level, category, phoneme) filtresine uyuyor mu (O(1))"""
+        word = self.words[i]
+        return (
+            word.level == level
+            and (category is None or word.category == category)
+            and (phoneme is None or i in self._by_phoneme.get(phoneme, ()))
+        )
+
+    def find_text(self, text: str) -> Optional[Word]:
+        """Yazımına göre (büyük/küçük harf duyarsız) kelime"""
+        i = self._by_text.get(text.lower())
+        return None if i is None else self.words[i]
+
+    def categories(self, level: str) -> tuple[str, ...]:
+        return self._categories.get(level, ())
+
+    def indices(self, level: str, category: Optional[str] = None, phoneme: Optional[str] = None) -> tuple[int, ...]:
+        """Filtreye uyan kelimelerin konumları (fonem filtresi yoksa kopyalanmadan döner)"""
+        ix = self._by_level.get(level, ()) if category is None else self._by_category.get((level, category), ())
+        if phoneme is not None:
+            with_phoneme = self._by_phoneme.get(phoneme, frozenset())
+            ix = tuple(i for i in ix if i in with_phoneme)
+        return ix
+
+    def sample(self, indices: tuple[int, ...], k: int, rng: random.Random = random) -> list[Word]:
+        """indices içinden tekrar etmeden k kelime seç"""
+        return [self.words[i] for i in rng.sample(indices, min(max(k, 0), len(indices)))]
+
+    def phonemes(self) -> tuple[str, ...]:
+        return tuple(sorted(self._by_phoneme))
@@ -0,0 +1,47 @@
+# metrics.py - uç bazında gecikme ölçümleri ve event loop gecikme izleyicisi
+
+import asyncio
+import time
+from collections import deque
+
+
+class LatencyMetrics:
+    """Anahtar başına son max_samples süre örneğinden yüzdelik dilimler"""
+
+    def __init__(self, max_samples: int = 1024):
+        self.max_samples = max_samples
+        self._samples: dict[str, deque] = {}
+        self._counts: dict[str, int] = {}
+
+    def record(self, key: str, seconds: float):
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.max_samples)
+        samples.append(seconds)
+        self._counts[key] = self._counts.get(key, 0) + 1
+
+    def snapshot(self) -> dict:
+        """Anahtar başına count, ms cinsinden p50/p95/p99/max"""
+        result = {}
+        for key, samples in self._samples.items():
+            ordered = sorted(samples)
+
+            def percentile(q: float) -> float:
+                return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 2)
+
+            result[key] = {
+                "count": self._counts[key],
+                "p50_ms": percentile(0.50),
+                "p95_ms": percentile(0.95),
+                "p99_ms": percentile(0.99),
+                "max_ms": round(ordered[-1] * 1000, 2),
+            }
+        return result
+
+
+async def monitor_event_loop(metrics: LatencyMetrics, interval: float = 0.05, key: str = "event_loop_lag"):
+    """Loop'un uyanma gecikmesini ölç: bloklayan bir çağrı (ör. satır içi bcrypt) burada sıçrama yapar"""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        metrics.record(key, max(0.0, time.perf_counter() - started - interval))
@@ -0,0 +1,255 @@
+# migrations.py - sürümlü SQLite şema göçleri (PRAGMA user_version)
+#
+# Kullanım: uygulama açılışında migrate(conn) çağrılır. Var olan bir veritabanını
+# elle yükseltmek için: python migrations.py [db_yolu]
+
+import sqlite3
+import sys
+from datetime import date
+from pathlib import Path
+
+# storage_totals sayaçlarını tablolardan yeniden hesapla (göç ve storage.py reconcile kullanır)
+STORAGE_TOTALS_RECOUNT = """
+    INSERT OR REPLACE INTO storage_totals (id, recording_count, recording_bytes, blob_count, blob_bytes)
+    SELECT 1,
+        (SELECT COUNT(*) FROM recordings),
+        (SELECT COALESCE(SUM(size), 0) FROM recordings),
+        (SELECT COUNT(*) FROM blobs),
+        (SELECT COALESCE(SUM(size), 0) FROM blobs)
+"""
+
+# (sürüm, açıklama, SQL ifadeleri / fonksiyonlar). Yeni göçler listenin sonuna eklenir; mevcutlar değiştirilmez.
+MIGRATIONS = [
+    (1, "base schema", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            hashed_password TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS achievements (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            achievement_type TEXT NOT NULL,
+            achievement_name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            unlocked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(user_id, achievement_type)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_progress (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            word_id TEXT NOT NULL,
+            score REAL NOT NULL,
+            asr_text TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        """,
+    ]),
+    (2, "user_progress covering indexes", [
+        # Son denemeler: WHERE user_id = ? ORDER BY created_at DESC -> yalnızca indeks okunur
+        """
+        CREATE INDEX IF NOT EXISTS idx_user_progress_user_created
+        ON user_progress (user_id, created_at, word_id, score)
+        """,
+        # Kelime bazında döküm
+        """
+        CREATE INDEX IF NOT EXISTS idx_user_progress_user_word
+        ON user_progress (user_id, word_id, score, created_at)
+        """,
+        # Seri (streak) sorgusu: GROUP BY DATE(created_at)
+        """
+        CREATE INDEX IF NOT EXISTS idx_user_progress_user_day
+        ON user_progress (user_id, DATE(created_at), created_at)
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_achievements_user_unlocked ON achievements (user_id, unlocked_at)",
+    ]),
+    (3, "per-user and per-word progress aggregates", [
+        """
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER PRIMARY KEY,
+            total_practice INTEGER NOT NULL DEFAULT 0,
+            score_sum REAL NOT NULL DEFAULT 0,
+            best_score REAL NOT NULL DEFAULT 0,
+            last_practice_at TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_word_stats (
+            user_id INTEGER NOT NULL,
+            word_id TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            score_sum REAL NOT NULL DEFAULT 0,
+            best_score REAL NOT NULL DEFAULT 0,
+            last_at TIMESTAMP,
+            PRIMARY KEY (user_id, word_id)
+        ) WITHOUT ROWID
+        """,
+        # Var olan geçmişten doldur
+        """
+        INSERT OR REPLACE INTO user_stats (user_id, total_practice, score_sum, best_score, last_practice_at)
+        SELECT user_id, COUNT(*), SUM(score), MAX(score), MAX(created_at)
+        FROM user_progress GROUP BY user_id
+        """,
+        """
+        INSERT OR REPLACE INTO user_word_stats (user_id, word_id, attempts, score_sum, best_score, last_at)
+        SELECT user_id, word_id, COUNT(*), SUM(score), MAX(score), MAX(created_at)
+        FROM user_progress GROUP BY user_id, word_id
+        """,
+    ]),
+    (4, "incremental streak state and per-user timezone", [
+        "ALTER TABLE users ADD COLUMN timezone TEXT NOT NULL DEFAULT 'UTC'",
+        "ALTER TABLE user_stats ADD COLUMN current_streak INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE user_stats ADD COLUMN longest_streak INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE user_stats ADD COLUMN last_practice_date TEXT",
+        lambda conn: _backfill_streaks(conn),
+    ]),
+    (5, "spaced repetition state", [
+        """
+        CREATE TABLE IF NOT EXISTS srs_state (
+            user_id INTEGER NOT NULL,
+            word_id TEXT NOT NULL,
+            ease REAL NOT NULL,
+            interval_days REAL NOT NULL,
+            repetitions INTEGER NOT NULL,
+            due_at TIMESTAMP NOT NULL,
+            last_score REAL NOT NULL,
+            last_review_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (user_id, word_id)
+        ) WITHOUT ROWID
+        """,
+        # Günlük paket kuyruğu: WHERE user_id = ? ORDER BY due_at -> yalnızca indeks okunur
+        "CREATE INDEX IF NOT EXISTS idx_srs_state_user_due ON srs_state (user_id, due_at, ease, last_score)",
+    ]),
+    (6, "content-addressed recording store", [
+        """
+        CREATE TABLE IF NOT EXISTS blobs (
+            sha256 TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            ref_count INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS recordings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            word_id TEXT NOT NULL,
+            sha256 TEXT NOT NULL REFERENCES blobs (sha256),
+            original_filename TEXT,
+            size INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_recordings_user_word ON recordings (user_id, word_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_recordings_sha256 ON recordings (sha256)",
+    ]),
+    (7, "recording metadata index and storage totals", [
+        # Kelimeye göre listeleme ve yaşa göre temizlik klasör taraması yerine bu indekslerden okunur
+        "CREATE INDEX IF NOT EXISTS idx_recordings_word_created ON recordings (word_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_recordings_created ON recordings (created_at)",
+        # Tek satırlık çalışan sayaçlar: her kayıt/silmede aynı işlemde güncellenir
+        """
+        CREATE TABLE IF NOT EXISTS storage_totals (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            recording_count INTEGER NOT NULL,
+            recording_bytes INTEGER NOT NULL,
+            blob_count INTEGER NOT NULL,
+            blob_bytes INTEGER NOT NULL
+        )
+        """,
+        STORAGE_TOTALS_RECOUNT,
+    ]),
+    (8, "recording retention and compaction", [
+        # Kelime başına en iyi N deneme politikası için (POST /pronunciation/score?recording_id=...)
+        "ALTER TABLE recordings ADD COLUMN score REAL",
+        "ALTER TABLE blobs ADD COLUMN compacted_at TIMESTAMP",
+        # Kullanıcı kotası: kullanıcının kayıtları yeniden eskiye, boyutlarıyla (kapsayan)
+        "CREATE INDEX IF NOT EXISTS idx_recordings_user_created ON recordings (user_id, created_at, size)",
+        # Henüz sıkıştırılmamış blob'lar (kısmi indeks: sıkıştırılanlar indeksten düşer)
+        "CREATE INDEX IF NOT EXISTS idx_blobs_uncompacted ON blobs (created_at) WHERE compacted_at IS NULL",
+    ]),
+    (9, "stored format of compacted blobs", [
+        # NULL: yüklendiği gibi; 'flac' / 'opus': sıkıştırmada dönüştürüldü (indirme adı ve türü buna göre)
+        "ALTER TABLE blobs ADD COLUMN format TEXT",
+    ]),
+    (10, "drop unused per-day streak index", [
+        # Seri göç 4'ten beri user_stats'ta artımlı tutuluyor; GROUP BY DATE(created_at) sorgusu kalmadı
+        "DROP INDEX IF EXISTS idx_user_progress_user_day",
+    ]),
+    (11, "aliases from original to compacted blobs", [
+        # Sıkıştırılan WAV'ın sha256'sı -> yeni blob: aynı WAV yeniden yüklenince tekilleştirme sürer
+        """
+        CREATE TABLE IF NOT EXISTS blob_aliases (
+            sha256 TEXT PRIMARY KEY,
+            target TEXT NOT NULL REFERENCES blobs (sha256)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_blob_aliases_target ON blob_aliases (target)",
+    ]),
+]
+
+
+def _backfill_streaks(conn: sqlite3.Connection):
+    """Seri durumunu geçmiş pratik günlerinden hesapla (tüm kullanıcılar UTC ile başlar)"""
+    cursor = conn.execute("""
+        SELECT user_id, DATE(created_at) FROM user_progress
+        GROUP BY user_id, DATE(created_at)
+        ORDER BY user_id, DATE(created_at)
+    """)
+    state = {}  # user_id -> (current, longest, last_date)
+    for user_id, day in cursor:
+        day = date.fromisoformat(day)
+        current, longest, last = state.get(user_id, (0, 0, None))
+        current = current + 1 if last is not None and (day - last).days == 1 else 1
+        state[user_id] = (current, max(longest, current), day)
+
+    conn.executemany(
+        "UPDATE user_stats SET current_streak = ?, longest_streak = ?, last_practice_date = ? WHERE user_id = ?",
+        [(current, longest, last.isoformat(), user_id) for user_id, (current, longest, last) in state.items()],
+    )
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Bekleyen göçleri sırayla, her biri kendi işleminde uygula; son sürümü döndür"""
+    current = schema_version(conn)
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            conn.execute("BEGIN")
+            for statement in statements:
+                # Veri dönüştüren adımlar SQL yerine conn alan bir fonksiyon olabilir
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"Applied migration {version}: {description}")
+        current = version
+
+    # Yeni indeksler için planlayıcı istatistiklerini güncelle
+    conn.execute("PRAGMA optimize")
+    return current
+
+
+if __name__ == "__main__":
+    db_path = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).resolve().parents[1] / "data" / "users.db"
+    with sqlite3.connect(db_path) as conn:
+        print(f"{db_path}: schema version {migrate(conn)}")
@@ -0,0 +1,65 @@
+# passwords.py - bcrypt hash/doğrulama işlerini event loop dışında, sınırlı bir havuzda çalıştırma
+
+import asyncio
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from passlib.context import CryptContext
+
+
+class HasherBusyError(Exception):
+    """Bekleyen parola işi sınırı aşıldı; istemci retry_after saniye sonra tekrar denemeli"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Password hasher is busy, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """bcrypt işleri için ayrı thread havuzu (bcrypt GIL'i bırakır).
+
+    Aynı anda en fazla max_workers hash çalışır, en fazla max_pending iş bekler.
+    Maliyet (rounds) değişince eski hash'ler verify_and_update() ile girişte yenilenir.
+    """
+
+    def __init__(self, rounds: int = 12, max_workers: int = 2, max_pending: int = 64):
+        self.rounds = rounds
+        self.max_workers = max(1, max_workers)
+        self.max_pending = max(1, max_pending)
+        # min/max_desired_rounds: farklı maliyetle üretilmiş her hash "güncellenmeli" sayılır
+        self.context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=rounds,
+            bcrypt__min_desired_rounds=rounds,
+            bcrypt__max_desired_rounds=rounds,
+        )
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        self.pending = 0
+        self._avg_seconds = 0.25  # tek hash süresinin EMA'sı (retry_after tahmini için)
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.pending / self.max_workers * self._avg_seconds))
+
+    async def _run(self, fn: Callable, *args):
+        if self.pending >= self.max_pending:
+            raise HasherBusyError(self.retry_after())
+        self.pending += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (time.perf_counter() - started)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> tuple[bool, Optional[str]]:
+        """(geçerli mi, maliyet değiştiyse yeni hash ya da None)"""
+        return await self._run(self.context.verify_and_update, password, hashed)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
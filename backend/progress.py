@@ -0,0 +1,231 @@
+# progress.py - pratik kayıtları ve artımlı ilerleme özetleri
+
+import sqlite3
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from achievements import evaluate_practice_event
+from db import TIMESTAMP_FORMAT
+from srs import record_reviews
+
+
+# Yeni günün seri değeri: aynı gün (ya da saat dilimi değişikliğiyle "gelecek") -> değişmez,
+# dünün devamı -> +1, aksi halde seri yeniden başlar
+_NEXT_STREAK = """
+    CASE
+        WHEN last_practice_date >= excluded.last_practice_date THEN current_streak
+        WHEN last_practice_date = :yesterday THEN current_streak + 1
+        ELSE 1
+    END
+"""
+
+
+def is_valid_timezone(name: str) -> bool:
+    try:
+        ZoneInfo(name)
+        return True
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+
+
+def local_date(tz_name: Optional[str], at: Optional[datetime] = None) -> date:
+    """UTC anını (naive ya da aware) kullanıcının saat dilimindeki takvim gününe çevir"""
+    at = at or datetime.utcnow()
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    try:
+        zone = ZoneInfo(tz_name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        zone = ZoneInfo("UTC")
+    return at.astimezone(zone).date()
+
+
+def streak_expires_at(last_practice_date: Optional[str], tz_name: Optional[str]) -> Optional[float]:
+    """Pratik olmazsa serinin sıfırlanacağı an (epoch sn): son pratik gününden iki gün sonraki yerel gece yarısı"""
+    if not last_practice_date:
+        return None
+    try:
+        zone = ZoneInfo(tz_name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        zone = ZoneInfo("UTC")
+    day = date.fromisoformat(last_practice_date) + timedelta(days=2)
+    return datetime(day.year, day.month, day.day, tzinfo=zone).timestamp()
+
+
+def _user_timezones(conn: sqlite3.Connection, user_ids) -> dict:
+    user_ids = list(user_ids)
+    placeholders = ", ".join("?" * len(user_ids))
+    cursor = conn.execute(f"SELECT id, timezone FROM users WHERE id IN ({placeholders})", user_ids)
+    return dict(cursor.fetchall())
+
+
+# Başarım kurallarına girdi olan, user_stats'tan okunan alanlar
+EVENT_FIELDS = ("total_practice", "best_score", "current_streak", "longest_streak")
+
+
+def _stat_snapshot(conn: sqlite3.Connection, user_ids) -> dict:
+    user_ids = list(user_ids)
+    placeholders = ", ".join("?" * len(user_ids))
+    cursor = conn.execute(
+        f"SELECT user_id, {', '.join(EVENT_FIELDS)} FROM user_stats WHERE user_id IN ({placeholders})", user_ids
+    )
+    return {row[0]: dict(zip(EVENT_FIELDS, row[1:])) for row in cursor}
+
+
+def record_practice(
+    conn: sqlite3.Connection,
+    rows: list[tuple],
+    practiced_at: Optional[datetime] = None,
+    reviews: Optional[list[tuple]] = None,
+) -> dict:
+    """(user_id, word_id, score, asr_text) satırlarını ekle; özet tabloları, başarımları ve
+    (verildiyse) (user_id, sözlük word_id, score) tekrar zamanlamasını aynı işlemde güncelle.
+
+    Kullanıcı başına yeni açılan başarımları döndürür.
+    """
+    if not rows:
+        return {}
+    practiced_at = practiced_at or datetime.utcnow()
+    timestamp = practiced_at.strftime(TIMESTAMP_FORMAT)
+
+    # Toplu eklemede her kullanıcı / kelime için tek upsert
+    per_user = defaultdict(lambda: [0, 0.0, 0.0])
+    per_word = defaultdict(lambda: [0, 0.0, 0.0])
+    for user_id, word_id, score, _ in rows:
+        for stats in (per_user[user_id], per_word[(user_id, word_id)]):
+            stats[0] += 1
+            stats[1] += score
+            stats[2] = max(stats[2], score)
+
+    try:
+        conn.executemany(
+            "INSERT INTO user_progress (user_id, word_id, score, asr_text, created_at) VALUES (?, ?, ?, ?, ?)",
+            [(*row, timestamp) for row in rows],
+        )
+        # Saat dilimi okuması INSERT'ten sonra: yazma kilidi alındığı için seri güncellemesi yarışmaz
+        timezones = _user_timezones(conn, per_user)
+        before = _stat_snapshot(conn, per_user)
+        user_params = []
+        for user_id, (count, score_sum, best) in per_user.items():
+            today = local_date(timezones.get(user_id), practiced_at)
+            user_params.append({
+                "user_id": user_id, "count": count, "score_sum": score_sum, "best": best,
+                "at": timestamp, "today": today.isoformat(),
+                "yesterday": (today - timedelta(days=1)).isoformat(),
+            })
+        conn.executemany(f"""
+            INSERT INTO user_stats (
+                user_id, total_practice, score_sum, best_score, last_practice_at,
+                current_streak, longest_streak, last_practice_date
+            )
+            VALUES (:user_id, :count, :score_sum, :best, :at, 1, 1, :today)
+            ON CONFLICT (user_id) DO UPDATE SET
+                total_practice = total_practice + excluded.total_practice,
+                score_sum = score_sum + excluded.score_sum,
+                best_score = MAX(best_score, excluded.best_score),
+                last_practice_at = excluded.last_practice_at,
+                current_streak = {_NEXT_STREAK},
+                longest_streak = MAX(longest_streak, {_NEXT_STREAK}),
+                last_practice_date = MAX(last_practice_date, excluded.last_practice_date)
+        """, user_params)
+        conn.executemany("""
+            INSERT INTO user_word_stats (user_id, word_id, attempts, score_sum, best_score, last_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (user_id, word_id) DO UPDATE SET
+                attempts = attempts + excluded.attempts,
+                score_sum = score_sum + excluded.score_sum,
+                best_score = MAX(best_score, excluded.best_score),
+                last_at = excluded.last_at
+        """, [(user_id, word_id, *stats, timestamp) for (user_id, word_id), stats in per_word.items()])
+
+        # Pratik olayı: yalnızca girdisi değişen kurallar değerlendirilir
+        unlocks = {}
+        for user_id, values in _stat_snapshot(conn, per_user).items():
+            previous = before.get(user_id, {})
+            changed = {field for field in EVENT_FIELDS if previous.get(field) != values[field]}
+            changed.add("improvement_trend")  # son skorlar her olayda değişir
+            unlocks[user_id] = evaluate_practice_event(
+                conn, user_id, changed, values,
+                lazy_values={"improvement_trend": lambda user_id=user_id: improvement_trend(
+                    [row[1] for row in fetch_recent_scores(conn, user_id)]
+                )},
+                unlocked_at=timestamp,
+            )
+
+        record_reviews(conn, reviews, practiced_at)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return unlocks
+
+
+def fetch_user_stats(conn: sqlite3.Connection, user_id: int) -> Optional[dict]:
+    """Ömür boyu toplamlar ve seri durumu (tek satır)"""
+    row = conn.execute("""
+        SELECT s.total_practice, s.score_sum, s.best_score, s.last_practice_at,
+               s.current_streak, s.longest_streak, s.last_practice_date, u.timezone
+        FROM user_stats s LEFT JOIN users u ON u.id = s.user_id
+        WHERE s.user_id = ?
+    """, (user_id,)).fetchone()
+    if not row or not row[0]:
+        return None
+
+    # Kayıtlı seri son pratik gününde biter; dün ya da bugün pratik yoksa seri kopmuştur
+    yesterday = local_date(row[7]) - timedelta(days=1)
+    current_streak = row[4] if row[6] and row[6] >= yesterday.isoformat() else 0
+    return {
+        "total_practice": row[0],
+        "average_score": round(row[1] / row[0], 2),
+        "best_score": row[2],
+        "last_practice_at": row[3],
+        "current_streak": current_streak,
+        "longest_streak": row[5],
+        "last_practice_date": row[6],
+        "streak_expires_at": streak_expires_at(row[6], row[7]),
+    }
+
+
+def fetch_stats_version(conn: sqlite3.Connection, user_id: int) -> tuple:
+    """Özetin değişip değişmediğini anlamak için (total_practice, last_practice_at); birincil anahtar araması"""
+    row = conn.execute(
+        "SELECT total_practice, last_practice_at FROM user_stats WHERE user_id = ?", (user_id,)
+    ).fetchone()
+    return tuple(row) if row else (0, None)
+
+
+def fetch_word_stats(conn: sqlite3.Connection, user_id: int) -> dict:
+    """Kelime bazında deneme sayısı, en iyi ve ortalama skor"""
+    cursor = conn.execute(
+        "SELECT word_id, attempts, score_sum, best_score FROM user_word_stats WHERE user_id = ?",
+        (user_id,),
+    )
+    return {
+        word_id: {
+            "attempts": attempts,
+            "best_score": best_score,
+            "average_score": round(score_sum / attempts, 2),
+        }
+        for word_id, attempts, score_sum, best_score in cursor
+    }
+
+
+def fetch_recent_scores(conn: sqlite3.Connection, user_id: int, limit: int = 10) -> list[tuple]:
+    """Son denemeler (word_id, score, created_at), yeniden eskiye; kapsayan indeksten okunur"""
+    return conn.execute("""
+        SELECT word_id, score, created_at
+        FROM user_progress
+        WHERE user_id = ?
+        ORDER BY created_at DESC
+        LIMIT ?
+    """, (user_id, limit)).fetchall()
+
+
+def improvement_trend(recent_scores: list[float]) -> float:
+    """Son 5 denemenin ortalaması ile önceki 5'inki arasındaki fark"""
+    recent, older = recent_scores[:5], recent_scores[5:10]
+    if not recent or not older:
+        return 0
+    return round(sum(recent) / len(recent) - sum(older) / len(older), 2)
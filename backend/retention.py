@@ -0,0 +1,216 @@
+# retention.py - kayıtlar için arka plan saklama politikaları (süre, kota, en iyi N) ve sıkıştırma
+
+import asyncio
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from db import TIMESTAMP_FORMAT, ConnectionPool
+from metrics import LatencyMetrics
+from storage import StorageManager
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    max_age_days: int = 0  # 0: süre sınırı yok
+    user_quota_bytes: int = 0  # 0: kullanıcı kotası yok
+    keep_best_per_word: int = 0  # 0: tüm denemeler tutulur
+    codec: Optional[str] = "flac"  # WAV blob'ların dönüştürüleceği format; None: dönüştürme yok
+    min_age_minutes: int = 60  # daha yeni kayıtlara (henüz skorlanıyor olabilir) dokunulmaz
+
+
+def _cutoff(delta: timedelta) -> str:
+    return (datetime.utcnow() - delta).strftime(TIMESTAMP_FORMAT)
+
+
+def select_expired(conn: sqlite3.Connection, max_age_days: int, limit: int) -> list[int]:
+    """max_age_days'ten eski kayıtlar, en eskiden (created_at indeksi)"""
+    cursor = conn.execute(
+        "SELECT id FROM recordings WHERE created_at < ? ORDER BY created_at LIMIT ?",
+        (_cutoff(timedelta(days=max_age_days)), limit),
+    )
+    return [row[0] for row in cursor]
+
+
+def select_over_quota(conn: sqlite3.Connection, quota_bytes: int, limit: int) -> list[int]:
+    """Kotayı aşan kullanıcıların, yeniden eskiye toplam boyutu kotayı geçen (en eski) kayıtları"""
+    cursor = conn.execute("""
+        SELECT id FROM (
+            SELECT id, SUM(size) OVER (PARTITION BY user_id ORDER BY created_at DESC, id DESC) AS kept_bytes
+            FROM recordings
+            WHERE user_id IN (
+                SELECT user_id FROM recordings
+                WHERE user_id IS NOT NULL
+                GROUP BY user_id
+                HAVING SUM(size) > ?
+            )
+        )
+        WHERE kept_bytes > ?
+        LIMIT ?
+    """, (quota_bytes, quota_bytes, limit))
+    return [row[0] for row in cursor]
+
+
+def select_beyond_best(conn: sqlite3.Connection, keep: int, min_age_minutes: int, limit: int) -> list[int]:
+    """(kullanıcı, kelime) başına en yüksek skorlu keep denemenin dışında kalanlar.
+
+    Skorsuz denemeler skorlulardan sonra, kendi aralarında yeniden eskiye sıralanır.
+    """
+    cursor = conn.execute("""
+        SELECT id FROM (
+            SELECT id, created_at, ROW_NUMBER() OVER (
+                PARTITION BY user_id, word_id ORDER BY score IS NULL, score DESC, created_at DESC
+            ) AS rank
+            FROM recordings
+            WHERE (user_id, word_id) IN (
+                SELECT user_id, word_id FROM recordings
+                WHERE user_id IS NOT NULL
+                GROUP BY user_id, word_id
+                HAVING COUNT(*) > ?
+            )
+        )
+        WHERE rank > ? AND created_at < ?
+        LIMIT ?
+    """, (keep, keep, _cutoff(timedelta(minutes=min_age_minutes)), limit))
+    return [row[0] for row in cursor]
+
+
+def select_uncompacted(conn: sqlite3.Connection, min_age_minutes: int, limit: int) -> list[str]:
+    """Henüz sıkıştırılmamış blob'lar (kısmi idx_blobs_uncompacted indeksi)"""
+    cursor = conn.execute(
+        "SELECT sha256 FROM blobs WHERE compacted_at IS NULL AND created_at < ? ORDER BY created_at LIMIT ?",
+        (_cutoff(timedelta(minutes=min_age_minutes)), limit),
+    )
+    return [row[0] for row in cursor]
+
+
+class RetentionWorker:
+    """Politikaları küçük partiler halinde uygulayan periyodik görev.
+
+    Kendi tek bağlantılı havuzunu (tek thread) kullanır, istek yolundaki db.run havuzundan yer
+    almaz. Yazma kilidi yalnızca bir parti boyunca tutulur ve partiler arasında pause saniye beklenir.
+    """
+
+    def __init__(self, storage: StorageManager, db: ConnectionPool, policy: RetentionPolicy,
+                 interval: float = 3600.0, batch_size: int = 100, pause: float = 0.5,
+                 metrics: Optional[LatencyMetrics] = None):
+        self.storage = storage
+        self.db = db
+        self.policy = policy
+        self.interval = interval
+        self.batch_size = max(1, batch_size)
+        self.pause = pause
+        self.metrics = metrics
+
+        self.runs = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.last_run: Optional[dict] = None
+        self.recordings_expired = 0
+        self.blobs_transcoded = 0
+        self.compaction_failures = 0
+        self.bytes_reclaimed = 0
+
+    async def _expire(self, report: dict, key: str, select, *args):
+        while True:
+            ids = await self.db.run(select, *args, self.batch_size)
+            if not ids:
+                return
+            deleted, freed = await self.db.run(self.storage.expire_recordings, ids)
+            report[key] += deleted
+            report["bytes_reclaimed"] += freed
+            await asyncio.sleep(self.pause)
+            if len(ids) < self.batch_size:
+                return
+
+    async def _compact(self, report: dict):
+        # Başarısız blob'lar işaretlenmez; bu çalışmada tekrar seçilmemeleri için atlanır, sonrakinde denenir
+        failed = set()
+        while True:
+            limit = self.batch_size + len(failed)
+            digests = await self.db.run(select_uncompacted, self.policy.min_age_minutes, limit)
+            pending = [sha256 for sha256 in digests if sha256 not in failed]
+            for sha256 in pending:
+                try:
+                    freed = await self.db.run(self.storage.compact_blob, sha256, self.policy.codec)
+                except Exception as e:
+                    failed.add(sha256)
+                    report["compaction_failures"] += 1
+                    self.last_error = f"compaction of {sha256}: {e}"
+                    print(f"Compaction of blob {sha256} failed: {e}")
+                    continue
+                if freed:
+                    report["transcoded"] += 1
+                    report["bytes_reclaimed"] += freed
+            if len(digests) < limit or not pending:
+                return
+            await asyncio.sleep(self.pause)
+
+    async def run_once(self) -> dict:
+        """Tüm politikaları bir kez uygula; bu çalışmanın raporunu döndür"""
+        policy = self.policy
+        started = time.perf_counter()
+        report = {
+            "started_at": datetime.utcnow().strftime(TIMESTAMP_FORMAT),
+            "expired_age": 0,
+            "expired_quota": 0,
+            "expired_keep_best": 0,
+            "transcoded": 0,
+            "compaction_failures": 0,
+            "bytes_reclaimed": 0,
+        }
+        if policy.max_age_days > 0:
+            await self._expire(report, "expired_age", select_expired, policy.max_age_days)
+        if policy.user_quota_bytes > 0:
+            await self._expire(report, "expired_quota", select_over_quota, policy.user_quota_bytes)
+        if policy.keep_best_per_word > 0:
+            await self._expire(report, "expired_keep_best", select_beyond_best,
+                               policy.keep_best_per_word, policy.min_age_minutes)
+        if policy.codec:
+            await self._compact(report)
+
+        duration = time.perf_counter() - started
+        report["duration_s"] = round(duration, 3)
+        if self.metrics is not None:
+            self.metrics.record("retention_run", duration)
+
+        self.runs += 1
+        self.last_run = report
+        self.recordings_expired += report["expired_age"] + report["expired_quota"] + report["expired_keep_best"]
+        self.blobs_transcoded += report["transcoded"]
+        self.compaction_failures += report["compaction_failures"]
+        self.bytes_reclaimed += report["bytes_reclaimed"]
+        return report
+
+    async def run_forever(self):
+        """interval saniyede bir çalış; hata bir sonraki çalışmayı engellemez"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                print(f"Retention run failed: {e}")
+
+    def stats(self) -> dict:
+        """Toplam sayaçlar ve son çalışmanın raporu"""
+        return {
+            "interval_s": self.interval,
+            "policy": {
+                "max_age_days": self.policy.max_age_days,
+                "user_quota_bytes": self.policy.user_quota_bytes,
+                "keep_best_per_word": self.policy.keep_best_per_word,
+                "codec": self.policy.codec,
+            },
+            "runs": self.runs,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "recordings_expired": self.recordings_expired,
+            "blobs_transcoded": self.blobs_transcoded,
+            "compaction_failures": self.compaction_failures,
+            "bytes_reclaimed": self.bytes_reclaimed,
+            "last_run": self.last_run,
+        }
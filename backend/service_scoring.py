@@ -1,40 +1,135 @@
 # service_scoring.py - ASR, fonem, prosodi skor mantığı (MVP basit)
+#
+# Skorlar dizi tabanlı çekirdeklerle (batch_*) hesaplanır; tekil calculate_* fonksiyonları
+# bu çekirdekler üzerinde ince sarmalayıcılardır.
+
+import re
+from typing import Sequence
 
-from jiwer import wer
 from Levenshtein import distance
 import numpy as np
 
+# Final skor ağırlıkları: ASR, fonem benzerliği, prosodi
+SCORE_WEIGHTS = (0.4, 0.4, 0.2)
+
+# jiwer'ın varsayılan WER dönüşümleriyle aynı: çoklu boşlukları tek boşluğa indir, kırp, boşluktan böl
+_MULTIPLE_SPACES = re.compile(r"\s\s+")
+
+
+def _split_words(text: str) -> list[str]:
+    return [w for w in _MULTIPLE_SPACES.sub(" ", text).strip().split(" ") if w]
+
+
+class _WordEncoder:
+    """Kelimeleri tek karakterlik kimliklere çevirir; böylece kelime düzeyi edit mesafesi
+    C tabanlı Levenshtein.distance ile hesaplanır. Aynı metin bir kez tokenize edilir."""
+
+    def __init__(self):
+        self._vocab: dict[str, int] = {}
+        self._encoded: dict[str, str] = {}
+
+    def __call__(self, text: str) -> str:
+        encoded = self._encoded.get(text)
+        if encoded is None:
+            encoded = "".join(self._char(word) for word in _split_words(text))
+            self._encoded[text] = encoded
+        return encoded
+
+    def _char(self, word: str) -> str:
+        index = self._vocab.setdefault(word, len(self._vocab))
+        # UTF-16 vekil (surrogate) aralığını atla
+        return chr(index if index < 0xD800 else index + 0x800)
+
+
+def batch_asr_accuracy(target_texts: Sequence[str], asr_texts: Sequence[str]) -> np.ndarray:
+    """Öğe başına ASR doğruluğu (1 - WER) dizisi"""
+    encode = _WordEncoder()
+    n = len(target_texts)
+    ref_len = np.fromiter((len(encode(t)) for t in target_texts), dtype=np.float64, count=n)
+    hyp_len = np.fromiter((len(encode(h)) for h in asr_texts), dtype=np.float64, count=n)
+    edits = np.fromiter(
+        (distance(encode(t), encode(h)) for t, h in zip(target_texts, asr_texts)), dtype=np.float64, count=n
+    )
+    # Boş referans: hipotez de boşsa WER 0, değilse 1 (jiwer ile aynı)
+    word_error_rate = np.where(ref_len > 0, edits / np.maximum(ref_len, 1), (hyp_len > 0).astype(np.float64))
+    return np.maximum(0.0, 1.0 - word_error_rate)
+
+
+def batch_phoneme_similarity(targets: Sequence[str], hypotheses: Sequence[str]) -> np.ndarray:
+    """Öğe başına fonem benzerliği (1 - Levenshtein/len) dizisi"""
+    lowered: dict[str, str] = {}
+
+    def lower(text: str) -> str:
+        value = lowered.get(text)
+        if value is None:
+            value = lowered[text] = text.lower()
+        return value
+
+    n = len(targets)
+    target_len = np.fromiter((len(lower(t)) for t in targets), dtype=np.float64, count=n)
+    edits = np.fromiter(
+        (distance(lower(t), lower(h)) for t, h in zip(targets, hypotheses)), dtype=np.float64, count=n
+    )
+    return np.maximum(0.0, 1.0 - edits / np.maximum(1, target_len))
+
+
+def batch_prosody_score(target_ipas: Sequence[str], asr_texts: Sequence[str], base_score: float = 0.7) -> np.ndarray:
+    """MVP prosodi skoru dizisi: sabit taban, ASR doğruluğuna göre hafif ayar"""
+    asr_acc = batch_asr_accuracy(target_ipas, asr_texts)
+    return np.select(
+        [asr_acc > 0.8, asr_acc < 0.6],
+        [min(0.9, base_score + 0.1), max(0.5, base_score - 0.1)],
+        default=base_score,
+    )
+
+
+def batch_final_score(asr_accuracy, phoneme_similarity, prosody) -> np.ndarray:
+    """Final skor dizisi: 0.4*ASR + 0.4*PhonemeSim + 0.2*Prosody (2 basamak)"""
+    w_asr, w_phon, w_prosody = SCORE_WEIGHTS
+    return np.round(
+        w_asr * np.asarray(asr_accuracy, dtype=np.float64)
+        + w_phon * np.asarray(phoneme_similarity, dtype=np.float64)
+        + w_prosody * np.asarray(prosody, dtype=np.float64),
+        2,
+    )
+
+
 def calculate_asr_accuracy(target_text: str, asr_text: str) -> float:
     """ASR doğruluğunu hesapla (1 - WER)"""
     try:
-        word_error_rate = wer([target_text], [asr_text])
-        return max(0.0, 1.0 - word_error_rate)
-    except:
+        return float(batch_asr_accuracy([target_text], [asr_text])[0])
+    except Exception:
         return 0.0
 
 def calculate_phoneme_similarity(target: str, hypothesis: str) -> float:
     """Fonem benzerliğini Levenshtein uzaklığı ile hesapla"""
-    t, h = target.lower(), hypothesis.lower()
-    d = distance(t, h)
-    return max(0.0, 1.0 - d / max(1, len(t)))
+    return float(batch_phoneme_similarity([target], [hypothesis])[0])
 
 def calculate_prosody_score(target_ipa: str, asr_text: str) -> float:
     """MVP için basit prosodi skoru - V1'de gelişmiş olacak"""
-    # MVP: sabit skor, ancak ASR doğruluğuna göre hafif ayar
-    base_score = 0.7
-    asr_acc = calculate_asr_accuracy(target_ipa, asr_text)
-
-    # ASR iyi ise prosodi skorunu artır
-    if asr_acc > 0.8:
-        return min(0.9, base_score + 0.1)
-    elif asr_acc < 0.6:
-        return max(0.5, base_score - 0.1)
-    else:
-        return base_score
+    return float(batch_prosody_score([target_ipa], [asr_text])[0])
 
 def calculate_final_score(asr_accuracy: float, phoneme_similarity: float, prosody: float) -> float:
     """Final skoru hesapla: 0.4*ASR + 0.4*PhonemeSim + 0.2*Prosody"""
-    return round(0.4 * asr_accuracy + 0.4 * phoneme_similarity + 0.2 * prosody, 2)
+    return float(batch_final_score(asr_accuracy, phoneme_similarity, prosody))
+
+def calculate_batch_scores(targets: Sequence[str], hypotheses: Sequence[str], prosody=0.7) -> dict[str, np.ndarray]:
+    """Birden çok (hedef, ASR metni) çifti için skorları tek geçişte dizi olarak hesapla.
+
+    prosody tek bir değer (MVP: sabit) ya da öğe başına bir dizi olabilir.
+    """
+    if len(targets) != len(hypotheses):
+        raise ValueError("targets and hypotheses must have the same length")
+
+    asr_accuracy = batch_asr_accuracy(targets, hypotheses)
+    phoneme_similarity = batch_phoneme_similarity(targets, hypotheses)
+    prosody = np.broadcast_to(np.asarray(prosody, dtype=np.float64), asr_accuracy.shape).copy()
+    return {
+        "asr_accuracy": asr_accuracy,
+        "phoneme_similarity": phoneme_similarity,
+        "prosody": prosody,
+        "final": batch_final_score(asr_accuracy, phoneme_similarity, prosody),
+    }
 
 def generate_feedback(word: str, target_ipa: str, asr_accuracy: float, phoneme_similarity: float, prosody: float) -> list[str]:
     """Telaffuz geri bildirimi üret"""
@@ -0,0 +1,163 @@
+# srs.py - SM-2 tabanlı aralıklı tekrar zamanlayıcısı (kullanıcı, kelime) başına
+
+import heapq
+import random
+import sqlite3
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+
+from db import TIMESTAMP_FORMAT
+from lexicon import Lexicon
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+RELEARN_MINUTES = 10  # zayıf skor: kelime kısa süre sonra yeniden kuyruğa girer
+
+
+class ReviewState(NamedTuple):
+    ease: float = DEFAULT_EASE
+    interval_days: float = 0.0
+    repetitions: int = 0
+
+
+def score_to_quality(score: float) -> int:
+    """0..1 final skoru SM-2'nin 0..5 yanıt kalitesine çevir"""
+    return max(0, min(5, round(score * 5)))
+
+
+def sm2_update(state: ReviewState, score: float) -> tuple[ReviewState, timedelta]:
+    """Bir denemeden sonra yeni durum ve bir sonraki tekrara kadar geçecek süre"""
+    q = score_to_quality(score)
+    ease = max(MIN_EASE, state.ease + 0.1 - (5 - q) * (0.08 + (5 - q) * 0.02))
+    if q < 3:
+        return ReviewState(ease, 0.0, 0), timedelta(minutes=RELEARN_MINUTES)
+
+    repetitions = state.repetitions + 1
+    if repetitions == 1:
+        interval = 1.0
+    elif repetitions == 2:
+        interval = 6.0
+    else:
+        interval = round(max(state.interval_days, 1.0) * ease, 1)
+    return ReviewState(ease, interval, repetitions), timedelta(days=interval)
+
+
+def record_reviews(conn: sqlite3.Connection, reviews: list[tuple], reviewed_at: Optional[datetime] = None):
+    """(user_id, word_id, score) denemelerini zamanlayıcıya uygula. Commit çağırana aittir."""
+    if not reviews:
+        return
+    reviewed_at = reviewed_at or datetime.utcnow()
+    timestamp = reviewed_at.strftime(TIMESTAMP_FORMAT)
+
+    states: dict[tuple, tuple] = {}  # (user_id, word_id) -> (ReviewState, due_at, score)
+    for user_id, word_id, score in reviews:
+        key = (user_id, word_id)
+        if key in states:
+            state = states[key][0]
+        else:
+            row = conn.execute(
+                "SELECT ease, interval_days, repetitions FROM srs_state WHERE user_id = ? AND word_id = ?", key
+            ).fetchone()
+            state = ReviewState(*row) if row else ReviewState()
+        state, wait = sm2_update(state, score)
+        states[key] = (state, (reviewed_at + wait).strftime(TIMESTAMP_FORMAT), score)
+
+    conn.executemany("""
+        INSERT INTO srs_state (user_id, word_id, ease, interval_days, repetitions, due_at, last_score, last_review_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, word_id) DO UPDATE SET
+            ease = excluded.ease,
+            interval_days = excluded.interval_days,
+            repetitions = excluded.repetitions,
+            due_at = excluded.due_at,
+            last_score = excluded.last_score,
+            last_review_at = excluded.last_review_at
+    """, [
+        (user_id, word_id, *state, due_at, score, timestamp)
+        for (user_id, word_id), (state, due_at, score) in states.items()
+    ])
+
+
+def fetch_review_queue(conn: sqlite3.Connection, user_id: int, limit: int) -> list[tuple]:
+    """Kullanıcının en erken vadeli limit kelimesi (word_id, due_at, ease, last_score); (user_id, due_at) indeksinden"""
+    return conn.execute("""
+        SELECT word_id, due_at, ease, last_score
+        FROM srs_state
+        WHERE user_id = ?
+        ORDER BY due_at
+        LIMIT ?
+    """, (user_id, limit)).fetchall()
+
+
+def fetch_scheduled_words(conn: sqlite3.Connection, user_id: int, word_ids: list[str]) -> set[str]:
+    """word_ids içinden kullanıcının daha önce çalıştıkları (birincil anahtar aramaları)"""
+    if not word_ids:
+        return set()
+    placeholders = ", ".join("?" * len(word_ids))
+    cursor = conn.execute(
+        f"SELECT word_id FROM srs_state WHERE user_id = ? AND word_id IN ({placeholders})", (user_id, *word_ids)
+    )
+    return {row[0] for row in cursor}
+
+
+def review_priority(due_at: str, ease: float, last_score: float, now: datetime) -> float:
+    """Küçük değer önce: gecikmiş gün sayısı ve zayıflık (düşük ease / düşük son skor) önceliği artırır"""
+    overdue_days = (now - datetime.strptime(due_at, TIMESTAMP_FORMAT)).total_seconds() / 86400
+    weakness = (1.0 - last_score) + (DEFAULT_EASE - ease) / DEFAULT_EASE
+    return -(max(overdue_days, 0.0) + weakness)
+
+
+def select_daily_pack(
+    conn: sqlite3.Connection,
+    lexicon: Lexicon,
+    user_id: int,
+    level: str,
+    category: Optional[str],
+    phoneme: Optional[str],
+    available: tuple[int, ...],
+    limit: int,
+    scan_limit: int = 200,
+    now: Optional[datetime] = None,
+    rng: random.Random = random,
+) -> list[tuple]:
+    """(Word, kaynak) çiftleri: önce önceliğe göre vadesi gelenler ("due"), sonra hiç çalışılmamışlar
+    ("new"), yer kalırsa vadesi en yakın olanlar ("upcoming"). available: lexicon.indices(...) sonucu.
+
+    Kullanıcının en erken vadeli scan_limit kaydı taranır.
+    """
+    now = now or datetime.utcnow()
+    now_ts = now.strftime(TIMESTAMP_FORMAT)
+
+    due, upcoming = [], []
+    for word_id, due_at, ease, last_score in fetch_review_queue(conn, user_id, scan_limit):
+        i = lexicon.position(word_id)
+        if i is None or not lexicon.matches(i, level, category, phoneme):
+            continue
+        if due_at <= now_ts:
+            due.append((review_priority(due_at, ease, last_score, now), i))
+        else:
+            upcoming.append(i)
+
+    picked = [(i, "due") for _, i in heapq.nsmallest(limit, due)]
+    seen = {i for i, _ in picked}
+
+    # Yeni kelimeler: birkaç aday örnekle, daha önce zamanlanmış olanları at
+    for _ in range(3):
+        need = limit - len(picked)
+        if need <= 0:
+            break
+        candidates = [i for i in rng.sample(available, min(len(available), 2 * need + 8)) if i not in seen]
+        known = fetch_scheduled_words(conn, user_id, [lexicon.words[i].id for i in candidates])
+        for i in candidates:
+            if len(picked) < limit and lexicon.words[i].id not in known:
+                picked.append((i, "new"))
+                seen.add(i)
+
+    for i in upcoming:
+        if len(picked) >= limit:
+            break
+        if i not in seen:
+            picked.append((i, "upcoming"))
+            seen.add(i)
+
+    return [(lexicon.words[i], source) for i, source in picked]
@@ -1,15 +1,105 @@
 # storage.py - dosya kayıt/yol yönetimi
 
+from collections import Counter
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, NamedTuple, Optional
+import hashlib
 import os
+import re
 import shutil
-from datetime import datetime
+import sqlite3
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from starlette.concurrency import run_in_threadpool
+
+from blobstore import BlobStore, LocalBlobStore, blob_store_from_env
+from db import TIMESTAMP_FORMAT, ConnectionPool
+from migrations import STORAGE_TOTALS_RECOUNT, migrate
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # akışla yüklemede okuma/yazma parça boyutu
+# Sıkıştırmada yazılan formatlar: blobs.format -> (dosya uzantısı, MIME türü)
+BLOB_FORMATS = {
+    "flac": (".flac", "audio/flac"),
+    "opus": (".opus", "audio/ogg"),
+}
+TEMP_MAX_AGE = 60 * 60  # reconcile bundan eski .part dosyalarını yarım kalmış sayar (sn)
+
+_SHA256_NAME = re.compile(r"[0-9a-f]{64}")
+_LEGACY_TIMESTAMP = re.compile(r"\d{8}_\d{6}_")  # eski adlandırma: {word_id}_{YYYYmmdd_HHMMSS}_{ad}
+
+
+class UploadTooLarge(ValueError):
+    """Yükleme izin verilen boyutu aştı (akış ortasında kesildi)"""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(f"Upload exceeds the {max_bytes} byte limit")
+        self.max_bytes = max_bytes
+
+
+class SavedUpload(NamedTuple):
+    location: str  # dosya yolu ya da s3://bucket/anahtar
+    size: int
+    sha256: str
+    recording_id: int
+    deduplicated: bool  # aynı içerik zaten vardı; ek disk kullanılmadı
+
+
+def blob_key(sha256: str) -> str:
+    """İki seviyeli parçalı anahtar ab/cd/<sha256>: klasör (önek) başına en fazla 256 alt klasör"""
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def _transcode_wav(source: Path, tmp_dir: Path, codec: str) -> Optional[tuple[Path, str, int]]:
+    """PCM WAV dosyasını tmp_dir'e FLAC (kayıpsız) ya da Opus olarak yaz; (yol, sha256, boyut).
+
+    Kaynak WAV değilse ya da codec bu örnek formatını desteklemiyorsa None.
+    """
+    import soundfile as sf
+
+    with source.open("rb") as f:
+        header = f.read(12)
+    if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+    info = sf.info(str(source))
+    if codec == "flac":
+        if info.subtype not in ("PCM_S8", "PCM_16", "PCM_24"):
+            return None
+        format, subtype = "FLAC", info.subtype
+    elif codec == "opus":
+        if info.samplerate not in (8000, 12000, 16000, 24000, 48000):
+            return None
+        format, subtype = "OGG", "OPUS"
+    else:
+        raise ValueError(f"Unknown codec: {codec}")
+
+    data, samplerate = sf.read(str(source), dtype="int32" if codec == "flac" else "float32", always_2d=True)
+    temp_path = tmp_dir / f"{uuid.uuid4().hex}.part"
+    try:
+        sf.write(str(temp_path), data, samplerate, format=format, subtype=subtype)
+        digest = hashlib.sha256()
+        with temp_path.open("rb") as f:
+            while chunk := f.read(UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+            os.fsync(f.fileno())
+    except Exception:
+        temp_path.unlink(missing_ok=True)
+        raise
+    return temp_path, digest.hexdigest(), temp_path.stat().st_size
+
 
 class StorageManager:
-    """Dosya depolama yönetimi için yardımcı sınıf"""
+    """Dosya depolama yönetimi için yardımcı sınıf.
+
+    Kayıtlar içerik adresli saklanır: ab/cd/<sha256> anahtarıyla bir BlobStore'da (varsayılan
+    data/blobs/ altında yerel dosyalar). Aynı içerik bir kez yazılır; (kullanıcı, kelime, zaman)
+    -> blob eşlemesi SQLite'taki recordings tablosundadır, blobs.ref_count blob'a bağlı kayıt sayısıdır.
+    """
 
-    def __init__(self, base_data_dir: Optional[Path] = None):
+    def __init__(self, base_data_dir: Optional[Path] = None, db: Optional[ConnectionPool] = None,
+                 store: Optional[BlobStore] = None):
         if base_data_dir is None:
             # Backend klasöründen data klasörüne git
             backend_dir = Path(__file__).resolve().parent
@@ -18,31 +108,320 @@ class StorageManager:
         self.base_dir = base_data_dir
         self.uploads_dir = base_data_dir / "uploads"
         self.samples_dir = base_data_dir / "samples"
+        self.blobs_dir = base_data_dir / "blobs"
+        self.tmp_dir = self.blobs_dir / "tmp"  # yerel depoda rename'in atomik olması için aynı dosya sistemi
+        self.store = store or LocalBlobStore(self.blobs_dir)
 
         # Klasörleri oluştur
         self.uploads_dir.mkdir(parents=True, exist_ok=True)
         self.samples_dir.mkdir(parents=True, exist_ok=True)
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+
+        if db is None:
+            db = ConnectionPool(base_data_dir / "users.db", size=2)
+            with db.connection() as conn:
+                migrate(conn)
+        self.db = db
+
+    def blob_location(self, sha256: str) -> str:
+        return self.store.location(blob_key(sha256))
+
+    @staticmethod
+    def _add_totals(conn: sqlite3.Connection, recordings: int, recording_bytes: int, blobs: int, blob_bytes: int):
+        """storage_totals çalışan sayaçlarını değiştir (çağıranın işlemi içinde)"""
+        conn.execute("""
+            UPDATE storage_totals SET
+                recording_count = recording_count + ?,
+                recording_bytes = recording_bytes + ?,
+                blob_count = blob_count + ?,
+                blob_bytes = blob_bytes + ?
+            WHERE id = 1
+        """, (recordings, recording_bytes, blobs, blob_bytes))
+
+    def _reserve(self, conn: sqlite3.Connection, sha256: str, size: int, user_id: Optional[int], word_id: str,
+                 original_filename: str, created_at: Optional[str] = None) -> tuple[int, Optional[str]]:
+        """Blob referansını ve kaydı tek işlemde ekle; (kayıt id, takma ad hedefi) döndür.
+
+        ref_count > 0 olduğu sürece hiçbir silme blob'u kaldırmaz; bu yüzden içerik commit'ten
+        sonra, yazma kilidi dışında yüklenebilir (nesne deposunda ağ süresi kilidi tutmaz).
+        İçerik daha önce sıkıştırıldıysa (blob_aliases) kayıt sıkıştırılmış blob'a bağlanır ve
+        hedefin sha256'sı döner; çağıran bu durumda hiçbir şey yüklemez.
+        """
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            alias = conn.execute("""
+                SELECT a.target FROM blob_aliases a JOIN blobs b ON b.sha256 = a.target
+                WHERE a.sha256 = ?
+            """, (sha256,)).fetchone()
+            if alias is not None:
+                (target,) = alias
+                conn.execute("UPDATE blobs SET ref_count = ref_count + 1 WHERE sha256 = ?", (target,))
+                cursor = conn.execute("""
+                    INSERT INTO recordings (user_id, word_id, sha256, original_filename, size, created_at)
+                    VALUES (?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+                """, (user_id, word_id, target, original_filename, size, created_at))
+                self._add_totals(conn, 1, size, 0, 0)
+                conn.commit()
+                return cursor.lastrowid, target
+
+            (ref_count,) = conn.execute("""
+                INSERT INTO blobs (sha256, size, ref_count) VALUES (?, ?, 1)
+                ON CONFLICT (sha256) DO UPDATE SET ref_count = ref_count + 1
+                RETURNING ref_count
+            """, (sha256, size)).fetchone()
+            cursor = conn.execute("""
+                INSERT INTO recordings (user_id, word_id, sha256, original_filename, size, created_at)
+                VALUES (?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+            """, (user_id, word_id, sha256, original_filename, size, created_at))
+            new_blob = ref_count == 1
+            self._add_totals(conn, 1, size, int(new_blob), size if new_blob else 0)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return cursor.lastrowid, None
+
+    def _ingest(self, temp_path: Path, sha256: str, size: int, user_id: Optional[int], word_id: str,
+                original_filename: str, created_at: Optional[str] = None) -> tuple[int, bool, str]:
+        """fsync edilmiş geçici dosyayı blob olarak yerleştir ve kaydı ekle; (kayıt id, tekilleşti mi, blob sha256).
+
+        Önce referans alınır, sonra içerik yoksa depoya yazılır. Yazma başarısız olursa kayıt geri alınır.
+        """
+        try:
+            with self.db.connection() as conn:
+                recording_id, target = self._reserve(
+                    conn, sha256, size, user_id, word_id, original_filename, created_at
+                )
+        except Exception:
+            temp_path.unlink(missing_ok=True)
+            raise
+        if target is not None:
+            # Aynı içerik daha önce yüklenip sıkıştırılmış: sıkıştırılmış blob paylaşılır
+            temp_path.unlink()
+            return recording_id, True, target
+
+        key = blob_key(sha256)
+        try:
+            # Eşzamanlı iki yükleme aynı içeriği yazabilir: anahtar içerik adresli olduğu için zararsız
+            deduplicated = self.store.exists(key)
+            if deduplicated:
+                temp_path.unlink()
+            else:
+                self.store.put(key, temp_path)
+        except Exception:
+            temp_path.unlink(missing_ok=True)
+            with self.db.connection() as conn:
+                self.delete_recording(conn, recording_id)
+            raise
+        return recording_id, deduplicated, sha256
+
+    def _release(self, conn: sqlite3.Connection, released: list[tuple[str, int]]) -> tuple[list[str], int]:
+        """Silinmiş kayıtların (sha256, size) blob referanslarını düş, sahipsiz kalan blob satırlarını sil.
+
+        Commit çağırana aittir; (sahipsiz kalan sha256'lar, boşalan bayt) döndürür. İçerikleri çağıran
+        commit'ten sonra _delete_blobs ile siler: depo çağrıları yazma kilidi altında yapılmaz ve geri
+        alınan bir işlem hâlâ kullanılan bir nesneyi silmiş olmaz.
+        """
+        if not released:
+            return [], 0
+        refs = Counter(sha256 for sha256, _ in released)
+        conn.executemany(
+            "UPDATE blobs SET ref_count = ref_count - ? WHERE sha256 = ?", [(n, sha256) for sha256, n in refs.items()]
+        )
+        orphans = []
+        for sha256 in refs:
+            row = conn.execute("DELETE FROM blobs WHERE sha256 = ? AND ref_count <= 0 RETURNING size", (sha256,)).fetchone()
+            if row:
+                orphans.append((sha256, row[0]))
+                conn.execute("DELETE FROM blob_aliases WHERE target = ?", (sha256,))
+        freed = sum(size for _, size in orphans)
+        self._add_totals(conn, -len(released), -sum(size for _, size in released), -len(orphans), -freed)
+        return [sha256 for sha256, _ in orphans], freed
+
+    def _delete_blobs(self, conn: sqlite3.Connection, digests: Iterable[str]):
+        """Commit edilmiş silmelerden sonra içerikleri depodan kaldır.
 
-    def get_upload_path(self, word_id: str, filename: str) -> Path:
-        """Kullanıcı yükleme dosyası için yol oluştur"""
-        # Güvenli dosya adı oluştur
-        safe_filename = self._sanitize_filename(filename)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        new_filename = f"{word_id}_{timestamp}_{safe_filename}"
-        return self.uploads_dir / new_filename
+        Bu arada aynı içerik yeniden yüklendiyse (satır geri geldiyse) nesneye dokunulmaz. Başarısız
+        silmeler yalnızca sahipsiz nesne bırakır; onları reconcile toplar.
+        """
+        for sha256 in digests:
+            if conn.execute("SELECT 1 FROM blobs WHERE sha256 = ?", (sha256,)).fetchone() is not None:
+                continue
+            try:
+                self.store.delete(blob_key(sha256))
+            except Exception as e:
+                print(f"Deleting blob {sha256} failed (reconcile will remove it): {e}")
+
+    def delete_recording(self, conn: sqlite3.Connection, recording_id: int) -> bool:
+        """Kaydı sil; blob'a başka kayıt bağlı değilse dosyayı da kaldır"""
+        try:
+            released = conn.execute("DELETE FROM recordings WHERE id = ? RETURNING sha256, size", (recording_id,)).fetchall()
+            orphans, _ = self._release(conn, released)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        self._delete_blobs(conn, orphans)
+        return bool(released)
+
+    def expire_recordings(self, conn: sqlite3.Connection, recording_ids: list[int]) -> tuple[int, int]:
+        """Kayıtları tek işlemde sil; (silinen kayıt, boşalan bayt) döndür"""
+        if not recording_ids:
+            return 0, 0
+        placeholders = ", ".join("?" * len(recording_ids))
+        try:
+            released = conn.execute(
+                f"DELETE FROM recordings WHERE id IN ({placeholders}) RETURNING sha256, size", recording_ids
+            ).fetchall()
+            orphans, freed = self._release(conn, released)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        self._delete_blobs(conn, orphans)
+        return len(released), freed
+
+    def get_recording(self, conn: sqlite3.Connection, recording_id: int) -> Optional[dict]:
+        """Kayıt satırı ve blob'unun saklanan formatı (format: None ise yüklendiği gibi)"""
+        row = conn.execute("""
+            SELECT r.id, r.user_id, r.word_id, r.sha256, r.original_filename, r.size, r.score, r.created_at, b.format
+            FROM recordings r LEFT JOIN blobs b ON b.sha256 = r.sha256
+            WHERE r.id = ?
+        """, (recording_id,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(
+            ("id", "user_id", "word_id", "sha256", "original_filename", "size", "score", "created_at", "format"), row
+        ))
+
+    def set_recording_score(self, conn: sqlite3.Connection, recording_id: int, user_id: int, score: float) -> bool:
+        """Kullanıcının kendi kaydına skorunu yaz (en iyi N deneme politikası bunu kullanır)"""
+        cursor = conn.execute(
+            "UPDATE recordings SET score = ? WHERE id = ? AND user_id = ?", (score, recording_id, user_id)
+        )
+        conn.commit()
+        return cursor.rowcount > 0
+
+    def compact_blob(self, conn: sqlite3.Connection, sha256: str, codec: str = "flac") -> int:
+        """WAV blob'unu codec'e (flac/opus) dönüştür; boşalan baytı döndür.
+
+        Kodlama ve yeni içeriğin yüklenmesi yazma kilidi dışında yapılır. Yeni içerik kendi sha256'sı
+        ile yerleşir, bağlı kayıtlar yeni blob'a taşınır ve eski blob silinir (yeni içerik zaten
+        varsa birleştirilir). Dönüştürülemeyen (WAV değil, desteklenmeyen örnek formatı) ya da
+        küçülmeyen blob'lar yalnızca işaretlenir. Okuma, kodlama ya da depo hataları yükselir ve blob
+        işaretlenmez: bir sonraki çalışmada yeniden denenir.
+        """
+        key = blob_key(sha256)
+        placed = None  # (yeni sha256, boyut) depoya yazıldıysa
+        with self.store.local_copy(key, self.tmp_dir) as source:
+            source_size = source.stat().st_size
+            encoded = _transcode_wav(source, self.tmp_dir, codec)
+        if encoded is not None:
+            temp_path, new_sha256, new_size = encoded
+            try:
+                if new_size < source_size:
+                    if not self.store.exists(blob_key(new_sha256)):
+                        self.store.put(blob_key(new_sha256), temp_path)
+                    placed = (new_sha256, new_size)
+            finally:
+                temp_path.unlink(missing_ok=True)
+
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            old = conn.execute("SELECT ref_count, size FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+            if old is None or placed is None:
+                # Blob bu arada silindi, dönüştürülemiyor ya da kazanç yok: tekrar denenmesin
+                if old is not None:
+                    conn.execute("UPDATE blobs SET compacted_at = CURRENT_TIMESTAMP WHERE sha256 = ?", (sha256,))
+                conn.commit()
+                if placed is not None:
+                    # Yazılan yeni içerik kimseye bağlanmadı (başka bir kayda aitse dokunulmaz)
+                    self._delete_blobs(conn, [placed[0]])
+                return 0
+
+            new_sha256, new_size = placed
+            ref_count, old_size = old
+            (merged_refs,) = conn.execute("""
+                INSERT INTO blobs (sha256, size, ref_count, compacted_at, format)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?)
+                ON CONFLICT (sha256) DO UPDATE SET ref_count = ref_count + excluded.ref_count, format = excluded.format
+                RETURNING ref_count
+            """, (new_sha256, new_size, ref_count, codec)).fetchone()
+            merged = merged_refs != ref_count
+            conn.execute("UPDATE recordings SET sha256 = ? WHERE sha256 = ?", (new_sha256, sha256))
+            # Orijinal içeriğin yeniden yüklenmesi yeni blob'a bağlansın (bu blob'a işaret eden eski adlar da)
+            conn.execute("UPDATE blob_aliases SET target = ? WHERE target = ?", (new_sha256, sha256))
+            conn.execute("INSERT OR REPLACE INTO blob_aliases (sha256, target) VALUES (?, ?)", (sha256, new_sha256))
+            conn.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+            freed = old_size if merged else old_size - new_size
+            self._add_totals(conn, 0, 0, -1 if merged else 0, -freed)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        self._delete_blobs(conn, [sha256])
+        return freed
 
     def get_sample_path(self, word_id: str, filename: str) -> Path:
         """Örnek ses dosyası için yol oluştur"""
         return self.samples_dir / f"{word_id}_{filename}"
 
-    def save_uploaded_file(self, file_content: bytes, word_id: str, original_filename: str) -> Path:
-        """Yüklenen dosyayı kaydet ve yolunu döndür"""
-        dest_path = self.get_upload_path(word_id, original_filename)
-
-        with dest_path.open("wb") as f:
+    def save_uploaded_file(self, file_content: bytes, word_id: str, original_filename: str,
+                           user_id: Optional[int] = None) -> str:
+        """Yüklenen dosyayı kaydet ve blob konumunu döndür"""
+        sha256 = hashlib.sha256(file_content).hexdigest()
+        temp_path = self.tmp_dir / f"{uuid.uuid4().hex}.part"
+        with temp_path.open("wb") as f:
             f.write(file_content)
+            f.flush()
+            os.fsync(f.fileno())
+
+        _, _, stored = self._ingest(
+            temp_path, sha256, len(file_content), user_id, word_id, self._sanitize_filename(original_filename)
+        )
+        return self.blob_location(stored)
+
+    async def save_upload_stream(self, upload, word_id: str, original_filename: str, max_bytes: int,
+                                 user_id: Optional[int] = None) -> SavedUpload:
+        """UploadFile'ı parça parça oku, yaz ve hash'le; boyut sınırı aşılırsa UploadTooLarge.
+
+        Veri önce yerel geçici bir dosyaya yazılır, fsync sonrası depoya aktarılır (yerelde atomik
+        rename, S3'te multipart yükleme; içerik zaten varsa geçici dosya silinir): yarım kalan yükleme
+        hiçbir zaman blob olarak görünmez. Disk ve ağ işleri thread havuzunda çalışır; bellek
+        kullanımı dosya boyutundan bağımsızdır.
+        """
+        temp_path = self.tmp_dir / f"{uuid.uuid4().hex}.part"
+        digest = hashlib.sha256()
+        size = 0
+
+        def write_chunk(f, chunk: bytes):
+            f.write(chunk)
+            digest.update(chunk)
 
-        return dest_path
+        def finish(f):
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+
+        f = await run_in_threadpool(temp_path.open, "wb")
+        try:
+            while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                await run_in_threadpool(write_chunk, f, chunk)
+            await run_in_threadpool(finish, f)
+        except BaseException:
+            # İptal (istemci bağlantıyı kesti) dahil: geçici dosyayı bırakma
+            f.close()
+            temp_path.unlink(missing_ok=True)
+            raise
+
+        sha256 = digest.hexdigest()
+        recording_id, deduplicated, stored = await run_in_threadpool(
+            self._ingest, temp_path, sha256, size, user_id, word_id, self._sanitize_filename(original_filename)
+        )
+        return SavedUpload(self.blob_location(stored), size, sha256, recording_id, deduplicated)
 
     def copy_file(self, source_path: Path, dest_path: Path) -> bool:
         """Dosya kopyala"""
@@ -62,31 +441,41 @@ class StorageManager:
             return file_path.stat().st_size
         return None
 
-    def list_uploaded_files(self, word_id: Optional[str] = None) -> list[Path]:
-        """Yüklenen dosyaları listele"""
-        if word_id:
-            pattern = f"{word_id}_*"
-            return list(self.uploads_dir.glob(pattern))
-        else:
-            return list(self.uploads_dir.glob("*"))
+    def list_uploaded_files(self, word_id: Optional[str] = None) -> list[str]:
+        """Yüklenen dosyaları (blob konumları) listele; word_id ile (word_id, created_at) indeksinden"""
+        with self.db.connection() as conn:
+            if word_id:
+                rows = conn.execute("SELECT sha256 FROM recordings WHERE word_id = ? ORDER BY created_at", (word_id,))
+            else:
+                rows = conn.execute("SELECT sha256 FROM blobs")
+            # Aynı içerikli kayıtlar tek dosyayı paylaşır
+            return [self.blob_location(sha256) for sha256 in dict.fromkeys(row[0] for row in rows)]
 
-    def cleanup_old_files(self, days_old: int = 30) -> int:
-        """Belirtilen gün sayısından eski dosyaları temizle"""
-        import time
-
-        now = time.time()
-        cutoff = now - (days_old * 24 * 60 * 60)
+    def cleanup_old_files(self, days_old: int = 30, batch_size: int = 500) -> int:
+        """Belirtilen gün sayısından eski kayıtları sil; silinen kayıt sayısını döndür.
 
+        Adaylar created_at indeksinden okunur; yazma kilidini uzun tutmamak için her parti ayrı işlemdir.
+        """
+        cutoff = (datetime.utcnow() - timedelta(days=days_old)).strftime(TIMESTAMP_FORMAT)
         deleted_count = 0
-        for file_path in self.uploads_dir.glob("*"):
-            if file_path.stat().st_mtime < cutoff:
+        with self.db.connection() as conn:
+            while True:
                 try:
-                    file_path.unlink()
-                    deleted_count += 1
+                    released = conn.execute("""
+                        DELETE FROM recordings WHERE id IN (
+                            SELECT id FROM recordings WHERE created_at < ? ORDER BY created_at LIMIT ?
+                        )
+                        RETURNING sha256, size
+                    """, (cutoff, batch_size)).fetchall()
+                    orphans, _ = self._release(conn, released)
+                    conn.commit()
                 except Exception:
-                    pass  # Silme hatası olursa devam et
-
-        return deleted_count
+                    conn.rollback()
+                    raise
+                self._delete_blobs(conn, orphans)
+                deleted_count += len(released)
+                if len(released) < batch_size:
+                    return deleted_count
 
     @staticmethod
     def _sanitize_filename(filename: str) -> str:
@@ -96,18 +485,144 @@ class StorageManager:
         return re.sub(r'[^\w\.-]', '_', filename)
 
     def get_storage_info(self) -> dict:
-        """Depolama bilgilerini döndür"""
-        upload_files = list(self.uploads_dir.glob("*"))
-        sample_files = list(self.samples_dir.glob("*"))
+        """Depolama bilgilerini döndür (yüklemeler storage_totals sayaçlarından, klasör taranmaz)"""
+        with self.db.connection() as conn:
+            recording_count, recording_bytes, blob_count, blob_bytes = conn.execute(
+                "SELECT recording_count, recording_bytes, blob_count, blob_bytes FROM storage_totals WHERE id = 1"
+            ).fetchone()
+
+        # Örnek sesler az ve sabit: tek geçişte say
+        sample_count = sample_size = 0
+        with os.scandir(self.samples_dir) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    sample_count += 1
+                    sample_size += entry.stat().st_size
 
         return {
-            "uploads_dir": str(self.uploads_dir),
+            "uploads_dir": self.store.location(),
             "samples_dir": str(self.samples_dir),
-            "upload_count": len(upload_files),
-            "sample_count": len(sample_files),
-            "total_upload_size": sum(f.stat().st_size for f in upload_files if f.is_file()),
-            "total_sample_size": sum(f.stat().st_size for f in sample_files if f.is_file())
+            "upload_count": recording_count,
+            "sample_count": sample_count,
+            "total_upload_size": recording_bytes,
+            "total_sample_size": sample_size,
+            "blob_count": blob_count,
+            "stored_upload_size": blob_bytes,  # tekilleştirme sonrası diskteki boyut
         }
 
-# Global instance
-storage_manager = StorageManager()
\ No newline at end of file
+    def reconcile(self) -> dict:
+        """recordings/blobs/storage_totals'ı depodaki blob'lardan yeniden kur (bakım komutu).
+
+        İçeriği olmayan kayıtlar silinir, kaydı olmayan blob'lar kaldırılır, ref_count ve boyutlar
+        düzeltilir. Tarama yazma kilidi altında yapılır. Yükleme referanstan sonra, sıkıştırma ise
+        kayıttan önce yazdığı için TEMP_MAX_AGE'den yeni kayıt ve blob'lar sürüyor sayılıp atlanır.
+        """
+        report = dict.fromkeys((
+            "blobs_on_disk", "missing_blobs", "dropped_recordings", "orphan_blobs",
+            "blobs_fixed", "unknown_files", "temp_files_removed",
+        ), 0)
+        cutoff = time.time() - TEMP_MAX_AGE
+        with self.db.connection() as conn:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                stored: dict[str, int] = {}
+                recent = set()
+                for key, size, modified in self.store.iter_keys():
+                    sha256 = key.rsplit("/", 1)[-1]
+                    if _SHA256_NAME.fullmatch(sha256) and key == blob_key(sha256):
+                        stored[sha256] = size
+                        if modified >= cutoff:
+                            recent.add(sha256)
+                    else:
+                        report["unknown_files"] += 1
+                report["blobs_on_disk"] = len(stored)
+
+                cutoff_at = datetime.utcfromtimestamp(cutoff).strftime(TIMESTAMP_FORMAT)
+                referenced, in_flight = {}, set()
+                for sha256, count, newest in conn.execute(
+                    "SELECT sha256, COUNT(*), MAX(created_at) FROM recordings GROUP BY sha256"
+                ):
+                    referenced[sha256] = count
+                    if sha256 not in stored and newest >= cutoff_at:
+                        in_flight.add(sha256)
+                for sha256 in referenced.keys() - stored.keys() - in_flight:
+                    report["missing_blobs"] += 1
+                    report["dropped_recordings"] += conn.execute(
+                        "DELETE FROM recordings WHERE sha256 = ?", (sha256,)
+                    ).rowcount
+                orphans = stored.keys() - referenced.keys() - recent
+                report["orphan_blobs"] = len(orphans)
+
+                live = referenced.keys() & stored.keys()
+                rows = {sha256: (size, ref_count) for sha256, size, ref_count in
+                        conn.execute("SELECT sha256, size, ref_count FROM blobs")}
+                for sha256 in rows.keys() - live - in_flight:
+                    conn.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+                for sha256 in live:
+                    expected = (stored[sha256], referenced[sha256])
+                    if rows.get(sha256) != expected:
+                        report["blobs_fixed"] += 1
+                        conn.execute("""
+                            INSERT INTO blobs (sha256, size, ref_count) VALUES (?, ?, ?)
+                            ON CONFLICT (sha256) DO UPDATE SET size = excluded.size, ref_count = excluded.ref_count
+                        """, (sha256, *expected))
+
+                conn.execute("DELETE FROM blob_aliases WHERE target NOT IN (SELECT sha256 FROM blobs)")
+                conn.execute(STORAGE_TOTALS_RECOUNT)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            self._delete_blobs(conn, orphans)
+
+        # Akıştaki yüklemeler de tmp'ye yazar: yalnızca terk edilmiş (eski) dosyaları sil
+        for path in self.tmp_dir.glob("*.part"):
+            if path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+                report["temp_files_removed"] += 1
+        return report
+
+    def import_legacy_uploads(self, word_ids: Iterable[str]) -> dict:
+        """Eski düz uploads/ dosyalarını blob deposuna taşı.
+
+        word_id dosya adının bilinen en uzun kelime kimliği önekinden çıkarılır
+        ({word_id}_{zaman}_{ad} ve {word_id}_{ad}); eşleşmeyen dosyalar yerinde bırakılır.
+        """
+        known = sorted(set(word_ids), key=len, reverse=True)
+        imported = skipped = 0
+        for path in sorted(self.uploads_dir.iterdir()):
+            word_id = next((w for w in known if path.name.startswith(f"{w}_")), None)
+            if not path.is_file() or word_id is None:
+                skipped += 1
+                continue
+
+            original_filename = _LEGACY_TIMESTAMP.sub("", path.name[len(word_id) + 1:], count=1)
+            created_at = datetime.utcfromtimestamp(path.stat().st_mtime).strftime(TIMESTAMP_FORMAT)
+            temp_path = self.tmp_dir / f"{uuid.uuid4().hex}.part"
+            digest = hashlib.sha256()
+            with path.open("rb") as src, temp_path.open("wb") as dst:
+                while chunk := src.read(UPLOAD_CHUNK_SIZE):
+                    digest.update(chunk)
+                    dst.write(chunk)
+                dst.flush()
+                os.fsync(dst.fileno())
+
+            self._ingest(temp_path, digest.hexdigest(), path.stat().st_size, None, word_id,
+                         original_filename, created_at)
+            path.unlink()
+            imported += 1
+        return {"imported": imported, "skipped": skipped}
+
+
+if __name__ == "__main__":
+    # Kullanım: python storage.py [--import-legacy] [data_klasörü]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    data_dir = Path(args[0]) if args else Path(__file__).resolve().parents[1] / "data"
+    manager = StorageManager(data_dir, store=blob_store_from_env(data_dir / "blobs"))
+    if "--import-legacy" in sys.argv:
+        from lexicon import Lexicon
+
+        lexicon_path = os.getenv("LEXICON_PATH", str(manager.base_dir / "lexicon.json"))
+        print(manager.import_legacy_uploads(word.id for word in Lexicon.load(Path(lexicon_path)).words))
+    print(manager.reconcile())
+    print(manager.get_storage_info())
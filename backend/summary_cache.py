@@ -0,0 +1,95 @@
+# summary_cache.py - kullanıcı bazında serileştirilmiş yanıt önbelleği (ETag destekli)
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes  # hazır JSON gövdesi; isabette yeniden serileştirilmez
+    etag: str
+    expires_at: Optional[float] = None  # epoch sn; None = yalnızca açık geçersizleştirme
+    version: tuple = ()  # hesaplandığı andaki veri sürümü (ör. user_stats'tan)
+
+
+class SummaryCache:
+    """user_id -> CachedResponse LRU önbelleği.
+
+    Yazma yolları invalidate(user_id) çağırır. Her geçersizleştirme kullanıcının
+    nesil sayacını artırır; hesaplama sürerken geçersizleşen bir sonuç put() ile saklanmaz.
+    Önbellek süreç başınadır: başka bir worker'daki yazmalar invalidate'e ulaşmaz, bu yüzden
+    get() çağıranın ucuz bir sorguyla okuduğu sürümü alır ve sürümü farklı girişi düşürür.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[int, CachedResponse] = OrderedDict()
+        self._generations: dict[int, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    def get(self, user_id: int, version: tuple = ()) -> Optional[CachedResponse]:
+        entry = self._entries.get(user_id)
+        if entry is not None and (
+            entry.version != version or (entry.expires_at is not None and entry.expires_at <= time.time())
+        ):
+            del self._entries[user_id]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry
+
+    def generation(self, user_id: int) -> int:
+        """Hesaplamadan önce alınır ve put()'a verilir"""
+        return self._generations.get(user_id, 0)
+
+    def put(self, user_id: int, payload, generation: int, expires_at: Optional[float] = None,
+            version: tuple = ()) -> CachedResponse:
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
+        entry = CachedResponse(body, f'"{hashlib.sha1(body).hexdigest()}"', expires_at, version)
+        if generation == self.generation(user_id):
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, *user_ids: int):
+        for user_id in user_ids:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self._entries.pop(user_id, None)
+            self.invalidations += 1
+
+    def record_not_modified(self):
+        """If-None-Match eşleşti, 304 döndü"""
+        self.not_modified += 1
+
+    @staticmethod
+    def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+        """If-None-Match başlığını (liste, W/ öneki, *) ETag ile karşılaştır"""
+        if not if_none_match:
+            return False
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+    def stats(self) -> dict:
+        """Önbellek sayaçları"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
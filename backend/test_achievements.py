@@ -0,0 +1,112 @@
+# test_achievements.py - başarım kuralları: pratik olayında değerlendirme ve tek seferlik açılma
+#
+# Çalıştırma (backend klasöründen): python -m pytest -q test_achievements.py
+
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta
+
+import pytest
+
+import achievements
+from achievements import evaluate_practice_event, fetch_achievements, register_rule
+from migrations import migrate
+from progress import record_practice
+
+START = datetime(2024, 1, 1, 12)
+
+
+@pytest.fixture
+def conn(tmp_path):
+    with closing(sqlite3.connect(tmp_path / "users.db")) as conn:
+        migrate(conn)
+        conn.execute("INSERT INTO users (id, username, email, hashed_password) VALUES (1, 'mari', 'm@example.com', 'x')")
+        conn.commit()
+        yield conn
+
+
+@pytest.fixture
+def rules(monkeypatch):
+    """Testte eklenen kurallar genel kayıt defterine sızmasın"""
+    monkeypatch.setattr(achievements, "RULES", dict(achievements.RULES))
+    return achievements.RULES
+
+
+def practice(conn, *scores, start: datetime = START) -> list[list[str]]:
+    """Her skor ayrı bir kayıt; her kayıtta açılan başarım türleri"""
+    unlocked = []
+    for i, score in enumerate(scores):
+        result = record_practice(conn, [(1, "w1", score, "")], start + timedelta(minutes=i))
+        unlocked.append([a["type"] for a in result.get(1, [])])
+    return unlocked
+
+
+def test_first_practice_and_perfect_score(conn):
+    assert practice(conn, 0.4, 1.0, 1.0) == [["first_practice"], ["perfect_score"], []]
+    assert {a["type"] for a in fetch_achievements(conn, 1)} == {"first_practice", "perfect_score"}
+
+
+def test_count_milestones_unlock_once(conn):
+    unlocked = practice(conn, *[0.5] * 11)
+    assert unlocked[0] == ["first_practice"]
+    assert unlocked[9] == ["consistent_learner"]
+    assert [types for i, types in enumerate(unlocked) if i not in (0, 9)] == [[]] * 9
+
+
+def test_improvement_compares_last_five_with_previous_five(conn):
+    unlocked = practice(conn, *[0.3] * 5, 0.4, 0.4, 0.4, 0.5, 0.5)
+    # 10. denemede son 5 ortalaması 0.44, önceki 5'inki 0.3 -> fark 0.14 > 0.1
+    assert "improvement" in unlocked[-1]
+    assert not any("improvement" in types for types in unlocked[:-1])
+
+
+def test_unlocked_at_is_the_practice_time(conn):
+    practice(conn, 0.5)
+    [achievement] = fetch_achievements(conn, 1)
+    assert achievement["unlocked_at"] == "2024-01-01 12:00:00"
+
+
+def test_only_rules_whose_inputs_changed_are_evaluated(conn, rules):
+    seen = []
+    register_rule("spy", "Casus", "", {"best_score"}, lambda p: seen.append(p["best_score"]) or False)
+
+    assert evaluate_practice_event(conn, 1, {"total_practice"}, {"total_practice": 1, "best_score": 0.5}) == [
+        {"name": "İlk Adım", "description": "İlk kelime pratiğin!", "type": "first_practice"}
+    ]
+    assert seen == []
+
+    evaluate_practice_event(conn, 1, {"best_score"}, {"total_practice": 1, "best_score": 0.5})
+    assert seen == [0.5]
+
+
+def test_lazy_inputs_are_computed_only_when_needed(conn):
+    calls = []
+
+    def trend():
+        calls.append(1)
+        return 0.0
+
+    values = {"total_practice": 1, "best_score": 0.5}
+    evaluate_practice_event(conn, 1, {"total_practice"}, values, lazy_values={"improvement_trend": trend})
+    assert calls == []
+
+    evaluate_practice_event(conn, 1, {"improvement_trend"}, values, lazy_values={"improvement_trend": trend})
+    assert calls == [1]
+
+    # Açılmış kuralın girdisi artık hesaplanmaz
+    conn.execute(
+        "INSERT INTO achievements (user_id, achievement_type, achievement_name, description) "
+        "VALUES (1, 'improvement', 'Gelişen', '')"
+    )
+    evaluate_practice_event(conn, 1, {"improvement_trend"}, values, lazy_values={"improvement_trend": trend})
+    assert calls == [1]
+
+
+def test_registered_rule_is_awarded_by_record_practice(conn, rules):
+    register_rule("streak_2", "İki Gün", "İki gün üst üste!", {"current_streak"}, lambda p: p["current_streak"] >= 2)
+
+    first_day = practice(conn, 0.5)
+    second_day = practice(conn, 0.5, start=START + timedelta(days=1))
+
+    assert "streak_2" not in first_day[0]
+    assert "streak_2" in second_day[0]
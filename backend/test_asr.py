@@ -0,0 +1,169 @@
+# test_asr.py - BatchTranscriber mikro-batch, kuyruk sınırı ve zaman aşımı davranışı (sahte decode ile)
+#
+# Whisper/torch gerekmez: decode_batch sahte bir modelle değiştirilir.
+# Çalıştırma (backend klasöründen): python -m pytest -q test_asr.py
+
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from asr import BatchTranscriber, InferenceExecutor, InferenceTimeoutError, QueueFullError
+
+
+class StubTranscriber(BatchTranscriber):
+    """decode_batch her batch'i kaydeder; gate verilirse açılana kadar bloklar"""
+
+    def __init__(self, executor: InferenceExecutor, gate: threading.Event = None, **kwargs):
+        super().__init__(None, "base", executor, **kwargs)
+        self.batches = []
+        self.gate = gate
+
+    def decode_batch(self, audios, targets=None):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.batches.append(len(audios))
+        targets = targets or [None] * len(audios)
+        return [{"text": f"len={audio.size}", "target": target} for audio, target in zip(audios, targets)]
+
+
+def clip(n: int) -> np.ndarray:
+    return np.zeros(n, dtype=np.float32)
+
+
+@pytest.fixture
+def executor():
+    executor = InferenceExecutor(max_workers=1, job_timeout=5.0)
+    yield executor
+    executor.shutdown()
+
+
+def test_concurrent_requests_share_one_decode(executor):
+    transcriber = StubTranscriber(executor, max_batch_size=8, max_wait_ms=50)
+
+    async def main():
+        try:
+            return await asyncio.gather(*[transcriber.transcribe(clip(n), f"t{n}") for n in (1, 2, 3, 4)])
+        finally:
+            await transcriber.close()
+
+    results = asyncio.run(main())
+    assert transcriber.batches == [4]
+    assert results == [{"text": f"len={n}", "target": f"t{n}"} for n in (1, 2, 3, 4)]
+    assert transcriber.pending == 0
+
+
+def test_batches_are_capped_at_max_batch_size(executor):
+    transcriber = StubTranscriber(executor, max_batch_size=2, max_wait_ms=50)
+
+    async def main():
+        try:
+            await asyncio.gather(*[transcriber.transcribe(clip(10)) for _ in range(5)])
+        finally:
+            await transcriber.close()
+
+    asyncio.run(main())
+    assert transcriber.batches == [2, 2, 1]
+
+
+def test_full_queue_is_rejected_with_retry_after(executor):
+    gate = threading.Event()
+    transcriber = StubTranscriber(executor, gate=gate, max_batch_size=1, max_wait_ms=0, max_pending=2,
+                                  expected_batch_seconds=1.5)
+
+    async def main():
+        try:
+            queued = [asyncio.create_task(transcriber.transcribe(clip(10))) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            with pytest.raises(QueueFullError) as rejected:
+                await transcriber.transcribe(clip(10))
+            gate.set()
+            await asyncio.gather(*queued)
+            # Kuyruk boşalınca yeni istekler yine kabul edilir
+            await transcriber.transcribe(clip(10))
+            return rejected.value
+        finally:
+            gate.set()
+            await transcriber.close()
+
+    error = asyncio.run(main())
+    assert error.retry_after == 3  # 2 batch * 1.5 sn, yukarı yuvarlanır
+    assert transcriber.batches == [1, 1, 1]
+
+
+def test_decode_error_fails_the_batch_and_worker_keeps_running(executor):
+    transcriber = StubTranscriber(executor, max_batch_size=4, max_wait_ms=20)
+    original = transcriber.decode_batch
+    calls = []
+
+    def flaky(audios, targets=None):
+        calls.append(len(audios))
+        if len(calls) == 1:
+            raise RuntimeError("decoder crashed")
+        return original(audios, targets)
+
+    transcriber.decode_batch = flaky
+
+    async def main():
+        try:
+            first = await asyncio.gather(*[transcriber.transcribe(clip(1)) for _ in range(2)],
+                                         return_exceptions=True)
+            second = await transcriber.transcribe(clip(2))
+            return first, second
+        finally:
+            await transcriber.close()
+
+    first, second = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in first)
+    assert second["text"] == "len=2"
+
+
+def test_timeout_recovers_after_the_stuck_decode_finishes():
+    gate = threading.Event()
+    executor = InferenceExecutor(max_workers=1, job_timeout=0.1)
+    transcriber = StubTranscriber(executor, gate=gate, max_batch_size=1, max_wait_ms=0)
+
+    async def main():
+        try:
+            with pytest.raises(InferenceTimeoutError):
+                await transcriber.transcribe(clip(1))
+            # Takılan decode sürerken yeni batch gönderilmez
+            waiting = asyncio.create_task(transcriber.transcribe(clip(2)))
+            await asyncio.sleep(0.2)
+            assert not waiting.done()
+            assert transcriber.batches == []
+            gate.set()
+            return await waiting
+        finally:
+            gate.set()
+            await transcriber.close()
+
+    try:
+        result = asyncio.run(main())
+    finally:
+        executor.shutdown()
+    assert result["text"] == "len=2"
+    assert transcriber.batches == [1, 1]
+
+
+def test_time_waiting_for_a_worker_does_not_count_towards_timeout():
+    executor = InferenceExecutor(max_workers=1, job_timeout=0.15)
+
+    async def main():
+        slow = asyncio.ensure_future(executor.run(time.sleep, 0.1))
+        queued = asyncio.ensure_future(executor.run(time.sleep, 0.1))
+        await asyncio.gather(slow, queued)
+
+    try:
+        asyncio.run(main())  # ikinci iş ~0.2 sn sonra biter ama çalışma süresi 0.1 sn
+    finally:
+        executor.shutdown()
+
+
+def test_latency_estimate_grows_with_backlog(executor):
+    transcriber = StubTranscriber(executor, max_batch_size=4, expected_batch_seconds=0.5)
+    assert transcriber.estimate_latency(0) == 0.5
+    assert transcriber.estimate_latency(3) == 0.5
+    assert transcriber.estimate_latency(4) == 1.0
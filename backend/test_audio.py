@@ -0,0 +1,101 @@
+# test_audio.py - WAV çözme ve enerji + ZCR VAD'ı (detect_speech / trim_to_speech) testleri
+#
+# Çalıştırma (backend klasöründen): python -m pytest -q test_audio.py
+
+import io
+import wave
+
+import numpy as np
+import pytest
+
+from audio import SAMPLE_RATE, NoSpeechError, detect_speech, load_audio_bytes, parse_wav, trim_to_speech
+
+
+def tone(seconds: float, freq: float = 180.0, amplitude: float = 0.3) -> np.ndarray:
+    """Harmonikli, sabit enerjili ünlü benzeri sinyal"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    signal = amplitude * (np.sin(2 * np.pi * freq * t) + 0.3 * np.sin(2 * np.pi * 2 * freq * t))
+    return signal.astype(np.float32)
+
+
+def white_noise(seconds: float, amplitude: float, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(int(seconds * SAMPLE_RATE)) * amplitude).astype(np.float32)
+
+
+def wav_bytes(audio: np.ndarray, sample_rate: int = SAMPLE_RATE, channels: int = 1) -> bytes:
+    pcm = (np.clip(audio, -1, 1) * 32767).astype("<i2")
+    if channels > 1:
+        pcm = np.repeat(pcm, channels)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def test_steady_vowel_is_kept_whole():
+    audio = tone(0.6)
+    assert detect_speech(audio) == (0, audio.size)
+    assert trim_to_speech(audio).size == audio.size
+
+
+@pytest.mark.parametrize("amplitude", [0.004, 0.1])
+def test_white_noise_is_not_speech(amplitude):
+    audio = white_noise(1.0, amplitude)
+    assert detect_speech(audio) is None
+    with pytest.raises(NoSpeechError):
+        trim_to_speech(audio)
+
+
+def test_mains_hum_is_not_speech():
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    assert detect_speech((0.05 * np.sin(2 * np.pi * 50 * t)).astype(np.float32)) is None
+
+
+def test_silence_is_not_speech():
+    assert detect_speech(np.zeros(SAMPLE_RATE, dtype=np.float32)) is None
+    assert detect_speech(np.zeros(10, dtype=np.float32)) is None
+
+
+def test_word_in_background_noise_is_trimmed():
+    audio = white_noise(4.0, 0.005)
+    word = tone(1.2)
+    start = int(1.4 * SAMPLE_RATE)
+    audio[start : start + word.size] += word
+
+    span = detect_speech(audio)
+    assert span is not None
+    pad = int(0.1 * SAMPLE_RATE)
+    assert start - pad - 640 <= span[0] <= start
+    assert start + word.size <= span[1] <= start + word.size + pad + 640
+
+
+def test_fricative_tail_is_kept():
+    # Ünlü + ardından düşük enerjili ama yüksek ZCR'li "s"
+    audio = white_noise(2.0, 0.001)
+    vowel = tone(0.5)
+    fricative = white_noise(0.2, 0.02, seed=1)
+    audio[8000 : 8000 + vowel.size] += vowel
+    audio[16000 : 16000 + fricative.size] += fricative
+
+    span = detect_speech(audio)
+    assert span is not None
+    assert span[1] >= 16000 + fricative.size
+
+
+def test_parse_wav_downmixes_stereo():
+    audio = tone(0.1)
+    decoded, sample_rate = parse_wav(wav_bytes(audio, channels=2))
+    assert sample_rate == SAMPLE_RATE
+    assert decoded.size == audio.size
+    np.testing.assert_allclose(decoded, audio, atol=1e-3)
+
+
+def test_load_audio_bytes_resamples_to_16k():
+    audio = tone(0.5)[: 4000]
+    decoded = load_audio_bytes(wav_bytes(np.repeat(audio, 3), sample_rate=48000), "clip.wav")
+    assert decoded.dtype == np.float32
+    assert abs(decoded.size - audio.size) <= 1
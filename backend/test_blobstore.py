@@ -0,0 +1,202 @@
+# test_blobstore.py - S3BlobStore ve StorageManager'ın S3 yolu için moto ile tekrarlanabilir testler
+#
+# Çalıştırma (backend klasöründen): python -m pytest -q test_blobstore.py
+# Gerekenler: boto3, moto[s3], pytest. Ağ ya da gerçek bir bucket kullanılmaz.
+
+import hashlib
+import sqlite3
+import urllib.parse
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+import storage
+from blobstore import S3BlobStore
+from storage import StorageManager, blob_key
+
+BUCKET = "recordings-test"
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def s3_client(monkeypatch):
+    # Gerçek kimlik bilgileri yanlışlıkla kullanılmasın
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture
+def store(s3_client):
+    return S3BlobStore(BUCKET, prefix="recordings/", client=s3_client,
+                       multipart_threshold=5 * MB, multipart_chunksize=5 * MB)
+
+
+@pytest.fixture
+def manager(tmp_path, store):
+    return StorageManager(tmp_path, store=store)
+
+
+def write_blob(tmp_path, content: bytes):
+    sha256 = hashlib.sha256(content).hexdigest()
+    path = tmp_path / f"{sha256}.part"
+    path.write_bytes(content)
+    return blob_key(sha256), path
+
+
+def test_put_exists_delete(tmp_path, store, s3_client):
+    key, path = write_blob(tmp_path, b"RIFF....WAVE")
+    assert not store.exists(key)
+
+    store.put(key, path)
+    assert store.exists(key)
+    assert not path.exists()  # put yerel dosyayı tüketir
+    body = s3_client.get_object(Bucket=BUCKET, Key="recordings/" + key)["Body"].read()
+    assert body == b"RIFF....WAVE"
+
+    store.delete(key)
+    assert not store.exists(key)
+    store.delete(key)  # olmayan anahtar hata vermez
+
+
+def test_local_copy(tmp_path, store):
+    key, path = write_blob(tmp_path, b"audio bytes")
+    store.put(key, path)
+    with store.local_copy(key, tmp_path) as copy:
+        assert copy.read_bytes() == b"audio bytes"
+    assert not copy.exists()
+
+
+def test_iter_keys_strips_prefix(tmp_path, store, s3_client):
+    s3_client.put_object(Bucket=BUCKET, Key="other/ignored", Body=b"x")
+    expected = {}
+    for content in (b"one", b"two", b"three"):
+        key, path = write_blob(tmp_path, content)
+        store.put(key, path)
+        expected[key] = len(content)
+
+    listed = {key: size for key, size, modified in store.iter_keys()}
+    assert listed == expected
+    assert all(modified > 0 for _, _, modified in store.iter_keys())
+
+
+def test_presigned_url(tmp_path, store):
+    key, path = write_blob(tmp_path, b"audio bytes")
+    store.put(key, path)
+
+    url = store.presigned_url(key, 300, filename="take.flac", media_type="audio/flac")
+    parsed = urllib.parse.urlparse(url)
+    query = urllib.parse.parse_qs(parsed.query)
+    assert parsed.path.endswith("/recordings/" + key)
+    assert query["response-content-type"] == ["audio/flac"]
+    assert query["response-content-disposition"] == ['attachment; filename="take.flac"']
+    assert "Signature" in query or "X-Amz-Signature" in query
+
+
+def test_multipart_upload(tmp_path, store, s3_client):
+    content = bytes(range(256)) * (11 * MB // 256)
+    key, path = write_blob(tmp_path, content)
+    store.put(key, path)
+
+    head = s3_client.head_object(Bucket=BUCKET, Key="recordings/" + key)
+    assert head["ContentLength"] == len(content)
+    assert head["ETag"].strip('"').endswith("-3")  # 5 + 5 + 1 MB parça
+    with store.local_copy(key, tmp_path) as copy:
+        assert hashlib.sha256(copy.read_bytes()).hexdigest() == key.rsplit("/", 1)[-1]
+
+
+def test_dedup_keeps_object_until_last_reference(manager, store):
+    first = manager.save_uploaded_file(b"same clip", "w1", "a.wav", user_id=1)
+    second = manager.save_uploaded_file(b"same clip", "w1", "b.wav", user_id=1)
+    assert first == second
+    assert len(list(store.iter_keys())) == 1
+
+    with manager.db.connection() as conn:
+        ids = [row[0] for row in conn.execute("SELECT id FROM recordings ORDER BY id")]
+        assert conn.execute("SELECT ref_count FROM blobs").fetchone()[0] == 2
+
+        manager.delete_recording(conn, ids[0])
+        assert len(list(store.iter_keys())) == 1
+        manager.delete_recording(conn, ids[1])
+        assert list(store.iter_keys()) == []
+
+    info = manager.get_storage_info()
+    assert info["upload_count"] == 0
+    assert info["total_upload_size"] == 0
+
+
+def test_reconcile(tmp_path, manager, store, monkeypatch):
+    manager.save_uploaded_file(b"kept clip", "w1", "a.wav", user_id=1)
+    manager.save_uploaded_file(b"lost clip", "w2", "b.wav", user_id=1)
+    orphan_key, orphan_path = write_blob(tmp_path, b"orphan clip")
+    store.put(orphan_key, orphan_path)
+    store.delete(blob_key(hashlib.sha256(b"lost clip").hexdigest()))
+
+    # Yeni yazılan nesneler ve kayıtlar da eski sayılsın (aksi halde sürüyor diye atlanır)
+    monkeypatch.setattr(storage, "TEMP_MAX_AGE", -60)
+    report = manager.reconcile()
+
+    assert report["blobs_on_disk"] == 2
+    assert report["missing_blobs"] == 1
+    assert report["dropped_recordings"] == 1
+    assert report["orphan_blobs"] == 1
+    assert [key for key, _, _ in store.iter_keys()] == [blob_key(hashlib.sha256(b"kept clip").hexdigest())]
+    with manager.db.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM recordings").fetchone()[0] == 1
+        assert conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 1
+    assert manager.get_storage_info()["upload_count"] == 1
+
+
+class LockCheckingStore(S3BlobStore):
+    """delete sırasında SQLite yazma kilidinin boş olduğunu doğrular"""
+
+    db_path = None
+    deletes_under_lock = 0
+
+    def delete(self, key: str):
+        probe = sqlite3.connect(self.db_path, timeout=0)
+        try:
+            probe.execute("BEGIN IMMEDIATE")
+            probe.rollback()
+        except sqlite3.OperationalError:
+            self.deletes_under_lock += 1
+        finally:
+            probe.close()
+        super().delete(key)
+
+
+def test_blob_deletes_run_after_commit(tmp_path, s3_client):
+    store = LockCheckingStore(BUCKET, client=s3_client)
+    store.db_path = tmp_path / "users.db"
+    manager = StorageManager(tmp_path, store=store)
+    manager.save_uploaded_file(b"first clip", "w1", "a.wav", user_id=1)
+    manager.save_uploaded_file(b"second clip", "w1", "b.wav", user_id=1)
+
+    with manager.db.connection() as conn:
+        first, second = [row[0] for row in conn.execute("SELECT id FROM recordings ORDER BY id")]
+        manager.delete_recording(conn, first)
+        manager.expire_recordings(conn, [second])
+
+    assert list(store.iter_keys()) == []
+    assert store.deletes_under_lock == 0
+
+
+def test_rolled_back_delete_keeps_object(manager, store, monkeypatch):
+    manager.save_uploaded_file(b"clip", "w1", "a.wav", user_id=1)
+
+    def fail(*args):
+        raise RuntimeError("simulated failure before commit")
+
+    monkeypatch.setattr(manager, "_add_totals", fail)
+    with manager.db.connection() as conn:
+        (recording_id,) = conn.execute("SELECT id FROM recordings").fetchone()
+        with pytest.raises(RuntimeError):
+            manager.delete_recording(conn, recording_id)
+        assert conn.execute("SELECT COUNT(*) FROM recordings").fetchone()[0] == 1
+    assert len(list(store.iter_keys())) == 1
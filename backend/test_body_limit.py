@@ -0,0 +1,87 @@
+# test_body_limit.py - BodySizeLimit ara katmanı: Content-Length ve chunked gövdelerde 413
+#
+# Çalıştırma (backend klasöründen): python -m pytest -q test_body_limit.py
+
+import pytest
+
+pytest.importorskip("multipart")
+
+from fastapi import FastAPI, File, Form, Request, UploadFile
+from fastapi.testclient import TestClient
+
+from body_limit import BodySizeLimit
+
+LIMIT = 64 * 1024
+BOUNDARY = "test-boundary"
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.state.handled = 0
+
+    @app.middleware("http")
+    async def passthrough(request: Request, call_next):
+        # Uygulamadaki gecikme ara katmanı gibi bir BaseHTTPMiddleware de zincirde olsun
+        return await call_next(request)
+
+    @app.post("/upload")
+    async def upload(name: str = Form(...), file: UploadFile = File(...)):
+        app.state.handled += 1
+        return {"size": len(await file.read())}
+
+    @app.post("/other")
+    async def other(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    app.add_middleware(BodySizeLimit, limits={("POST", "/upload"): LIMIT})
+    return TestClient(app)
+
+
+def chunked_body(payload_chunks: int, chunk_size: int = 16 * 1024):
+    yield (
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"name\"\r\n\r\nw\r\n"
+        f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.wav\"\r\n"
+        "Content-Type: audio/wav\r\n\r\n"
+    ).encode()
+    for _ in range(payload_chunks):
+        yield b"x" * chunk_size
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def post_chunked(client, path: str, payload_chunks: int):
+    return client.post(
+        path,
+        content=chunked_body(payload_chunks),
+        headers={"content-type": f"multipart/form-data; boundary={BOUNDARY}"},
+    )
+
+
+def test_small_upload_passes(client):
+    response = client.post("/upload", data={"name": "w"}, files={"file": ("a.wav", b"x" * 1000)})
+    assert response.status_code == 200
+    assert response.json() == {"size": 1000}
+
+
+def test_declared_length_over_limit_is_rejected_before_reading(client):
+    response = client.post("/upload", data={"name": "w"}, files={"file": ("a.wav", b"x" * (2 * LIMIT))})
+    assert response.status_code == 413
+    assert client.app.state.handled == 0
+
+
+def test_chunked_body_over_limit_is_rejected(client):
+    response = post_chunked(client, "/upload", payload_chunks=16)
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Request body is too large"}
+    assert client.app.state.handled == 0
+
+
+def test_chunked_body_under_limit_passes(client):
+    response = post_chunked(client, "/upload", payload_chunks=2)
+    assert response.status_code == 200
+    assert response.json() == {"size": 2 * 16 * 1024}
+
+
+def test_other_paths_are_not_limited(client):
+    response = post_chunked(client, "/other", payload_chunks=16)
+    assert response.status_code == 200
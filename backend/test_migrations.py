@@ -0,0 +1,151 @@
+# test_migrations.py - sürümlü şema göçleri: ilk sürümdeki (user_version = 0) veritabanının yükseltilmesi
+#
+# Çalıştırma (backend klasöründen): python -m pytest -q test_migrations.py
+
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+import migrations
+from migrations import MIGRATIONS, migrate, schema_version
+
+LATEST = MIGRATIONS[-1][0]
+
+# Göçlerden önceki app.py init_db şeması (data/users.db ilk haliyle bu şekildedir)
+BASELINE_SCHEMA = [
+    """
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        hashed_password TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE user_progress (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        word_id TEXT NOT NULL,
+        score REAL NOT NULL,
+        asr_text TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    """,
+    """
+    CREATE TABLE achievements (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        achievement_type TEXT NOT NULL,
+        achievement_name TEXT NOT NULL,
+        description TEXT NOT NULL,
+        unlocked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(user_id, achievement_type)
+    )
+    """,
+]
+
+# Kullanıcı 1: 1-3 Mart arka arkaya, 5-6 Mart yeniden (güncel seri 2, en uzun 3); kullanıcı 2: tek gün
+PRACTICE = [
+    (1, "w1", 0.5, "2024-03-01 08:00:00"),
+    (1, "w1", 0.9, "2024-03-01 21:00:00"),
+    (1, "w2", 0.7, "2024-03-02 09:30:00"),
+    (1, "w1", 0.6, "2024-03-03 23:59:00"),
+    (1, "w3", 1.0, "2024-03-05 07:00:00"),
+    (1, "w2", 0.8, "2024-03-06 12:00:00"),
+    (2, "w1", 0.4, "2024-03-04 10:00:00"),
+]
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    with closing(sqlite3.connect(tmp_path / "users.db")) as conn:
+        for statement in BASELINE_SCHEMA:
+            conn.execute(statement)
+        conn.executemany(
+            "INSERT INTO users (username, email, hashed_password) VALUES (?, ?, 'x')",
+            [("mari", "mari@example.com"), ("jaan", "jaan@example.com")],
+        )
+        conn.executemany(
+            "INSERT INTO user_progress (user_id, word_id, score, asr_text, created_at) VALUES (?, ?, ?, '', ?)",
+            PRACTICE,
+        )
+        conn.execute(
+            "INSERT INTO achievements (user_id, achievement_type, achievement_name, description)"
+            " VALUES (1, 'first_practice', 'İlk Adım', 'İlk kelime pratiğin!')"
+        )
+        conn.commit()
+        yield conn
+
+
+def tables(conn) -> set:
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def indexes(conn) -> set:
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def test_baseline_database_is_upgraded_to_latest(baseline):
+    assert schema_version(baseline) == 0
+    assert migrate(baseline) == LATEST
+    assert schema_version(baseline) == LATEST
+
+    assert {"user_stats", "user_word_stats", "srs_state", "blobs", "recordings", "storage_totals",
+            "blob_aliases"} <= tables(baseline)
+    assert "idx_user_progress_user_created" in indexes(baseline)
+    assert "idx_user_progress_user_day" not in indexes(baseline)  # 10. göçte kaldırıldı
+
+    # Var olan veriler korunur
+    assert baseline.execute("SELECT COUNT(*) FROM user_progress").fetchone()[0] == len(PRACTICE)
+    assert baseline.execute("SELECT COUNT(*) FROM achievements").fetchone()[0] == 1
+    assert baseline.execute("SELECT timezone FROM users ORDER BY id").fetchall() == [("UTC",), ("UTC",)]
+
+
+def test_aggregates_and_streaks_are_backfilled(baseline):
+    migrate(baseline)
+
+    stats = dict((row[0], row[1:]) for row in baseline.execute("""
+        SELECT user_id, total_practice, best_score, last_practice_at,
+               current_streak, longest_streak, last_practice_date
+        FROM user_stats
+    """))
+    assert stats[1] == (6, 1.0, "2024-03-06 12:00:00", 2, 3, "2024-03-06")
+    assert stats[2] == (1, 0.4, "2024-03-04 10:00:00", 1, 1, "2024-03-04")
+    assert baseline.execute(
+        "SELECT ROUND(score_sum, 2) FROM user_stats WHERE user_id = 1"
+    ).fetchone()[0] == 4.5
+
+    word_stats = baseline.execute("""
+        SELECT word_id, attempts, best_score FROM user_word_stats WHERE user_id = 1 ORDER BY word_id
+    """).fetchall()
+    assert word_stats == [("w1", 3, 0.9), ("w2", 2, 0.8), ("w3", 1, 1.0)]
+    assert baseline.execute("SELECT * FROM storage_totals").fetchall() == [(1, 0, 0, 0, 0)]
+
+
+def test_migrate_is_idempotent(baseline, capsys):
+    migrate(baseline)
+    capsys.readouterr()
+
+    assert migrate(baseline) == LATEST
+    assert capsys.readouterr().out == ""
+    assert baseline.execute("SELECT COUNT(*) FROM user_stats").fetchone()[0] == 2
+
+
+def test_empty_database_is_created_from_scratch(tmp_path):
+    with closing(sqlite3.connect(tmp_path / "new.db")) as conn:
+        assert migrate(conn) == LATEST
+        assert {"users", "user_progress", "achievements", "user_stats"} <= tables(conn)
+
+
+def test_failed_migration_rolls_back_and_keeps_version(baseline, monkeypatch):
+    broken = (LATEST + 1, "broken", ["CREATE TABLE half_done (id INTEGER)", "SELECT * FROM missing_table"])
+    monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS + [broken])
+
+    with pytest.raises(sqlite3.OperationalError):
+        migrate(baseline)
+
+    assert schema_version(baseline) == LATEST  # önceki göçler uygulandı, bozuk olan geri alındı
+    assert "half_done" not in tables(baseline)
@@ -0,0 +1,125 @@
+# test_progress.py - record_practice: artımlı özetler ve kullanıcının saat dilimine göre seri (streak)
+#
+# Çalıştırma (backend klasöründen): python -m pytest -q test_progress.py
+
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from migrations import migrate
+from progress import fetch_user_stats, fetch_word_stats, local_date, record_practice, streak_expires_at
+
+USERS = {1: "UTC", 2: "Europe/Tallinn", 3: "America/Los_Angeles"}
+
+
+@pytest.fixture
+def conn(tmp_path):
+    with closing(sqlite3.connect(tmp_path / "users.db")) as conn:
+        migrate(conn)
+        conn.executemany(
+            "INSERT INTO users (id, username, email, hashed_password, timezone) VALUES (?, ?, ?, 'x', ?)",
+            [(user_id, f"u{user_id}", f"u{user_id}@example.com", tz) for user_id, tz in USERS.items()],
+        )
+        conn.commit()
+        yield conn
+
+
+def practice(conn, user_ids, at: str, score: float = 0.5, word_id: str = "w1"):
+    return record_practice(
+        conn, [(user_id, word_id, score, "") for user_id in user_ids], datetime.fromisoformat(at)
+    )
+
+
+def streak(conn, user_id: int) -> tuple:
+    return conn.execute(
+        "SELECT current_streak, longest_streak, last_practice_date FROM user_stats WHERE user_id = ?", (user_id,)
+    ).fetchone()
+
+
+def test_local_date_uses_the_users_timezone():
+    # 21:00 ve 23:30 UTC: UTC'de aynı gün, Tallinn'de (UTC+2) gece yarısını geçer
+    assert local_date("UTC", datetime(2024, 1, 1, 23, 30)) == local_date("UTC", datetime(2024, 1, 1, 21))
+    assert local_date("Europe/Tallinn", datetime(2024, 1, 1, 23, 30)).isoformat() == "2024-01-02"
+    assert local_date("Not/AZone", datetime(2024, 1, 1, 23, 30)).isoformat() == "2024-01-01"
+    aware = datetime(2024, 1, 2, 1, 30, tzinfo=timezone(timedelta(hours=2)))
+    assert local_date("UTC", aware).isoformat() == "2024-01-01"
+
+
+def test_streak_follows_each_users_timezone(conn):
+    practice(conn, [1, 2], "2024-01-01 21:00:00")
+    practice(conn, [1, 2], "2024-01-01 23:30:00")
+
+    assert streak(conn, 1) == (1, 1, "2024-01-01")
+    assert streak(conn, 2) == (2, 2, "2024-01-02")
+
+
+def test_streak_west_of_utc(conn):
+    # 05:00 UTC Los Angeles'ta önceki akşam (21:00), 20:00 UTC ise ertesi öğle
+    practice(conn, [1, 3], "2024-01-02 05:00:00")
+    practice(conn, [1, 3], "2024-01-02 20:00:00")
+
+    assert streak(conn, 1) == (1, 1, "2024-01-02")
+    assert streak(conn, 3) == (2, 2, "2024-01-02")
+
+
+def test_missed_day_resets_current_but_keeps_longest(conn):
+    for day in ("2024-01-01", "2024-01-02", "2024-01-03", "2024-01-05"):
+        practice(conn, [1], f"{day} 12:00:00")
+    assert streak(conn, 1) == (1, 3, "2024-01-05")
+
+    practice(conn, [1], "2024-01-06 08:00:00")
+    practice(conn, [1], "2024-01-06 18:00:00")  # aynı gün seriyi artırmaz
+    assert streak(conn, 1) == (2, 3, "2024-01-06")
+
+
+def test_timezone_change_does_not_move_the_streak_backwards(conn):
+    practice(conn, [3], "2024-01-02 05:00:00")  # Los Angeles: 1 Ocak
+    practice(conn, [3], "2024-01-02 20:00:00")  # 2 Ocak
+    conn.execute("UPDATE users SET timezone = 'Pacific/Honolulu' WHERE id = 3")  # UTC-10: hâlâ 1 Ocak
+    practice(conn, [3], "2024-01-02 09:00:00")
+
+    assert streak(conn, 3) == (2, 2, "2024-01-02")
+
+
+def test_totals_are_updated_incrementally(conn):
+    record_practice(conn, [(1, "w1", 0.5, ""), (1, "w2", 0.9, ""), (1, "w1", 0.7, "")],
+                    datetime(2024, 1, 1, 12))
+    record_practice(conn, [(1, "w1", 0.2, "")], datetime(2024, 1, 2, 12))
+
+    stats = fetch_user_stats(conn, 1)
+    assert (stats["total_practice"], stats["best_score"], stats["average_score"]) == (4, 0.9, 0.57)
+    assert stats["last_practice_at"] == "2024-01-02 12:00:00"
+    assert fetch_word_stats(conn, 1) == {
+        "w1": {"attempts": 3, "best_score": 0.7, "average_score": 0.47},
+        "w2": {"attempts": 1, "best_score": 0.9, "average_score": 0.9},
+    }
+    assert conn.execute("SELECT COUNT(*) FROM user_progress").fetchone()[0] == 4
+
+
+def test_summary_reports_a_broken_streak_as_zero(conn):
+    practice(conn, [2], "2024-01-01 12:00:00")
+    practice(conn, [2], "2024-01-02 12:00:00")
+
+    stats = fetch_user_stats(conn, 2)
+    assert (stats["current_streak"], stats["longest_streak"]) == (0, 2)
+    # Seri, son pratik gününden iki gün sonraki Tallinn gece yarısında (22:00 UTC) sona erer
+    assert stats["streak_expires_at"] == datetime(2024, 1, 3, 22, tzinfo=timezone.utc).timestamp()
+
+    now = datetime.utcnow()
+    record_practice(conn, [(2, "w1", 0.5, "")], now)
+    assert fetch_user_stats(conn, 2)["current_streak"] == 1
+
+
+def test_streak_expiry_without_practice():
+    assert streak_expires_at(None, "UTC") is None
+    assert streak_expires_at("2024-01-01", "UTC") == datetime(2024, 1, 3, tzinfo=timezone.utc).timestamp()
+
+
+def test_failed_write_is_rolled_back(conn):
+    # Tekrar zamanlaması özet tablolarından sonra, aynı işlemde çalışır
+    with pytest.raises(TypeError):
+        record_practice(conn, [(1, "w1", 0.5, "")], datetime(2024, 1, 1), reviews=[(1, "w1", None)])
+    assert conn.execute("SELECT COUNT(*) FROM user_progress").fetchone()[0] == 0
+    assert fetch_user_stats(conn, 1) is None
@@ -0,0 +1,211 @@
+# test_retention.py - RetentionWorker politikaları ve StorageManager.compact_blob (yerel depo ile)
+#
+# Çalıştırma (backend klasöründen): python -m pytest -q test_retention.py
+
+import asyncio
+import io
+import wave
+
+import numpy as np
+import pytest
+
+from blobstore import LocalBlobStore
+from retention import RetentionPolicy, RetentionWorker
+from storage import StorageManager, blob_key
+
+pytest.importorskip("soundfile")
+
+# Negatif yaş: az önce eklenen kayıtlar da politikaların kapsamına girsin
+NOW = -1
+
+
+def wav_bytes(seconds: float = 1.0, freq: float = 220.0) -> bytes:
+    t = np.arange(int(seconds * 16000)) / 16000
+    pcm = (0.3 * np.sin(2 * np.pi * freq * t) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(16000)
+        f.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+class FlakyStore(LocalBlobStore):
+    """İlk failures local_copy çağrısında geçici bir depo hatası verir"""
+
+    failures = 0
+
+    def local_copy(self, key, tmp_dir):
+        if self.failures > 0:
+            self.failures -= 1
+            raise OSError("simulated transient store error")
+        return super().local_copy(key, tmp_dir)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return StorageManager(tmp_path, store=FlakyStore(tmp_path / "blobs"))
+
+
+def run(worker: RetentionWorker) -> dict:
+    return asyncio.run(worker.run_once())
+
+
+def blob_rows(manager):
+    with manager.db.connection() as conn:
+        return conn.execute("SELECT sha256, size, ref_count, compacted_at, format FROM blobs").fetchall()
+
+
+def test_wav_blob_is_transcoded_and_format_recorded(manager):
+    manager.save_uploaded_file(wav_bytes(), "w1", "take.wav", user_id=1)
+    worker = RetentionWorker(manager, manager.db, RetentionPolicy(codec="flac", min_age_minutes=NOW), pause=0)
+
+    report = run(worker)
+
+    assert report["transcoded"] == 1
+    assert report["bytes_reclaimed"] > 0
+    [(sha256, size, ref_count, compacted_at, fmt)] = blob_rows(manager)
+    assert (ref_count, fmt) == (1, "flac")
+    assert compacted_at is not None
+    with manager.db.connection() as conn:
+        recording = manager.get_recording(conn, 1)
+    assert recording["sha256"] == sha256
+    assert manager.store.local_path(blob_key(sha256)).read_bytes()[:4] == b"fLaC"
+    assert manager.get_storage_info()["stored_upload_size"] == size
+
+
+def test_non_wav_blob_is_marked_and_not_retried(manager):
+    manager.save_uploaded_file(b"not a wav file", "w1", "take.webm", user_id=1)
+    worker = RetentionWorker(manager, manager.db, RetentionPolicy(codec="flac", min_age_minutes=NOW), pause=0)
+
+    assert run(worker)["transcoded"] == 0
+    [(_, _, _, compacted_at, fmt)] = blob_rows(manager)
+    assert compacted_at is not None and fmt is None
+
+
+def test_transient_failure_is_retried_on_next_run(manager):
+    manager.save_uploaded_file(wav_bytes(), "w1", "take.wav", user_id=1)
+    manager.store.failures = 1
+    worker = RetentionWorker(manager, manager.db, RetentionPolicy(codec="flac", min_age_minutes=NOW), pause=0)
+
+    first = run(worker)
+    assert first["compaction_failures"] == 1
+    assert first["transcoded"] == 0
+    [(_, _, _, compacted_at, _)] = blob_rows(manager)
+    assert compacted_at is None  # başarısızlık "tamamlandı" sayılmaz
+
+    second = run(worker)
+    assert second["transcoded"] == 1
+    assert worker.stats()["compaction_failures"] == 1
+
+
+def test_failures_beyond_batch_size_do_not_loop(manager):
+    for freq in (200, 300, 400):
+        manager.save_uploaded_file(wav_bytes(freq=freq), "w1", f"{freq}.wav", user_id=1)
+    manager.store.failures = 10**6
+    worker = RetentionWorker(manager, manager.db, RetentionPolicy(codec="flac", min_age_minutes=NOW),
+                             batch_size=2, pause=0)
+
+    report = run(worker)
+    assert report["compaction_failures"] == 3
+    assert all(row[3] is None for row in blob_rows(manager))
+
+
+def test_reupload_after_compaction_is_deduplicated(manager):
+    original = wav_bytes()
+    manager.save_uploaded_file(original, "w1", "take.wav", user_id=1)
+    worker = RetentionWorker(manager, manager.db, RetentionPolicy(codec="flac", min_age_minutes=NOW), pause=0)
+    assert run(worker)["transcoded"] == 1
+    [(compacted, compacted_size, _, _, _)] = blob_rows(manager)
+
+    location = manager.save_uploaded_file(original, "w1", "again.wav", user_id=2)
+
+    assert location == manager.blob_location(compacted)
+    [(sha256, size, ref_count, _, fmt)] = blob_rows(manager)
+    assert (sha256, size, ref_count, fmt) == (compacted, compacted_size, 2, "flac")
+    assert len(list(manager.store.iter_keys())) == 1
+    info = manager.get_storage_info()
+    assert (info["upload_count"], info["blob_count"], info["stored_upload_size"]) == (2, 1, compacted_size)
+    assert info["total_upload_size"] == 2 * len(original)
+
+
+def test_alias_is_dropped_with_its_target(manager):
+    original = wav_bytes()
+    manager.save_uploaded_file(original, "w1", "take.wav", user_id=1)
+    run(RetentionWorker(manager, manager.db, RetentionPolicy(codec="flac", min_age_minutes=NOW), pause=0))
+
+    with manager.db.connection() as conn:
+        manager.delete_recording(conn, 1)
+        assert conn.execute("SELECT COUNT(*) FROM blob_aliases").fetchone()[0] == 0
+
+    # Hedef gitti: aynı WAV yeniden tam içerik olarak saklanır
+    manager.save_uploaded_file(original, "w1", "take.wav", user_id=1)
+    [(sha256, size, ref_count, _, fmt)] = blob_rows(manager)
+    assert (size, ref_count, fmt) == (len(original), 1, None)
+    assert manager.store.local_path(blob_key(sha256)).read_bytes() == original
+
+
+def age_recordings(manager, *created_at: str):
+    """Kayıtların created_at değerlerini id sırasıyla ata"""
+    with manager.db.connection() as conn:
+        conn.executemany("UPDATE recordings SET created_at = ? WHERE id = ?",
+                         [(at, i) for i, at in enumerate(created_at, start=1)])
+        conn.commit()
+
+
+def recording_ids(manager) -> list[int]:
+    with manager.db.connection() as conn:
+        return [row[0] for row in conn.execute("SELECT id FROM recordings ORDER BY id")]
+
+
+def test_recordings_past_max_age_are_expired(manager):
+    manager.save_uploaded_file(b"old take", "w1", "a.wav", user_id=1)
+    manager.save_uploaded_file(b"new take", "w1", "b.wav", user_id=1)
+    age_recordings(manager, "2000-01-01 00:00:00")
+    worker = RetentionWorker(manager, manager.db, RetentionPolicy(max_age_days=30, codec=None), pause=0)
+
+    report = run(worker)
+
+    assert (report["expired_age"], report["bytes_reclaimed"]) == (1, len(b"old take"))
+    assert recording_ids(manager) == [2]
+    assert len(list(manager.store.iter_keys())) == 1
+    assert worker.stats()["recordings_expired"] == 1
+
+
+def test_oldest_recordings_over_user_quota_are_expired(manager):
+    for i in range(3):
+        manager.save_uploaded_file(b"x" * 10 + bytes([i]), "w1", f"{i}.wav", user_id=1)  # 11 bayt
+    manager.save_uploaded_file(b"y" * 20, "w1", "other.wav", user_id=2)
+    age_recordings(manager, "2024-01-01 00:00:00", "2024-01-03 00:00:00", "2024-01-02 00:00:00")
+    policy = RetentionPolicy(user_quota_bytes=25, codec=None)
+
+    report = run(RetentionWorker(manager, manager.db, policy, pause=0))
+
+    # 1. kullanıcı: yeniden eskiye 11 + 11 bayt kotaya sığar, en eski kayıt silinir; 2. kullanıcı kotanın altında
+    assert (report["expired_quota"], report["bytes_reclaimed"]) == (1, 11)
+    assert recording_ids(manager) == [2, 3, 4]
+
+
+def test_only_the_best_attempts_per_word_are_kept(manager):
+    for i, score in enumerate((0.5, 0.9, None, 0.7)):
+        manager.save_uploaded_file(f"take {i}".encode(), "w1", f"{i}.wav", user_id=1)
+        if score is not None:
+            with manager.db.connection() as conn:
+                assert manager.set_recording_score(conn, i + 1, 1, score)
+    manager.save_uploaded_file(b"other word", "w2", "w2.wav", user_id=1)
+    policy = RetentionPolicy(keep_best_per_word=2, codec=None, min_age_minutes=NOW)
+
+    report = run(RetentionWorker(manager, manager.db, policy, pause=0))
+
+    assert report["expired_keep_best"] == 2  # skorsuz ve en düşük skorlu deneme
+    assert recording_ids(manager) == [2, 4, 5]
+
+
+def test_recent_attempts_are_not_expired_by_keep_best(manager):
+    for i in range(3):
+        manager.save_uploaded_file(f"take {i}".encode(), "w1", f"{i}.wav", user_id=1)
+    policy = RetentionPolicy(keep_best_per_word=1, codec=None, min_age_minutes=60)
+
+    assert run(RetentionWorker(manager, manager.db, policy, pause=0))["expired_keep_best"] == 0
+    assert recording_ids(manager) == [1, 2, 3]
@@ -0,0 +1,88 @@
+# test_service_scoring.py - dizi tabanlı skor çekirdekleri (WER, fonem benzerliği, final skor)
+#
+# Çalıştırma (backend klasöründen): python -m pytest -q test_service_scoring.py
+
+import numpy as np
+import pytest
+
+from service_scoring import (
+    batch_asr_accuracy,
+    batch_final_score,
+    batch_phoneme_similarity,
+    batch_prosody_score,
+    calculate_asr_accuracy,
+    calculate_batch_scores,
+    calculate_final_score,
+    calculate_phoneme_similarity,
+)
+
+# (hedef, ASR metni, jiwer.wer değeri)
+WER_CASES = [
+    ("tere", "tere", 0.0),
+    ("tere", "tore", 1.0),
+    ("tere hommikust", "tere", 0.5),
+    ("tere hommikust", "tere hommikust sõber", 0.5),
+    ("aitäh väga palju", "aitäh palju", 1 / 3),
+    ("üks kaks kolm", "kolm kaks üks", 2 / 3),
+    ("  tere   hommikust ", "tere hommikust", 0.0),
+    ("a b", "c d e f g", 2.5),
+    ("", "", 0.0),
+]
+
+
+@pytest.mark.parametrize("target, hypothesis, wer", WER_CASES)
+def test_asr_accuracy_is_one_minus_wer(target, hypothesis, wer):
+    assert calculate_asr_accuracy(target, hypothesis) == pytest.approx(max(0.0, 1.0 - wer))
+
+
+def test_batch_matches_jiwer():
+    jiwer = pytest.importorskip("jiwer")
+    cases = [(t, h) for t, h, _ in WER_CASES if t.strip()]  # jiwer boş referansı kabul etmez
+    targets, hypotheses = zip(*cases)
+    expected = [max(0.0, 1.0 - jiwer.wer(t, h)) for t, h in cases]
+    np.testing.assert_allclose(batch_asr_accuracy(targets, hypotheses), expected)
+
+
+def test_empty_reference_scores_zero_against_words():
+    assert calculate_asr_accuracy("", "tere") == 0.0
+
+
+def test_phoneme_similarity():
+    assert calculate_phoneme_similarity("ˈtere", "ˈtere") == 1.0
+    assert calculate_phoneme_similarity("tere", "TERE") == 1.0
+    assert calculate_phoneme_similarity("tere", "tore") == pytest.approx(0.75)
+    assert calculate_phoneme_similarity("tere", "") == 0.0
+    assert calculate_phoneme_similarity("", "") == 1.0
+    np.testing.assert_allclose(
+        batch_phoneme_similarity(["tere", "kass", "tere"], ["tore", "kas", "tere"]), [0.75, 0.75, 1.0]
+    )
+
+
+def test_prosody_follows_asr_accuracy_bands():
+    np.testing.assert_allclose(
+        batch_prosody_score(["a b c d e", "a b c d e", "a b c d e"], ["a b c d e", "a b c x e", "x y z d e"]),
+        [0.8, 0.7, 0.6],
+    )
+
+
+def test_final_score_weights():
+    assert calculate_final_score(1.0, 1.0, 1.0) == 1.0
+    assert calculate_final_score(0.5, 1.0, 0.0) == 0.6
+    np.testing.assert_array_equal(batch_final_score([1.0, 0.0], [0.5, 0.25], [0.7, 0.7]), [0.74, 0.24])
+
+
+def test_batch_scores_match_single_item_functions():
+    targets = ["tere", "tere hommikust", "aitäh"]
+    hypotheses = ["tere", "tere", "aitä"]
+    scores = calculate_batch_scores(targets, hypotheses, prosody=[0.7, 0.6, 0.9])
+    for i, (target, hypothesis) in enumerate(zip(targets, hypotheses)):
+        asr = calculate_asr_accuracy(target, hypothesis)
+        phoneme = calculate_phoneme_similarity(target, hypothesis)
+        assert scores["asr_accuracy"][i] == pytest.approx(asr)
+        assert scores["phoneme_similarity"][i] == pytest.approx(phoneme)
+        assert scores["final"][i] == calculate_final_score(asr, phoneme, scores["prosody"][i])
+
+
+def test_batch_scores_reject_mismatched_lengths():
+    with pytest.raises(ValueError):
+        calculate_batch_scores(["tere"], [])
@@ -0,0 +1,144 @@
+# test_srs.py - SM-2 güncellemesi, tekrar kaydı ve günlük paket seçimi (select_daily_pack)
+#
+# Çalıştırma (backend klasöründen): python -m pytest -q test_srs.py
+
+import random
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timedelta
+
+import pytest
+
+from db import TIMESTAMP_FORMAT
+from lexicon import Lexicon, Word
+from migrations import migrate
+from srs import (
+    DEFAULT_EASE,
+    MIN_EASE,
+    ReviewState,
+    record_reviews,
+    score_to_quality,
+    select_daily_pack,
+    sm2_update,
+)
+
+NOW = datetime(2024, 3, 10, 12)
+
+LEXICON = Lexicon(
+    [Word(f"a{i}", f"sõna{i}", "ˈsɤ.nɑ", "kelime", "A1", "basics") for i in range(8)]
+    + [
+        Word("food1", "leib", "ˈlei̯b", "ekmek", "A1", "food"),
+        Word("food2", "piim", "ˈpiːm", "süt", "A1", "food"),
+        Word("b1", "raamat", "ˈrɑː.mɑt", "kitap", "A2", "basics"),
+    ]
+)
+
+
+def test_quality_scale():
+    assert [score_to_quality(s) for s in (-1.0, 0.0, 0.25, 0.5, 0.59, 0.61, 0.9, 1.0, 2.0)] == [0, 0, 1, 2, 3, 3, 4, 5, 5]
+
+
+def test_good_answers_grow_the_interval():
+    state, wait = sm2_update(ReviewState(), 1.0)
+    assert state == ReviewState(pytest.approx(2.6), 1.0, 1) and wait == timedelta(days=1)
+
+    state, wait = sm2_update(state, 1.0)
+    assert (state.interval_days, state.repetitions, wait) == (6.0, 2, timedelta(days=6))
+
+    state, wait = sm2_update(state, 0.8)  # q = 4: ease değişmez
+    assert state.ease == pytest.approx(2.7)
+    assert (state.interval_days, state.repetitions) == (16.2, 3)
+    assert wait == timedelta(days=16.2)
+
+
+def test_weak_answer_relearns_soon_and_lowers_ease():
+    state, wait = sm2_update(ReviewState(DEFAULT_EASE, 16.0, 4), 0.4)
+    assert state == ReviewState(pytest.approx(2.18), 0.0, 0)
+    assert wait == timedelta(minutes=10)
+
+
+def test_ease_has_a_floor():
+    state = ReviewState()
+    for _ in range(10):
+        state, _ = sm2_update(state, 0.0)
+    assert state.ease == MIN_EASE
+
+
+@pytest.fixture
+def conn(tmp_path):
+    with closing(sqlite3.connect(tmp_path / "users.db")) as conn:
+        migrate(conn)
+        yield conn
+
+
+def schedule(conn, user_id: int, word_id: str, due_in: timedelta, last_score: float = 0.8, ease: float = DEFAULT_EASE):
+    conn.execute("""
+        INSERT INTO srs_state (user_id, word_id, ease, interval_days, repetitions, due_at, last_score, last_review_at)
+        VALUES (?, ?, ?, 1, 1, ?, ?, ?)
+    """, (user_id, word_id, ease, (NOW + due_in).strftime(TIMESTAMP_FORMAT), last_score,
+          NOW.strftime(TIMESTAMP_FORMAT)))
+
+
+def pack(conn, limit: int, level: str = "A1", category=None, phoneme=None, user_id: int = 1, **kwargs):
+    available = LEXICON.indices(level, category, phoneme)
+    picked = select_daily_pack(conn, LEXICON, user_id, level, category, phoneme, available, limit,
+                               now=NOW, rng=random.Random(0), **kwargs)
+    return [(word.id, source) for word, source in picked]
+
+
+def test_record_reviews_applies_attempts_in_order(conn):
+    record_reviews(conn, [(1, "a0", 1.0), (1, "a0", 1.0), (2, "a0", 0.2)], NOW)
+    rows = dict((row[0], row[1:]) for row in conn.execute(
+        "SELECT user_id, repetitions, interval_days, due_at, last_score FROM srs_state WHERE word_id = 'a0'"
+    ))
+    assert rows[1] == (2, 6.0, "2024-03-16 12:00:00", 1.0)
+    assert rows[2] == (0, 0.0, "2024-03-10 12:10:00", 0.2)
+
+
+def test_overdue_and_weak_words_come_first(conn):
+    schedule(conn, 1, "a1", -timedelta(days=1), last_score=0.2)  # öncelik: 1 gün + 0.8 zayıflık
+    schedule(conn, 1, "a2", -timedelta(days=3), last_score=0.9)  # 3 gün + 0.1
+    schedule(conn, 1, "a3", -timedelta(hours=1), last_score=0.9, ease=1.3)  # ~0.04 gün + 0.1 + 0.48
+    schedule(conn, 1, "a4", timedelta(days=2))
+    schedule(conn, 2, "a5", -timedelta(days=9))  # başka kullanıcı
+
+    assert pack(conn, 2) == [("a2", "due"), ("a1", "due")]
+    assert pack(conn, 3) == [("a2", "due"), ("a1", "due"), ("a3", "due")]
+
+
+def test_new_words_fill_the_pack_before_upcoming_reviews(conn):
+    schedule(conn, 1, "a1", -timedelta(days=1))
+    schedule(conn, 1, "a2", timedelta(days=1))
+    schedule(conn, 1, "a3", timedelta(days=5))
+
+    picked = pack(conn, 5)
+    assert picked[0] == ("a1", "due")
+    assert [source for _, source in picked[1:]] == ["new"] * 4
+    assert not {"a1", "a2", "a3"} & {word_id for word_id, _ in picked[1:]}
+    assert len({word_id for word_id, _ in picked}) == 5
+
+
+def test_upcoming_reviews_are_used_when_no_new_words_are_left(conn):
+    schedule(conn, 1, "food1", timedelta(days=3))
+    schedule(conn, 1, "food2", timedelta(days=1))
+
+    assert pack(conn, 3, category="food") == [("food2", "upcoming"), ("food1", "upcoming")]
+
+
+def test_due_words_outside_the_filter_are_skipped(conn):
+    schedule(conn, 1, "b1", -timedelta(days=5))  # A2
+    schedule(conn, 1, "food1", -timedelta(days=4))
+    schedule(conn, 1, "a1", -timedelta(days=1))
+
+    assert pack(conn, 1) == [("food1", "due")]
+    assert pack(conn, 1, category="basics") == [("a1", "due")]
+    assert pack(conn, 1, phoneme="iː") == [("food2", "new")]
+
+
+def test_scan_limit_bounds_the_queue(conn):
+    for i in range(4):
+        schedule(conn, 1, f"a{i}", -timedelta(days=4 - i))
+
+    picked = pack(conn, 4, scan_limit=2)
+    assert picked[:2] == [("a0", "due"), ("a1", "due")]
+    assert {source for _, source in picked[2:]} == {"new"}
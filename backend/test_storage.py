@@ -0,0 +1,160 @@
+# test_storage.py - StorageManager yerel depoyla: tekilleştirme, akışla yükleme sınırı, reconcile, eski dosyalar
+#
+# Çalıştırma (backend klasöründen): python -m pytest -q test_storage.py
+
+import asyncio
+import hashlib
+import os
+import time
+
+import pytest
+
+import storage
+from storage import StorageManager, UploadTooLarge, blob_key
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return StorageManager(tmp_path)
+
+
+class FakeUpload:
+    """UploadFile.read(n) taklidi"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offset = 0
+
+    async def read(self, n: int) -> bytes:
+        chunk = self.data[self.offset:self.offset + n]
+        self.offset += len(chunk)
+        return chunk
+
+
+def blob_path(manager, content: bytes):
+    return manager.store.local_path(blob_key(hashlib.sha256(content).hexdigest()))
+
+
+def blobs(manager) -> dict:
+    with manager.db.connection() as conn:
+        return {sha256: (size, ref_count) for sha256, size, ref_count in
+                conn.execute("SELECT sha256, size, ref_count FROM blobs")}
+
+
+def put_blob(manager, content: bytes):
+    """Veritabanına yazmadan depoya doğrudan blob koy"""
+    path = manager.tmp_dir / "blob.tmp"
+    path.write_bytes(content)
+    manager.store.put(blob_key(hashlib.sha256(content).hexdigest()), path)
+
+
+def make_old(path, seconds: float = storage.TEMP_MAX_AGE + 60):
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+
+
+def test_identical_uploads_share_one_blob(manager):
+    first = manager.save_uploaded_file(b"same audio", "w1", "a.wav", user_id=1)
+    second = manager.save_uploaded_file(b"same audio", "w2", "b.wav", user_id=2)
+    manager.save_uploaded_file(b"other audio", "w1", "c.wav", user_id=1)
+
+    assert first == second == manager.blob_location(hashlib.sha256(b"same audio").hexdigest())
+    assert blob_path(manager, b"same audio").read_bytes() == b"same audio"
+    assert sorted(blobs(manager).values()) == [(10, 2), (11, 1)]
+    info = manager.get_storage_info()
+    assert (info["upload_count"], info["blob_count"]) == (3, 2)
+    assert (info["total_upload_size"], info["stored_upload_size"]) == (31, 21)
+    assert list(manager.tmp_dir.iterdir()) == []
+
+
+def test_blob_is_removed_with_its_last_recording(manager):
+    manager.save_uploaded_file(b"same audio", "w1", "a.wav", user_id=1)
+    manager.save_uploaded_file(b"same audio", "w1", "b.wav", user_id=1)
+
+    with manager.db.connection() as conn:
+        assert manager.delete_recording(conn, 1)
+        assert blob_path(manager, b"same audio").exists()
+        assert manager.delete_recording(conn, 2)
+        assert not manager.delete_recording(conn, 2)
+
+    assert not blob_path(manager, b"same audio").exists()
+    assert blobs(manager) == {}
+    info = manager.get_storage_info()
+    assert (info["upload_count"], info["blob_count"], info["total_upload_size"]) == (0, 0, 0)
+
+
+def test_streamed_upload_is_hashed_while_written(manager, monkeypatch):
+    monkeypatch.setattr(storage, "UPLOAD_CHUNK_SIZE", 4)
+    data = b"chunked audio payload"
+
+    saved = asyncio.run(manager.save_upload_stream(FakeUpload(data), "w1", "../take.wav", len(data), user_id=1))
+
+    assert (saved.size, saved.sha256, saved.deduplicated) == (len(data), hashlib.sha256(data).hexdigest(), False)
+    with manager.db.connection() as conn:
+        recording = manager.get_recording(conn, saved.recording_id)
+    assert recording["original_filename"] == ".._take.wav"
+    assert blob_path(manager, data).read_bytes() == data
+
+    again = asyncio.run(manager.save_upload_stream(FakeUpload(data), "w1", "take.wav", len(data), user_id=1))
+    assert again.deduplicated and again.location == saved.location
+
+
+def test_streamed_upload_over_the_limit_leaves_nothing_behind(manager, monkeypatch):
+    monkeypatch.setattr(storage, "UPLOAD_CHUNK_SIZE", 4)
+
+    with pytest.raises(UploadTooLarge) as error:
+        asyncio.run(manager.save_upload_stream(FakeUpload(b"x" * 20), "w1", "big.wav", 10, user_id=1))
+
+    assert error.value.max_bytes == 10
+    assert list(manager.tmp_dir.iterdir()) == []
+    assert blobs(manager) == {}
+    assert manager.get_storage_info()["upload_count"] == 0
+
+
+def test_reconcile_repairs_drift(manager):
+    manager.save_uploaded_file(b"kept", "w1", "a.wav", user_id=1)
+    manager.save_uploaded_file(b"kept", "w1", "b.wav", user_id=1)
+    manager.save_uploaded_file(b"lost", "w2", "c.wav", user_id=1)
+    with manager.db.connection() as conn:
+        conn.execute("UPDATE recordings SET created_at = '2000-01-01 00:00:00'")
+        conn.execute("UPDATE blobs SET ref_count = 5")  # sayaç kayması
+        conn.execute("UPDATE storage_totals SET recording_count = 99")
+        conn.commit()
+    blob_path(manager, b"lost").unlink()  # içeriği kaybolmuş kayıt
+
+    # Kaydı olmayan eski blob, yeni (sürmekte olan) blob ve terk edilmiş geçici dosya
+    put_blob(manager, b"orphan")
+    make_old(blob_path(manager, b"orphan"))
+    put_blob(manager, b"in flight")
+    stale = manager.tmp_dir / "stale.part"
+    stale.write_bytes(b"half")
+    make_old(stale)
+    (manager.tmp_dir / "fresh.part").write_bytes(b"writing")
+
+    report = manager.reconcile()
+
+    assert (report["missing_blobs"], report["dropped_recordings"]) == (1, 1)
+    assert (report["orphan_blobs"], report["blobs_fixed"], report["temp_files_removed"]) == (1, 1, 1)
+    assert not blob_path(manager, b"orphan").exists()
+    assert blob_path(manager, b"in flight").exists()
+    assert [path.name for path in manager.tmp_dir.iterdir()] == ["fresh.part"]
+    assert blobs(manager) == {hashlib.sha256(b"kept").hexdigest(): (4, 2)}
+    assert manager.get_storage_info()["upload_count"] == 2
+
+    second = manager.reconcile()
+    assert (second["missing_blobs"], second["orphan_blobs"], second["blobs_fixed"]) == (0, 0, 0)
+
+
+def test_legacy_uploads_are_imported(manager):
+    (manager.uploads_dir / "w_tere_20240101_120000_take.wav").write_bytes(b"legacy one")
+    (manager.uploads_dir / "w_tere_hommik_take.wav").write_bytes(b"legacy two")
+    (manager.uploads_dir / "unknown_word.wav").write_bytes(b"left alone")
+
+    report = manager.import_legacy_uploads(["w_tere", "w_tere_hommik"])
+
+    assert report == {"imported": 2, "skipped": 1}
+    assert [path.name for path in manager.uploads_dir.iterdir()] == ["unknown_word.wav"]
+    with manager.db.connection() as conn:
+        rows = conn.execute("SELECT word_id, original_filename, user_id FROM recordings ORDER BY word_id").fetchall()
+    assert rows == [("w_tere", "take.wav", None), ("w_tere_hommik", "take.wav", None)]
+    assert blob_path(manager, b"legacy one").read_bytes() == b"legacy one"
@@ -0,0 +1,83 @@
+# test_transcription_cache.py - TranscriptionCache: bellek LRU, eşzamanlı istek birleştirme, disk katmanı
+#
+# Çalıştırma (backend klasöründen): python -m pytest -q test_transcription_cache.py
+
+import asyncio
+import sqlite3
+
+import numpy as np
+
+from transcription_cache import TranscriptionCache
+
+
+def counting_compute(calls: list, text: str = "tere"):
+    async def compute():
+        calls.append(text)
+        await asyncio.sleep(0.01)
+        return {"text": text}
+    return compute
+
+
+def test_key_depends_on_audio_model_language_and_target():
+    audio = np.zeros(160, dtype=np.float32)
+    key = TranscriptionCache.make_key(audio, "base", "et")
+    assert key == TranscriptionCache.make_key(audio.astype(np.float64), "base", "et")
+    assert key != TranscriptionCache.make_key(audio, "small", "et")
+    assert key != TranscriptionCache.make_key(audio, "base", "fi")
+    assert key != TranscriptionCache.make_key(audio, "base", "et", target_text="tere")
+    assert key != TranscriptionCache.make_key(np.ones(160, dtype=np.float32), "base", "et")
+
+
+def test_concurrent_requests_share_one_decode():
+    cache = TranscriptionCache(max_entries=8)
+    calls = []
+
+    async def main():
+        return await asyncio.gather(*[cache.get_or_compute("k", counting_compute(calls)) for _ in range(5)])
+
+    assert asyncio.run(main()) == [{"text": "tere"}] * 5
+    assert calls == ["tere"]
+    stats = cache.stats()
+    assert (stats["misses"], stats["coalesced"]) == (1, 4)
+
+
+def test_memory_tier_is_lru_bounded():
+    cache = TranscriptionCache(max_entries=2)
+    calls = []
+
+    async def main():
+        for key in ("a", "b", "a", "c", "a", "b"):
+            await cache.get_or_compute(key, counting_compute(calls, key))
+
+    asyncio.run(main())
+    assert calls == ["a", "b", "c", "b"]  # "b" LRU'dan düştü, "a" kaldı
+    assert cache.stats()["entries"] == 2
+
+
+def test_disk_tier_survives_restart_and_is_bounded(tmp_path):
+    db_path = tmp_path / "asr_cache.db"
+    cache = TranscriptionCache(max_entries=1, db_path=db_path, max_disk_entries=3, prune_every=2)
+    calls = []
+
+    async def fill():
+        for i in range(6):
+            await cache.get_or_compute(f"k{i}", counting_compute(calls, str(i)))
+
+    asyncio.run(fill())
+    cache.close()
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM asr_results").fetchone()[0] <= 3 + 1
+    assert cache.stats()["disk_evictions"] >= 2
+
+    restarted = TranscriptionCache(max_entries=1, db_path=db_path, max_disk_entries=3)
+    asyncio.run(restarted.get_or_compute("k5", counting_compute(calls, "again")))
+    restarted.close()
+    assert calls == [str(i) for i in range(6)]
+    assert restarted.stats()["disk_hits"] == 1
+
+
+def test_memory_only_cache_opens_no_database(tmp_path):
+    cache = TranscriptionCache(max_entries=4)
+    asyncio.run(cache.get_or_compute("k", counting_compute([])))
+    cache.close()
+    assert list(tmp_path.iterdir()) == []
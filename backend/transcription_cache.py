@@ -0,0 +1,149 @@
+# transcription_cache.py - ses içeriği hash'ine göre ASR sonuç önbelleği
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+from collections import OrderedDict
+from contextlib import closing
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+
+from db import ConnectionPool
+
+
+class TranscriptionCache:
+    """İki katmanlı (bellek LRU + isteğe bağlı SQLite) transkripsiyon önbelleği.
+
+    Aynı anahtar için eşzamanlı istekler tek bir decode'da birleştirilir. Disk katmanı en fazla
+    max_disk_entries satır tutar: her prune_every yazmada bir en eski satırlar silinir. Disk
+    katmanı tek bağlantılı bir havuz (tek thread) kullanır; bağlantı ilk kullanımda açılır ve
+    close() ile kapanır.
+    """
+
+    def __init__(self, max_entries: int = 1024, db_path: Optional[Path] = None,
+                 max_disk_entries: int = 100_000, prune_every: int = 256):
+        self.max_entries = max(1, max_entries)
+        self.db_path = db_path
+        self.max_disk_entries = max(1, max_disk_entries)
+        self.prune_every = max(1, prune_every)
+        self._disk_writes = 0
+        self._db: Optional[ConnectionPool] = None
+
+        self._memory: OrderedDict[str, dict] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.disk_evictions = 0
+
+        if self.db_path is not None:
+            # Şema import sırasında geçici bir bağlantıyla kurulur (fork öncesi açık bağlantı kalmaz)
+            with closing(sqlite3.connect(self.db_path)) as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS asr_results (
+                        key TEXT PRIMARY KEY,
+                        result TEXT NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_asr_results_created ON asr_results (created_at)")
+                # Sınır düşürüldüyse fazlalık başlangıçta silinir
+                self._prune(conn)
+                conn.commit()
+            self._db = ConnectionPool(self.db_path, size=1)
+
+    @staticmethod
+    def make_key(audio: np.ndarray, model_name: str, language: str, target_text: Optional[str] = None) -> str:
+        """Çözülmüş PCM + model adı + dil (+ zorlanmış decode hedefi) üzerinden SHA-256 anahtarı"""
+        digest = hashlib.sha256()
+        digest.update(f"{model_name}:{language}:{target_text or ''}:".encode())
+        digest.update(np.ascontiguousarray(audio, dtype=np.float32).tobytes())
+        return digest.hexdigest()
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[dict]]) -> dict:
+        """Önbellekte varsa döndür, yoksa compute() ile üret ve sakla"""
+        result = self._memory.get(key)
+        if result is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return result
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(self._fill(key, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # shield: bekleyen bir istemcinin iptali ortak decode'u iptal etmesin
+        return await asyncio.shield(task)
+
+    async def _fill(self, key: str, compute: Callable[[], Awaitable[dict]]) -> dict:
+        if self._db is not None:
+            result = await self._db.run(self._disk_get, key)
+            if result is not None:
+                self.disk_hits += 1
+                self._remember(key, result)
+                return result
+
+        self.misses += 1
+        result = await compute()
+        self._remember(key, result)
+        if self._db is not None:
+            await self._db.run(self._disk_put, key, result)
+        return result
+
+    def _remember(self, key: str, result: dict):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    @staticmethod
+    def _disk_get(conn: sqlite3.Connection, key: str) -> Optional[dict]:
+        row = conn.execute("SELECT result FROM asr_results WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _disk_put(self, conn: sqlite3.Connection, key: str, result: dict):
+        conn.execute(
+            "INSERT OR REPLACE INTO asr_results (key, result) VALUES (?, ?)",
+            (key, json.dumps(result, ensure_ascii=False)),
+        )
+        self._disk_writes += 1
+        if self._disk_writes % self.prune_every == 0:
+            self._prune(conn)
+        conn.commit()
+
+    def _prune(self, conn: sqlite3.Connection):
+        """En yeni max_disk_entries satır dışındakileri sil (created_at indeksiyle)"""
+        deleted = conn.execute("""
+            DELETE FROM asr_results WHERE key IN (
+                SELECT key FROM asr_results ORDER BY created_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_disk_entries,)).rowcount
+        self.disk_evictions += deleted
+
+    def close(self):
+        """Disk katmanının bağlantısını kapat"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def stats(self) -> dict:
+        """Önbellek sayaçları"""
+        lookups = self.hits + self.disk_hits + self.coalesced + self.misses
+        return {
+            "entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "disk_evictions": self.disk_evictions,
+            "hit_ratio": round((lookups - self.misses) / lookups, 3) if lookups else 0.0,
+        }
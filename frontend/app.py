@@ -303,8 +303,11 @@ else:
         params = {"limit": pack_size, "level": selected_level}
         if selected_category != "Tümü":
             params["category"] = selected_category
-        resp = requests.get(f"{API}/daily-pack", params=params)
-        st.session_state["pack"] = resp.json()["items"]
+        resp = requests.get(f"{API}/daily-pack", params=params, headers=get_auth_headers())
+        if resp.ok:
+            st.session_state["pack"] = resp.json()["items"]
+        else:
+            st.error(f"Paket alınamadı: {resp.status_code}")
 
     pack = st.session_state.get("pack", [])
     for item in pack:
@@ -378,7 +381,7 @@ else:
                 if audio and st.button(f"Yükle ve Kaydet: {item['text']}", key=item["id"]+"_btn"):
                     files = {"file": (audio.name, audio.read(), audio.type)}
                     data = {"word_id": item["id"]}
-                    r = requests.post(f"{API}/recordings", files=files, data=data)
+                    r = requests.post(f"{API}/recordings", files=files, data=data, headers=get_auth_headers())
                     if r.ok:
                         st.success("Ses yüklendi.")
                     else: